@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from .cache import conectar_senales
+        from .models import Usuario, Estudiante, Docente, Curso, Clase, Matricula
+        conectar_senales([Usuario, Estudiante, Docente, Curso, Clase, Matricula])
+        from . import diagnostico
+        diagnostico.conectar_senales()
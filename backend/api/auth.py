@@ -0,0 +1,152 @@
+"""
+Sesión sin estado para la API.
+
+``LoginView`` emite un token firmado (``django.core.signing``, con la
+SECRET_KEY) con el usuario, el rol elegido y el id de perfil. Las llamadas
+siguientes lo mandan como ``Authorization: Bearer <token>`` y
+``TokenAuthentication`` lo valida sin consultar la BD; las firmas ya
+verificadas quedan en un LRU en memoria del proceso (``TTLCache``) para no
+recalcular el HMAC en cada request.
+
+Los tokens no se pueden revocar uno a uno: vencen a los
+``API_TOKEN_MAX_AGE`` segundos (o antes, rotando la SECRET_KEY).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import AllowAny, BasePermission
+
+TOKEN_SALT = 'api.sesion'
+
+
+class TTLCache:
+    """LRU acotado con vencimiento por entrada; seguro entre hilos."""
+
+    def __init__(self, maxsize=10000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (vence, valor)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            if item[0] <= now:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl=None):
+        vence = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (vence, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_verificados = TTLCache(settings.API_TOKEN_CACHE_SIZE, settings.API_TOKEN_CACHE_TTL)
+
+
+def emitir_token(id_us, role, profile_id):
+    """Token firmado con vencimiento ``API_TOKEN_MAX_AGE``."""
+    exp = int(time.time()) + settings.API_TOKEN_MAX_AGE
+    return signing.dumps({'u': id_us, 'r': role, 'p': profile_id, 'exp': exp}, salt=TOKEN_SALT, compress=True)
+
+
+def verificar_token(token):
+    """
+    Payload ``{u, r, p, exp}`` del token; ``signing.BadSignature`` si la firma
+    no es válida o el token venció.
+    """
+    payload = _verificados.get(token)
+    if payload is None:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+        _verificados.set(token, payload)
+    if payload['exp'] <= time.time():
+        raise signing.SignatureExpired('Token vencido.')
+    return payload
+
+
+class SesionUser:
+    """Usuario autenticado por token (sin instancia de modelo)."""
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, payload):
+        self.id_us = payload['u']
+        self.role = payload['r']
+        self.profile_id = payload['p']
+
+    @property
+    def pk(self):
+        return self.id_us
+
+    def __str__(self):
+        return f'{self.role}:{self.profile_id}'
+
+
+def _vista_abierta(request):
+    """True si todos los permisos de la vista son ``AllowAny``."""
+    view = (getattr(request, 'parser_context', None) or {}).get('view')
+    if view is None:
+        return False
+    return all(isinstance(p, AllowAny) for p in view.get_permissions())
+
+
+class TokenAuthentication(BaseAuthentication):
+    """
+    ``Authorization: Bearer <token>``; sin encabezado la request sigue como
+    anónima. Un token vencido o inválido da 401 solo en vistas que exigen
+    algún permiso: en las ``AllowAny`` se ignora, para que un token viejo
+    guardado en el cliente no rompa los endpoints públicos.
+    """
+
+    keyword = b'bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword:
+            return None
+        try:
+            if len(auth) != 2:
+                raise AuthenticationFailed('Encabezado Authorization inválido.')
+            token = auth[1].decode(errors='replace')
+            try:
+                payload = verificar_token(token)
+            except signing.SignatureExpired:
+                raise AuthenticationFailed('Sesión vencida.')
+            except signing.BadSignature:
+                raise AuthenticationFailed('Token inválido.')
+        except AuthenticationFailed:
+            if _vista_abierta(request):
+                return None
+            raise
+        return SesionUser(payload), token
+
+    def authenticate_header(self, request):
+        return 'Bearer'
+
+
+class EsAdminODebug(BasePermission):
+    """Sesión de rol admin; con DEBUG=True no se exige."""
+
+    def has_permission(self, request, view):
+        return settings.DEBUG or getattr(request.user, 'role', None) == 'admin'
@@ -0,0 +1,119 @@
+"""
+Caché de respuestas para los listados de catálogo (cursos, clases, docentes, matrículas).
+
+Cada listado se guarda ya serializado, por combinación de query params, junto
+con su ETag. La clave incluye la *versión* de cada modelo del que depende el
+listado; crear/editar/borrar uno de esos modelos incrementa su versión (señales
+``post_save``/``post_delete``, conectadas en ``ApiConfig.ready``) y las claves
+viejas simplemente dejan de usarse hasta expirar.
+
+El backend es el alias ``API_CACHE_ALIAS`` de ``CACHES`` (locmem por defecto,
+Redis con ``REDIS_URL``). Con locmem la caché es por proceso: con varios
+workers usar Redis para que la invalidación llegue a todos.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+_PREFIX = 'api:list'
+
+
+def _cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def _version_key(model):
+    return f'{_PREFIX}:ver:{model._meta.label_lower}'
+
+
+def versiones(models):
+    """
+    Versión actual de cada modelo. Si la clave no existe (primer uso o el
+    backend la desalojó) se crea con un valor nuevo, nunca con uno ya usado.
+    """
+    cache = _cache()
+    keys = [_version_key(m) for m in models]
+    got = cache.get_many(keys)
+    for k in keys:
+        if k not in got:
+            cache.add(k, time.time_ns(), timeout=None)
+            got[k] = cache.get(k)
+    return [got[k] for k in keys]
+
+
+def invalidar(*models):
+    """
+    Invalida los listados que dependen de ``models``. Llamar también tras
+    escrituras masivas que no emiten señales (``bulk_create``, ``update()``).
+    """
+    cache = _cache()
+    for m in models:
+        key = _version_key(m)
+        try:
+            cache.incr(key)
+        except ValueError:  # la clave no existe (o fue desalojada)
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def _on_write(sender, **kwargs):
+    invalidar(sender)
+
+
+def conectar_senales(models):
+    from django.db.models.signals import post_delete, post_save
+    for m in models:
+        post_save.connect(_on_write, sender=m, dispatch_uid=f'api-cache-save-{m._meta.label_lower}')
+        post_delete.connect(_on_write, sender=m, dispatch_uid=f'api-cache-delete-{m._meta.label_lower}')
+
+
+def _etag(data):
+    raw = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _no_modificado(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return '*' in tags or etag in tags
+
+
+class CachedListMixin:
+    """
+    Para ``ListAPIView``/``ListCreateAPIView``: cachea el GET de la lista y
+    responde 304 si ``If-None-Match`` coincide.
+
+    ``cache_models``: modelos cuyos cambios invalidan el listado (el propio y
+    los que aportan campos anidados, p.ej. nombre de curso en ClaseSerializer).
+    """
+    cache_models = ()
+
+    def cache_key(self, request):
+        params = sorted(request.query_params.lists())
+        vers = versiones(self.cache_models)
+        raw = json.dumps([self.__class__.__name__, vers, params])
+        return f'{_PREFIX}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+    def list(self, request, *args, **kwargs):
+        key = self.cache_key(request)
+        cache = _cache()
+        hit = cache.get(key)
+        if hit is None:
+            resp = super().list(request, *args, **kwargs)
+            if resp.status_code != status.HTTP_200_OK:
+                return resp
+            hit = {'etag': _etag(resp.data), 'data': resp.data}
+            cache.set(key, hit, timeout=settings.API_CACHE_TIMEOUT)
+
+        headers = {'ETag': hit['etag'], 'Cache-Control': 'private, no-cache'}
+        if _no_modificado(request, hit['etag']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(hit['data'], headers=headers)
@@ -0,0 +1,112 @@
+"""
+Contraseñas de ``Usuario.contrasena_us`` con los hashers de Django (PBKDF2
+por defecto, ver ``PASSWORD_HASHERS``).
+
+- El cálculo del hash corre en un pool de hilos acotado
+  (``PASSWORD_HASH_WORKERS``): ``hashlib.pbkdf2_hmac`` libera el GIL, así que
+  los hashes corren en paralelo sin ocupar todos los workers del servidor. Si
+  hay más de ``PASSWORD_HASH_QUEUE`` verificaciones pendientes se rechaza con
+  ``Saturado`` (503 con Retry-After) en lugar de encolar sin límite.
+- Los hashes en bloque (importación, ``hash_passwords``) usan otro pool,
+  ``PASSWORD_HASH_BATCH_WORKERS``: una importación no ocupa los hilos ni los
+  cupos de los logins.
+- Los logins correctos recientes quedan en un LRU con TTL corto
+  (``PASSWORD_VERIFY_CACHE_TTL``) para que los reintentos y recargas al inicio
+  de una clase no repitan el KDF. La clave incluye el hash guardado: cambiar la
+  contraseña invalida la entrada.
+- Filas antiguas en texto plano se aceptan (comparación en tiempo constante)
+  y se rehashean al primer login correcto; ``python manage.py hash_passwords``
+  migra todas de una vez.
+"""
+import hashlib
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .auth import TTLCache
+
+
+class Saturado(APIException):
+    """Demasiadas verificaciones de contraseña en curso."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Servidor ocupado, intente de nuevo.'
+    default_code = 'saturado'
+    wait = 2  # el exception handler de DRF lo manda como Retry-After
+
+
+_pool = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='kdf')
+_pool_lote = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_BATCH_WORKERS, thread_name_prefix='kdf-lote')
+_cupos = threading.BoundedSemaphore(settings.PASSWORD_HASH_QUEUE)
+_verificadas = TTLCache(settings.PASSWORD_VERIFY_CACHE_SIZE, settings.PASSWORD_VERIFY_CACHE_TTL)
+
+
+def _en_pool(fn, *args):
+    if not _cupos.acquire(blocking=False):
+        raise Saturado()
+    try:
+        return _pool.submit(fn, *args).result()
+    finally:
+        _cupos.release()
+
+
+def es_hash(valor):
+    """True si ``valor`` tiene el formato de algún hasher configurado."""
+    try:
+        identify_hasher(valor)
+        return True
+    except ValueError:
+        return False
+
+
+def hashear(contrasena):
+    """Hash para guardar en ``contrasena_us`` (en el pool)."""
+    return _en_pool(make_password, contrasena)
+
+
+def hashear_lote(contrasenas):
+    """Hashes de varias contraseñas en paralelo, en el pool de lotes (no compite con los logins)."""
+    return list(_pool_lote.map(make_password, contrasenas))
+
+
+def _necesita_rehash(guardado):
+    try:
+        return identify_hasher(guardado).must_update(guardado)
+    except ValueError:
+        return True  # texto plano
+
+
+def _clave_cache(id_us, contrasena, guardado):
+    msg = f'{id_us}\0{contrasena}\0{guardado}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), msg, hashlib.sha256).digest()
+
+
+def verificar(id_us, contrasena, guardado):
+    """
+    ``(ok, nuevo_hash)``. ``nuevo_hash`` no es None cuando la fila estaba en
+    texto plano o con parámetros viejos y hay que actualizarla.
+    """
+    key = _clave_cache(id_us, contrasena, guardado)
+    if _verificadas.get(key):
+        return True, None
+    if es_hash(guardado):
+        ok = _en_pool(check_password, contrasena, guardado)
+    else:
+        ok = bool(guardado) and hmac.compare_digest(guardado.encode(), contrasena.encode())
+    if not ok:
+        return False, None
+    if _necesita_rehash(guardado):
+        nuevo = hashear(contrasena)
+        _verificadas.set(_clave_cache(id_us, contrasena, nuevo), True)
+        return True, nuevo
+    _verificadas.set(key, True)
+    return True, None
+
+
+def simular_verificacion(contrasena):
+    """Costo de un hash para usuarios inexistentes (no revela cuáles existen por tiempo)."""
+    hashear(contrasena)
@@ -0,0 +1,238 @@
+"""
+Consultas de lectura sobre ResultadosEvaluacion.
+
+- ``filtrar_resultados``: filtros comunes (estudiante, clase, curso, rango de fechas).
+- ``pagina_keyset``: paginación por cursor sobre ``(fechaeva_re, id_re)``;
+  cada página es un ``WHERE (fecha, id) < cursor ... LIMIT n``, así las
+  páginas profundas cuestan lo mismo que la primera.
+- ``exportar_csv`` / ``exportar_json``: respuestas en streaming que recorren
+  la consulta por bloques (cursor del lado del servidor en PostgreSQL).
+- ``distribucion_niveles`` / ``tendencia_niveles`` / ``top_distraidos``:
+  agregados calculados en la BD (GROUP BY y funciones de ventana).
+
+Todas las lecturas usan ``.values()``: sin instancias de modelo ni joins
+resueltos en Python.
+"""
+import base64
+import csv
+import json
+
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Value, Window
+from django.db.models.functions import (
+    Concat, RowNumber, Trim, TruncDay, TruncHour, TruncMonth, TruncWeek,
+)
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import ResultadosEvaluacion
+
+RESULTADO_CAMPOS = (
+    'id_re', 'nivelaten_re', 'atencion_ia_re', 'fechaeva_re',
+    'id_est', 'id_cl', 'clase', 'curso', 'estudiante',
+)
+ORDEN = ('-fechaeva_re', '-id_re')
+NIVELES = ('ATENTO', 'NEUTRO', 'DISTRAIDO')
+EXPORT_CHUNK = 2000
+
+
+def _fecha(txt, campo, fin_de_dia=False):
+    op = 'lte' if fin_de_dia else 'gte'
+    try:
+        d = parse_date(txt)
+        if d is not None:
+            # 'hasta=2025-06-30' incluye todo ese día
+            return {f'fechaeva_re__date__{op}': d}
+        dt = parse_datetime(txt)
+    except ValueError:
+        dt = None
+    if dt is None:
+        raise ValidationError({campo: 'Fecha inválida (ISO 8601).'})
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return {f'fechaeva_re__{op}': dt}
+
+
+def filtrar_resultados(params):
+    """QuerySet de resultados filtrado por ``id_est``, ``id_cl``, ``id_cur``, ``desde`` y ``hasta``."""
+    qs = ResultadosEvaluacion.objects.all()
+    if params.get('id_est'):
+        qs = qs.filter(id_est_id=params['id_est'])
+    if params.get('id_cl'):
+        qs = qs.filter(id_cl_id=params['id_cl'])
+    if params.get('id_cur'):
+        qs = qs.filter(id_cl__id_cur_id=params['id_cur'])
+    if params.get('desde'):
+        qs = qs.filter(**_fecha(params['desde'], 'desde'))
+    if params.get('hasta'):
+        qs = qs.filter(**_fecha(params['hasta'], 'hasta', fin_de_dia=True))
+    return qs
+
+
+def resultados_values(qs):
+    """Proyección plana de ``RESULTADO_CAMPOS`` (nombres resueltos en SQL) en orden descendente."""
+    return (anotar_nombres(qs).annotate(curso=F('id_cl__id_cur__nombre_cur'))
+              .order_by(*ORDEN).values(*RESULTADO_CAMPOS))
+
+
+def fila_json(row):
+    row['fechaeva_re'] = row['fechaeva_re'].isoformat()
+    return row
+
+
+# ---------- cursor ----------
+def encode_cursor(row):
+    raw = json.dumps([row['fechaeva_re'].isoformat(), row['id_re']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(txt):
+    """Cursor opaco -> (fechaeva_re, id_re); ValidationError si no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(txt + '=' * (-len(txt) % 4))
+        fecha, id_re = json.loads(raw)
+        dt = parse_datetime(fecha)
+        if dt is None:
+            raise ValueError(fecha)
+        return dt, int(id_re)
+    except (ValueError, TypeError):
+        raise ValidationError({'cursor': 'Cursor inválido.'})
+
+
+def pagina_keyset(qs, cursor=None, limit=20):
+    """
+    Una página de ``resultados_values(qs)`` posterior a ``cursor``.
+
+    Retorna ``(filas, next_cursor)``; ``next_cursor`` es None en la última página.
+    """
+    if cursor:
+        fecha, id_re = decode_cursor(cursor)
+        qs = qs.filter(Q(fechaeva_re__lt=fecha) | Q(fechaeva_re=fecha, id_re__lt=id_re))
+    rows = list(resultados_values(qs)[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [fila_json(r) for r in rows[:limit]], next_cursor
+
+
+# ---------- exportación ----------
+class _Echo:
+    """Pseudo-buffer para csv.writer: retorna la línea en vez de escribirla."""
+
+    def write(self, value):
+        return value
+
+
+def _iter_filas(qs):
+    return resultados_values(qs).iterator(chunk_size=EXPORT_CHUNK)
+
+
+def _csv_stream(qs):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(RESULTADO_CAMPOS)
+    buf = []
+    for row in _iter_filas(qs):
+        row['fechaeva_re'] = row['fechaeva_re'].isoformat()
+        buf.append(writer.writerow([row[c] for c in RESULTADO_CAMPOS]))
+        if len(buf) >= EXPORT_CHUNK:
+            yield ''.join(buf); buf.clear()
+    if buf:
+        yield ''.join(buf)
+
+
+def _json_stream(qs):
+    yield '['
+    sep = ''
+    buf = []
+    for row in _iter_filas(qs):
+        buf.append(sep + json.dumps(fila_json(row), ensure_ascii=False))
+        sep = ','
+        if len(buf) >= EXPORT_CHUNK:
+            yield ''.join(buf); buf.clear()
+    buf.append(']')
+    yield ''.join(buf)
+
+
+def exportar_csv(qs, filename='resultados.csv'):
+    resp = StreamingHttpResponse(_csv_stream(qs), content_type='text/csv; charset=utf-8')
+    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return resp
+
+
+def exportar_json(qs, filename='resultados.json'):
+    resp = StreamingHttpResponse(_json_stream(qs), content_type='application/json')
+    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return resp
+
+
+# ---------- agregados ----------
+BUCKETS = {'hour': TruncHour, 'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+
+def _conteo_niveles():
+    """Count por nivel como agregados condicionales (una sola pasada, sin pivot en Python)."""
+    return {n: Count('id_re', filter=Q(nivelaten_re=n)) for n in NIVELES}
+
+
+def distribucion_niveles(qs):
+    """{"total", "niveles": {nivel: n}, "porcentajes": {nivel: %}} en una consulta."""
+    agg = qs.aggregate(total=Count('id_re'), **_conteo_niveles())
+    total = agg.pop('total')
+    return {
+        'total': total,
+        'niveles': agg,
+        'porcentajes': {n: round(100.0 * agg[n] / total, 1) if total else 0.0 for n in NIVELES},
+    }
+
+
+def tendencia_niveles(qs, bucket='day'):
+    """
+    Conteos por nivel en cada intervalo ``bucket`` (hour|day|week|month), en
+    orden cronológico. ``t`` es fecha-hora ISO para ``hour`` y fecha para el resto.
+    """
+    rows = (qs.annotate(t=BUCKETS[bucket]('fechaeva_re'))
+              .values('t')
+              .annotate(total=Count('id_re'), **_conteo_niveles())
+              .order_by('t'))
+    if bucket == 'hour':
+        return [dict(r, t=r['t'].isoformat()) for r in rows]
+    return [dict(r, t=r['t'].date().isoformat()) for r in rows]
+
+
+def anotar_nombres(qs):
+    """Anota ``clase`` y ``estudiante`` (nombre completo) resueltos en SQL."""
+    return qs.annotate(
+        clase=F('id_cl__nombre_cl'),
+        estudiante=Trim(Concat('id_est__nombre_est', Value(' '), 'id_est__apellido_est')),
+    )
+
+
+def rankear_distraidos(rows, top=10, por_clase=False, min_evaluaciones=1):
+    """
+    Ordena grupos con ``total`` y ``distraidos`` por proporción de DISTRAIDO.
+
+    Con ``por_clase`` el ranking es por clase (ROW_NUMBER() OVER (PARTITION BY
+    id_cl)) y se retornan los ``top`` primeros de cada una.
+    """
+    rows = (rows.filter(total__gte=min_evaluaciones, distraidos__gt=0)
+                .annotate(pct_distraido=ExpressionWrapper(100.0 * F('distraidos') / F('total'),
+                                                          output_field=FloatField())))
+    if por_clase:
+        rows = (rows.annotate(rank=Window(RowNumber(), partition_by=F('id_cl'),
+                                          order_by=[F('pct_distraido').desc(), F('distraidos').desc(),
+                                                    F('id_est').asc()]))
+                    .filter(rank__lte=top)
+                    .order_by('id_cl', 'rank'))
+    else:
+        rows = rows.order_by('-pct_distraido', '-distraidos', 'id_est')[:top]
+    return [dict(r, pct_distraido=round(float(r['pct_distraido']), 1)) for r in rows]
+
+
+def grupo_distraidos(por_clase):
+    return ('id_cl', 'clase', 'id_est', 'estudiante') if por_clase else ('id_est', 'estudiante')
+
+
+def top_distraidos(qs, top=10, por_clase=False, min_evaluaciones=1):
+    """Estudiantes con mayor proporción de resultados DISTRAIDO (ver ``rankear_distraidos``)."""
+    rows = (anotar_nombres(qs).values(*grupo_distraidos(por_clase))
+              .annotate(total=Count('id_re'), distraidos=Count('id_re', filter=Q(nivelaten_re='DISTRAIDO'))))
+    return rankear_distraidos(rows, top, por_clase, min_evaluaciones)
@@ -0,0 +1,79 @@
+"""
+Estado de las conexiones a la BD para ``GET /api/diagnostico/db/``.
+
+Con ``DB_POOL`` activo reporta las estadísticas del pool de psycopg
+(``ConnectionPool.get_stats``): tamaño, conexiones en uso, requests en espera
+y tiempo medio de espera por una conexión. Sin pool reporta la configuración
+de conexiones persistentes y cuántas conexiones abrió este proceso (si crece
+al ritmo de los requests, no se están reutilizando).
+
+Los contadores son por proceso: con varios workers cada uno responde los suyos.
+"""
+import threading
+import time
+
+from django.db import connections
+
+_lock = threading.Lock()
+_abiertas = {}  # alias -> conexiones nuevas desde el arranque
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    with _lock:
+        _abiertas[connection.alias] = _abiertas.get(connection.alias, 0) + 1
+
+
+def conectar_senales():
+    from django.db.backends.signals import connection_created
+    connection_created.connect(_on_connection_created, dispatch_uid='api-diagnostico-conexiones')
+
+
+def _stats_pool(pool):
+    st = pool.get_stats()
+
+    def g(k):
+        return st.get(k, 0)  # psycopg_pool omite los contadores en cero
+
+    tam, libres = g('pool_size'), g('pool_available')
+    en_uso = tam - libres
+    n = g('requests_num')
+    return {
+        'min': g('pool_min'), 'max': g('pool_max'), 'tamano': tam,
+        'en_uso': en_uso, 'libres': libres,
+        'utilizacion_pct': round(100.0 * en_uso / g('pool_max'), 1) if g('pool_max') else 0.0,
+        'esperando': g('requests_waiting'),
+        'requests': n,
+        'requests_encolados': g('requests_queued'),
+        'espera_media_ms': round(g('requests_wait_ms') / n, 2) if n else 0.0,
+        'timeouts': g('requests_errors'),
+        'conexiones_creadas': g('connections_num'),
+        'conexion_media_ms': round(g('connections_ms') / g('connections_num'), 2) if g('connections_num') else 0.0,
+        'conexiones_perdidas': g('connections_lost'),
+    }
+
+
+def estado_db(alias='default'):
+    conn = connections[alias]
+    reutilizada = conn.connection is not None
+    t0 = time.perf_counter()
+    conn.ensure_connection()
+    espera_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute('SELECT 1')
+        cur.fetchone()
+    rtt_ms = (time.perf_counter() - t0) * 1000
+
+    pool = getattr(conn, 'pool', None)  # solo backend postgresql con OPTIONS['pool']
+    return {
+        'alias': alias,
+        'vendor': conn.vendor,
+        'modo': 'pool' if pool else ('persistente' if conn.settings_dict.get('CONN_MAX_AGE') else 'por_request'),
+        'conn_max_age': conn.settings_dict.get('CONN_MAX_AGE'),
+        'health_checks': conn.settings_dict.get('CONN_HEALTH_CHECKS', False),
+        'conexion_reutilizada': reutilizada,
+        'obtener_conexion_ms': round(espera_ms, 2),
+        'select1_ms': round(rtt_ms, 2),
+        'conexiones_abiertas_proceso': _abiertas.get(alias, 0),
+        'pool': _stats_pool(pool) if pool else None,
+    }
@@ -0,0 +1,300 @@
+"""
+Importación masiva de estudiantes, docentes y matrículas desde CSV o XLSX.
+
+Las filas se procesan en bloques de ``chunk`` filas. Por bloque:
+
+1. se validan con el mismo serializer del alta individual (estudiantes y
+   docentes) o resolviendo estudiante/clase (matrículas);
+2. se traen en una consulta los ``usuario_us`` / ``ci`` / matrículas ya
+   existentes para detectar duplicados, además de los repetidos dentro del
+   mismo archivo;
+3. las filas válidas se escriben con ``bulk_create`` en una transacción
+   (usuarios primero, luego los perfiles con su ``id_us``).
+
+Una fila inválida no frena el resto; el informe lista los errores por número
+de fila del archivo (la cabecera es la fila 1) y las filas/segundo. Lo usan
+``POST /api/importar/<entidad>/`` y ``python manage.py importar``.
+
+Columnas (mismos nombres que el alta individual):
+    estudiantes: ci, nombre, apellido, fechanac, sexo, correo, telefono, usuario, contrasena
+    docentes:    los de estudiantes + titulo
+    matriculas:  id_cl + uno de id_est | ci | usuario (del estudiante)
+"""
+import csv
+import datetime
+import io
+import time
+
+from django.db import IntegrityError, transaction
+
+from .cache import invalidar
+from .claves import hashear_lote
+from .models import Clase, Docente, Estudiante, Matricula, Usuario
+from .serializers import DocenteRegistroSerializer, EstudianteRegistroSerializer
+
+CHUNK = 500
+
+
+class ArchivoInvalido(Exception):
+    pass
+
+
+# ---------- lectura ----------
+def _filas_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+        except csv.Error:
+            dialecto = csv.excel
+        reader = csv.reader(texto, dialecto)
+        cabecera = next(reader, None)
+        if not cabecera:
+            raise ArchivoInvalido('Archivo vacío.')
+        yield [c.strip().lower() for c in cabecera]
+        yield from reader
+    except UnicodeDecodeError:
+        raise ArchivoInvalido('El CSV debe estar en UTF-8.')
+    finally:
+        texto.detach()  # no cerrar el archivo subido al terminar
+
+
+def _celda(v):
+    if v is None:
+        return ''
+    if isinstance(v, datetime.datetime):
+        return v.date().isoformat()
+    if isinstance(v, datetime.date):
+        return v.isoformat()
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _filas_xlsx(archivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ArchivoInvalido('Para importar .xlsx instale openpyxl (o suba un CSV).')
+    try:
+        wb = load_workbook(archivo, read_only=True, data_only=True)
+    except Exception as e:  # zip corrupto, formato no soportado, ...
+        raise ArchivoInvalido(f'No se pudo leer el .xlsx: {e}')
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        cabecera = next(rows, None)
+        if not cabecera:
+            raise ArchivoInvalido('Archivo vacío.')
+        yield [_celda(c).strip().lower() for c in cabecera]
+        for r in rows:
+            yield [_celda(c) for c in r]
+    finally:
+        wb.close()
+
+
+def leer_filas(archivo, nombre):
+    """
+    Iterador de ``(numero_de_fila, dict)`` con los valores como texto sin
+    espacios sobrantes; las celdas vacías se omiten y las filas en blanco se
+    saltan. La cabecera se lee de inmediato (``ArchivoInvalido`` si falta).
+    """
+    filas = _filas_xlsx(archivo) if nombre.lower().endswith('.xlsx') else _filas_csv(archivo)
+    cabecera = next(filas)
+
+    def numeradas():
+        for n, valores in enumerate(filas, start=2):
+            row = {k: v.strip() for k, v in zip(cabecera, valores) if k and v is not None and v.strip()}
+            if row:
+                yield n, row
+    return numeradas()
+
+
+def _bloques(filas, chunk):
+    bloque = []
+    for item in filas:
+        bloque.append(item)
+        if len(bloque) >= chunk:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+# ---------- estudiantes / docentes ----------
+class _Personas:
+    def __init__(self, model, serializer, ci_field):
+        self.model, self.serializer, self.ci_field = model, serializer, ci_field
+
+    def procesar(self, bloque, vistos, dry_run):
+        errores, validas = [], []
+        for n, row in bloque:
+            s = self.serializer(data=row)
+            if not s.is_valid():
+                errores.append({'fila': n, 'errores': s.errors})
+                continue
+            d = dict(s.validated_data)
+            ci = d.get(self.ci_field)
+            if ci in ('', None):
+                d.pop(self.ci_field, None)
+            elif not str(ci).isdigit():
+                errores.append({'fila': n, 'errores': {'ci': ['Debe ser numérico.']}})
+                continue
+            else:
+                d[self.ci_field] = int(ci)
+            validas.append((n, d))
+
+        usuarios = {d['usuario'] for _, d in validas if d.get('usuario')}
+        cis = {d[self.ci_field] for _, d in validas if self.ci_field in d}
+        existentes_us = set(Usuario.objects.filter(usuario_us__in=usuarios)
+                            .values_list('usuario_us', flat=True)) if usuarios else set()
+        existentes_ci = set(self.model.objects.filter(**{f'{self.ci_field}__in': cis})
+                            .values_list(self.ci_field, flat=True)) if cis else set()
+
+        nuevas = []
+        for n, d in validas:
+            err = {}
+            u, ci = d.get('usuario'), d.get(self.ci_field)
+            if u and u in existentes_us:
+                err['usuario'] = ['Ya existe.']
+            elif u and u in vistos['usuario']:
+                err['usuario'] = ['Repetido en el archivo.']
+            if ci is not None and ci in existentes_ci:
+                err['ci'] = ['Ya existe.']
+            elif ci is not None and ci in vistos['ci']:
+                err['ci'] = ['Repetido en el archivo.']
+            if err:
+                errores.append({'fila': n, 'errores': err})
+                continue
+            if u:
+                vistos['usuario'].add(u)
+            if ci is not None:
+                vistos['ci'].add(ci)
+            nuevas.append(d)
+
+        if dry_run or not nuevas:
+            return len(nuevas), errores
+
+        con_clave = [d for d in nuevas if d.get('usuario') and d.get('contrasena')]
+        hashes = dict(zip((d['usuario'] for d in con_clave), hashear_lote([d['contrasena'] for d in con_clave])))
+        with transaction.atomic():
+            users = Usuario.objects.bulk_create([
+                Usuario(usuario_us=d['usuario'], contrasena_us=hashes.get(d['usuario'], ''))
+                for d in nuevas if d.get('usuario')
+            ])
+            por_nombre = {x.usuario_us: x for x in users}
+            objs = []
+            for d in nuevas:
+                u = d.pop('usuario', None)
+                d.pop('contrasena', None)
+                objs.append(self.model(id_us=por_nombre.get(u), **d))
+            self.model.objects.bulk_create(objs)
+            # bulk_create no emite señales; si hay una transacción externa, invalidar al confirmarla
+            transaction.on_commit(lambda: invalidar(self.model, Usuario))
+        return len(objs), errores
+
+
+# ---------- matrículas ----------
+class _Matriculas:
+    def procesar(self, bloque, vistos, dry_run):
+        errores, pedidas = [], []
+        for n, row in bloque:
+            err = {}
+            ref = next(((k, row[k]) for k in ('id_est', 'ci', 'usuario') if row.get(k)), None)
+            if ref is None:
+                err['id_est'] = ['Indique id_est, ci o usuario del estudiante.']
+            elif ref[0] != 'usuario' and not ref[1].isdigit():
+                err[ref[0]] = ['Debe ser numérico.']
+            if not row.get('id_cl'):
+                err['id_cl'] = ['Requerido.']
+            elif not row['id_cl'].isdigit():
+                err['id_cl'] = ['Debe ser numérico.']
+            if err:
+                errores.append({'fila': n, 'errores': err})
+                continue
+            k, v = ref
+            pedidas.append((n, k, v if k == 'usuario' else int(v), int(row['id_cl'])))
+
+        # resolución de estudiantes y clases: una consulta por tipo de referencia
+        refs = {k: {v for _, kk, v, _ in pedidas if kk == k} for k in ('id_est', 'ci', 'usuario')}
+        est = {}
+        for k, lookup in (('id_est', 'id_est'), ('ci', 'ci_est'), ('usuario', 'id_us__usuario_us')):
+            if refs[k]:
+                for pk, v in Estudiante.objects.filter(**{f'{lookup}__in': refs[k]}).values_list('id_est', lookup):
+                    est.setdefault((k, v), pk)
+        clases = set(Clase.objects.filter(id_cl__in={c for *_, c in pedidas}).values_list('id_cl', flat=True))
+
+        resueltas = []
+        for n, k, v, id_cl in pedidas:
+            err = {}
+            id_est = est.get((k, v))
+            if id_est is None:
+                err[k] = ['Estudiante inexistente.']
+            if id_cl not in clases:
+                err['id_cl'] = ['Clase inexistente.']
+            if err:
+                errores.append({'fila': n, 'errores': err})
+            else:
+                resueltas.append((n, id_est, id_cl))
+
+        existentes = set()
+        if resueltas:
+            existentes = set(Matricula.objects.filter(id_est_id__in={e for _, e, _ in resueltas},
+                                                      id_cl_id__in={c for *_, c in resueltas})
+                             .values_list('id_est_id', 'id_cl_id'))
+        nuevas = []
+        for n, id_est, id_cl in resueltas:
+            par = (id_est, id_cl)
+            if par in existentes:
+                errores.append({'fila': n, 'errores': {'id_est': ['Ya está matriculado en la clase.']}})
+            elif par in vistos['matricula']:
+                errores.append({'fila': n, 'errores': {'id_est': ['Repetido en el archivo.']}})
+            else:
+                vistos['matricula'].add(par)
+                nuevas.append(Matricula(id_est_id=id_est, id_cl_id=id_cl))
+
+        if dry_run or not nuevas:
+            return len(nuevas), errores
+        with transaction.atomic():
+            Matricula.objects.bulk_create(nuevas)
+            transaction.on_commit(lambda: invalidar(Matricula))
+        return len(nuevas), errores
+
+
+ENTIDADES = {
+    'estudiantes': _Personas(Estudiante, EstudianteRegistroSerializer, 'ci_est'),
+    'docentes': _Personas(Docente, DocenteRegistroSerializer, 'ci_dce'),
+    'matriculas': _Matriculas(),
+}
+
+
+def importar(entidad, filas, chunk=CHUNK, dry_run=False):
+    """
+    Generador: un informe por bloque ``{bloque, filas, creados, errores}`` y
+    al final ``{resumen: {filas, creados, con_error, segundos, filas_por_seg, dry_run}}``.
+
+    Cada bloque se confirma por separado: si uno falla por un conflicto
+    concurrente (IntegrityError) sus filas se informan con error y los
+    bloques anteriores quedan guardados.
+    """
+    proc = ENTIDADES[entidad]
+    vistos = {'usuario': set(), 'ci': set(), 'matricula': set()}
+    total = creados = con_error = 0
+    t0 = time.perf_counter()
+    for i, bloque in enumerate(_bloques(filas, chunk), start=1):
+        try:
+            n_ok, errores = proc.procesar(bloque, vistos, dry_run)
+        except IntegrityError as e:
+            n_ok, errores = 0, [{'fila': n, 'errores': {'bloque': [f'No se guardó el bloque: {e}']}}
+                                for n, _ in bloque]
+        total += len(bloque)
+        creados += n_ok
+        con_error += len(errores)
+        errores.sort(key=lambda e: e['fila'])
+        yield {'bloque': i, 'filas': len(bloque), 'creados': n_ok, 'errores': errores}
+    seg = time.perf_counter() - t0
+    yield {'resumen': {
+        'filas': total, 'creados': creados, 'con_error': con_error, 'dry_run': dry_run,
+        'segundos': round(seg, 3), 'filas_por_seg': round(total / seg, 1) if seg else None,
+    }}
@@ -0,0 +1,109 @@
+"""
+Lectura rápida de los listados de catálogo (``ListCreateAPIView``).
+
+``FastListMixin`` responde el GET de la lista desde ``.values()`` (dicts
+armados por la BD, sin instancias ni ``ModelSerializer``) con la misma forma
+que el serializer de la vista, y agrega de forma opcional:
+
+    ?fields=id_cl,nombre_cl        subconjunto de campos
+    ?limit=50&offset=100           -> {count, next, previous, results}
+    ?cursor=&limit=50              -> {results, next_cursor} (keyset por pk;
+                                      cursor vacío = primera página)
+
+Sin esos parámetros la respuesta es la lista completa, como antes.
+"""
+import base64
+import json
+
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_pk(pk):
+    return base64.urlsafe_b64encode(json.dumps([pk]).encode()).decode().rstrip('=')
+
+
+def _decode_pk(txt):
+    try:
+        (pk,) = json.loads(base64.urlsafe_b64decode(txt + '=' * (-len(txt) % 4)))
+        return int(pk)
+    except (ValueError, TypeError):
+        raise ValidationError({'cursor': 'Cursor inválido.'})
+
+
+def _entero(params, name, default, minimo, maximo):
+    try:
+        return max(minimo, min(maximo, int(params.get(name) or default)))
+    except ValueError:
+        raise ValidationError({name: 'Debe ser un entero.'})
+
+
+class FastListMixin:
+    """
+    ``values_fields``: nombre de salida -> lookup o expresión ORM, en el orden
+    del serializer. Un nombre igual a su lookup se pide tal cual a ``values()``.
+    """
+    values_fields = {}
+    MAX_LIMIT = 1000
+
+    def campos_pedidos(self, request):
+        txt = request.query_params.get('fields')
+        if not txt:
+            return list(self.values_fields)
+        pedidos = [f.strip() for f in txt.split(',') if f.strip()]
+        desconocidos = [f for f in pedidos if f not in self.values_fields]
+        if desconocidos:
+            raise ValidationError({'fields': f'Campos desconocidos: {", ".join(desconocidos)}. '
+                                             f'Disponibles: {", ".join(self.values_fields)}.'})
+        return pedidos
+
+    def values_queryset(self, qs, campos, con_pk=False):
+        pk = qs.model._meta.pk.name
+        args, exprs = [], {}
+        if con_pk:
+            exprs['_pk'] = F(pk)
+        for name in campos:
+            ref = self.values_fields[name]
+            if ref == name:
+                args.append(name)
+            else:
+                exprs[name] = F(ref) if isinstance(ref, str) else ref
+        return qs.order_by(pk).values(*args, **exprs)
+
+    def list(self, request, *args, **kwargs):
+        if not self.values_fields:
+            return super().list(request, *args, **kwargs)
+        params = request.query_params
+        qs = self.filter_queryset(self.get_queryset())
+        campos = self.campos_pedidos(request)
+
+        if 'cursor' in params:
+            limit = _entero(params, 'limit', 100, 1, self.MAX_LIMIT)
+            if params['cursor']:
+                qs = qs.filter(pk__gt=_decode_pk(params['cursor']))
+            # el pk se pide siempre para armar el cursor; se quita si no estaba en fields
+            rows = list(self.values_queryset(qs, campos, con_pk=True)[:limit + 1])
+            next_cursor = _encode_pk(rows[limit - 1]['_pk']) if len(rows) > limit else None
+            rows = rows[:limit]
+            for r in rows:
+                del r['_pk']
+            return Response({'results': rows, 'next_cursor': next_cursor})
+
+        if 'limit' in params or 'offset' in params:
+            limit = _entero(params, 'limit', 100, 1, self.MAX_LIMIT)
+            offset = _entero(params, 'offset', 0, 0, 2**31)
+            count = qs.count()
+            rows = list(self.values_queryset(qs, campos)[offset:offset + limit])
+            url = request.build_absolute_uri()
+            nxt = replace_query_param(url, 'offset', offset + limit) if offset + limit < count else None
+            if offset <= 0:
+                prev = None
+            elif offset - limit <= 0:
+                prev = remove_query_param(url, 'offset')
+            else:
+                prev = replace_query_param(url, 'offset', offset - limit)
+            return Response({'count': count, 'next': nxt, 'previous': prev, 'results': rows})
+
+        return Response(list(self.values_queryset(qs, campos)))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.resumen import TABLAS_TTL, crear_tabla, reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea (si falta) y recalcula el resumen diario de atención (resumenatencion) "
+        "desde resultadosevaluacion. Sin --desde/--hasta recalcula todo el historial y "
+        "habilita el rollup para los agregados. Mientras corre, los POST de resultados "
+        "esperan (lock en resumenestado)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial (YYYY-MM-DD), inclusive')
+        parser.add_argument('--hasta', help='Fecha final (YYYY-MM-DD), inclusive')
+
+    def handle(self, *args, **opts):
+        rango = {}
+        for k in ('desde', 'hasta'):
+            if opts[k]:
+                try:
+                    rango[k] = parse_date(opts[k])
+                except ValueError:
+                    rango[k] = None
+                if rango[k] is None:
+                    raise CommandError(f'--{k} inválida: {opts[k]}')
+
+        if crear_tabla():
+            self.stdout.write('Tablas del resumen creadas (índices: python manage.py ensure_indexes).')
+            # los servidores recuerdan "no hay tablas" hasta TABLAS_TTL: si el backfill
+            # empezara antes, sus POST de ese lapso no tomarían el lock ni sumarían al rollup
+            self.stdout.write(f'Esperando {TABLAS_TTL + 1:g}s a que los servidores detecten las tablas...')
+            time.sleep(TABLAS_TTL + 1)
+        n = reconstruir_resumen(**rango)
+        self.stdout.write(self.style.SUCCESS(f'Resumen recalculado: {n} filas.'))
+        if rango:
+            self.stdout.write('Backfill parcial: el rollup solo se habilita tras uno completo.')
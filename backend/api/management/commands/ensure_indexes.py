@@ -0,0 +1,88 @@
+import datetime
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.models import Clase, Matricula, ResultadosEvaluacion, ResumenAtencion
+
+
+def _consultas_criticas():
+    """(descripción, queryset, índice esperado) de los caminos calientes de la API."""
+    hace_30 = datetime.date.today() - datetime.timedelta(days=30)
+    re = ResultadosEvaluacion.objects.order_by('-fechaeva_re', '-id_re')
+    return [
+        ('resultados por estudiante', re.filter(id_est_id=1)[:20], 're_est_fecha_idx'),
+        ('resultados por clase', re.filter(id_cl_id=1)[:20], 're_cl_fecha_idx'),
+        ('resultados por curso', re.filter(id_cl__id_cur_id=1)[:20], 'cl_cur_idx'),
+        ('resultados (cursor, sin filtro)', re[:20], 're_fecha_idx'),
+        ('clases por curso', Clase.objects.filter(id_cur_id=1), 'cl_cur_idx'),
+        ('clases por docente', Clase.objects.filter(id_dce_id=1), 'cl_dce_idx'),
+        ('matrículas por clase', Matricula.objects.filter(id_cl_id=1), 'mat_cl_idx'),
+        ('resumen por clase', ResumenAtencion.objects.filter(id_cl_id=1, fecha_ra__gte=hace_30), 'ra_cl_fecha_idx'),
+        ('resumen por estudiante', ResumenAtencion.objects.filter(id_est_id=1, fecha_ra__gte=hace_30), 'ra_est_fecha_idx'),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea (de forma idempotente) los índices declarados en Meta.indexes de los modelos "
+        "de api (que son unmanaged) y, con --check, verifica con EXPLAIN que las consultas "
+        "calientes los usan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar el SQL')
+        parser.add_argument('--check', action='store_true', help='Verificar los planes con EXPLAIN')
+
+    def handle(self, *args, **opts):
+        creados = self.crear_indices(opts['dry_run'])
+        if not opts['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Índices creados: {creados}'))
+        if opts['check']:
+            self.verificar_planes()
+
+    def crear_indices(self, dry_run=False):
+        pg = connection.vendor == 'postgresql'
+        tablas = set(connection.introspection.table_names())
+        creados = 0
+        # CONCURRENTLY en PostgreSQL: no bloquea escrituras en tablas grandes (requiere atomic=False)
+        with connection.schema_editor(atomic=False, collect_sql=dry_run) as editor:
+            for model in apps.get_app_config('api').get_models():
+                table = model._meta.db_table
+                if not model._meta.indexes:
+                    continue
+                if table not in tablas:
+                    self.stdout.write(self.style.WARNING(f'{table}: no existe, se omite'))
+                    continue
+                with connection.cursor() as cur:
+                    existentes = connection.introspection.get_constraints(cur, table)
+                for index in model._meta.indexes:
+                    if index.name in existentes:
+                        self.stdout.write(f'{table}.{index.name}: ya existe')
+                        continue
+                    editor.add_index(model, index, **({'concurrently': True} if pg else {}))
+                    creados += 1
+                    if not dry_run:
+                        self.stdout.write(f'{table}.{index.name}: creado')
+            if dry_run:
+                for sql in editor.collected_sql:
+                    self.stdout.write(sql)
+        return creados
+
+    def verificar_planes(self):
+        fallas = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # en tablas chicas el planner prefiere seq scan; se desactiva solo en esta transacción
+                with connection.cursor() as cur:
+                    cur.execute('SET LOCAL enable_seqscan = off')
+            for desc, qs, index in _consultas_criticas():
+                plan = qs.explain()
+                ok = index in plan
+                self.stdout.write(f"{'OK  ' if ok else 'FALLA'} {desc}: {index}")
+                if not ok:
+                    fallas.append(desc)
+                    self.stdout.write('      ' + plan.replace('\n', '\n      '))
+        if fallas:
+            raise CommandError(f'{len(fallas)} consultas no usan el índice esperado.')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.claves import es_hash, hashear_lote
+from api.models import Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        "Reemplaza las contraseñas en texto plano de usuario.contrasena_us por su hash "
+        "(PASSWORD_HASHERS). Idempotente: las filas ya hasheadas y las vacías no se tocan. "
+        "Sin correrlo, cada fila se migra igual en su próximo login correcto."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=500, help='Filas por transacción (default 500)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo contar las filas pendientes')
+
+    def handle(self, *args, **opts):
+        filas = Usuario.objects.order_by('pk').values_list('id_us', 'contrasena_us')
+        pendientes = [(pk, txt) for pk, txt in filas.iterator(chunk_size=2000) if txt and not es_hash(txt)]
+        if opts['dry_run']:
+            self.stdout.write(f'{len(pendientes)} contraseñas en texto plano.')
+            return
+
+        migradas = 0
+        for i in range(0, len(pendientes), opts['batch']):
+            lote = pendientes[i:i + opts['batch']]
+            hashes = hashear_lote([txt for _, txt in lote])
+            with transaction.atomic():
+                for (pk, txt), h in zip(lote, hashes):
+                    # condicionado al valor leído: si cambió mientras tanto no se pisa
+                    migradas += Usuario.objects.filter(pk=pk, contrasena_us=txt).update(contrasena_us=h)
+            self.stdout.write(f'  {min(i + opts["batch"], len(pendientes))}/{len(pendientes)}')
+        self.stdout.write(self.style.SUCCESS(f'Contraseñas hasheadas: {migradas}.'))
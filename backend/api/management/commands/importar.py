@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importacion import CHUNK, ENTIDADES, ArchivoInvalido, importar, leer_filas
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa estudiantes, docentes o matrículas desde un .csv o .xlsx, en bloques con "
+        "bulk_create. Las filas con error se informan y no detienen la importación "
+        "(columnas: ver api/importacion.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('entidad', choices=sorted(ENTIDADES))
+        parser.add_argument('archivo')
+        parser.add_argument('--chunk', type=int, default=CHUNK, help=f'Filas por bloque (default {CHUNK})')
+        parser.add_argument('--dry-run', action='store_true', help='Solo validar, sin guardar')
+
+    def handle(self, *args, **opts):
+        try:
+            with open(opts['archivo'], 'rb') as f:
+                filas = leer_filas(f, opts['archivo'])
+                for inf in importar(opts['entidad'], filas, chunk=max(1, opts['chunk']), dry_run=opts['dry_run']):
+                    if 'resumen' in inf:
+                        r = inf['resumen']
+                        verbo = 'válidas' if r['dry_run'] else 'creadas'
+                        self.stdout.write(self.style.SUCCESS(
+                            f"{r['creados']}/{r['filas']} filas {verbo}, {r['con_error']} con error, "
+                            f"{r['segundos']} s ({r['filas_por_seg']} filas/s)."))
+                        continue
+                    self.stdout.write(f"  bloque {inf['bloque']}: {inf['creados']}/{inf['filas']}")
+                    for e in inf['errores']:
+                        detalle = '; '.join(f'{k}: {" ".join(map(str, v))}' for k, v in e['errores'].items())
+                        self.stderr.write(f"    fila {e['fila']}: {detalle}")
+        except OSError as e:
+            raise CommandError(str(e))
+        except ArchivoInvalido as e:
+            raise CommandError(str(e))
@@ -0,0 +1,55 @@
+"""
+Matrícula masiva en una clase con una sola sentencia:
+
+    INSERT INTO matricula (id_est, id_cl, fecha)
+    SELECT ... FROM (<consulta de estudiantes>) ... ON CONFLICT DO NOTHING
+
+Los pares (id_est, id_cl) que ya existen los descarta la restricción única
+de ``matricula`` en lugar de fallar fila por fila.
+"""
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import invalidar
+from .models import Estudiante, Matricula
+
+
+def estudiantes_origen(id_est=None, desde_clase=None, id_cur=None):
+    """
+    Estudiantes a matricular (unión de los criterios dados): ids explícitos,
+    matriculados en otra clase o en cualquier clase de un curso.
+    """
+    q = Q()
+    if id_est:
+        q |= Q(id_est__in=id_est)
+    if desde_clase:
+        q |= Q(id_est__in=Matricula.objects.filter(id_cl_id=desde_clase).values('id_est'))
+    if id_cur:
+        q |= Q(id_est__in=Matricula.objects.filter(id_cl__id_cur_id=id_cur).values('id_est'))
+    if not q:
+        return Estudiante.objects.none()
+    return Estudiante.objects.filter(q)
+
+
+def matricular(id_cl, estudiantes):
+    """
+    Matricula ``estudiantes`` (queryset de Estudiante) en la clase ``id_cl``.
+    Retorna ``{candidatos, insertados, omitidos}``; omitidos = ya matriculados.
+    """
+    sub_sql, sub_params = estudiantes.values('id_est').query.sql_with_params()
+    qn = connection.ops.quote_name
+    # "WHERE TRUE": SQLite lo necesita para no confundir ON CONFLICT con un JOIN ... ON
+    sql = (
+        f"INSERT INTO {qn(Matricula._meta.db_table)} (id_est, id_cl, fecha) "
+        f"SELECT DISTINCT s.id_est, %s, %s FROM ({sub_sql}) s WHERE TRUE "
+        f"ON CONFLICT DO NOTHING"
+    )
+    with transaction.atomic():
+        candidatos = estudiantes.count()
+        with connection.cursor() as cur:
+            cur.execute(sql, [id_cl, timezone.localdate(), *sub_params])
+            insertados = cur.rowcount
+        if insertados:
+            transaction.on_commit(lambda: invalidar(Matricula))
+    return {'candidatos': candidatos, 'insertados': insertados, 'omitidos': candidatos - insertados}
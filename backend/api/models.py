@@ -94,6 +94,11 @@ class Clase(models.Model):
     class Meta:
         managed = False
         db_table = 'clase'
+        # tablas unmanaged: los índices se crean con `python manage.py ensure_indexes`
+        indexes = [
+            models.Index(fields=['id_cur'], name='cl_cur_idx'),
+            models.Index(fields=['id_dce'], name='cl_dce_idx'),
+        ]
 
 
 class Matricula(models.Model):
@@ -105,7 +110,10 @@ class Matricula(models.Model):
     class Meta:
         managed = False
         db_table = 'matricula'
-        unique_together = (('id_est', 'id_cl'),)
+        unique_together = (('id_est', 'id_cl'),)  # cubre también los filtros por id_est
+        indexes = [
+            models.Index(fields=['id_cl'], name='mat_cl_idx'),
+        ]
 
 class ResultadosEvaluacion(models.Model):
     id_re = models.BigAutoField(primary_key=True)
@@ -117,4 +125,53 @@ class ResultadosEvaluacion(models.Model):
 
     class Meta:
         managed = False
-        db_table = 'resultadosevaluacion'
\ No newline at end of file
+        db_table = 'resultadosevaluacion'
+        # mismo orden que la paginación por cursor (fechaeva_re DESC, id_re DESC);
+        # include (solo PostgreSQL) permite index-only scans en los agregados
+        indexes = [
+            models.Index(fields=['id_est', '-fechaeva_re', '-id_re'], name='re_est_fecha_idx',
+                         include=['nivelaten_re', 'id_cl']),
+            models.Index(fields=['id_cl', '-fechaeva_re', '-id_re'], name='re_cl_fecha_idx',
+                         include=['nivelaten_re', 'id_est']),
+            models.Index(fields=['-fechaeva_re', '-id_re'], name='re_fecha_idx'),
+        ]
+
+# ==== Resumen diario de atención (rollup de ResultadosEvaluacion) ====
+class ResumenAtencion(models.Model):
+    """
+    Conteos por nivel de un estudiante en una clase y día. Se actualiza en
+    cada POST de resultados (ver api/resumen.py) y se reconstruye con
+    ``python manage.py backfill_resumen``.
+    """
+    id_ra = models.BigAutoField(primary_key=True)
+    fecha_ra = models.DateField()
+    id_cl = models.ForeignKey('Clase', models.DO_NOTHING, db_column='id_cl', db_constraint=False)
+    id_est = models.ForeignKey('Estudiante', models.DO_NOTHING, db_column='id_est', db_constraint=False)
+    atento_ra = models.IntegerField(default=0)
+    neutro_ra = models.IntegerField(default=0)
+    distraido_ra = models.IntegerField(default=0)
+    total_ra = models.IntegerField(default=0)
+
+    class Meta:
+        managed = False
+        db_table = 'resumenatencion'
+        unique_together = (('fecha_ra', 'id_cl', 'id_est'),)
+        indexes = [
+            models.Index(fields=['id_cl', 'fecha_ra'], name='ra_cl_fecha_idx'),
+            models.Index(fields=['id_est', 'fecha_ra'], name='ra_est_fecha_idx'),
+        ]
+
+
+class ResumenEstado(models.Model):
+    """
+    Fila única (id_rs=1) con el estado del rollup. Mientras ``completado_rs``
+    sea NULL (nunca corrió un ``backfill_resumen`` completo) los agregados
+    leen el historial y los POST no tocan ``resumenatencion``. Su lock de
+    fila serializa el backfill con las escrituras en vivo (ver api/resumen.py).
+    """
+    id_rs = models.SmallIntegerField(primary_key=True)
+    completado_rs = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = 'resumenestado'
@@ -0,0 +1,236 @@
+"""
+Rollup diario de ResultadosEvaluacion en ``resumenatencion``.
+
+- ``registrar_resultados``: suma incremental de los resultados recién
+  insertados (un UPSERT por (fecha, clase, estudiante)), llamada desde los
+  POST de resultados dentro de su transacción.
+- ``reconstruir_resumen``: recalcula un rango de fechas desde cero (comando
+  ``backfill_resumen``).
+- ``filtrar_resumen`` + ``*_desde_resumen``: los mismos agregados de
+  ``consultas`` leyendo el rollup en lugar del historial completo.
+
+El rollup se usa solo después de un backfill completo registrado en
+``resumenestado`` (``resumen_listo``); antes, los POST no lo tocan y los
+agregados leen el historial. El backfill toma el lock de fila de
+``resumenestado`` en modo exclusivo y cada POST en modo compartido, así que
+nunca se solapan: los POST esperan a que termine el backfill y el backfill
+espera a que confirmen los POST en curso (en SQLite las escrituras ya son
+serializadas).
+
+Mientras no existan las tablas, cada proceso lo recuerda ``TABLAS_TTL``
+segundos en lugar de consultar el catálogo en cada request; por eso
+``backfill_resumen`` espera ese tiempo después de crearlas.
+"""
+import time
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .consultas import BUCKETS, NIVELES, anotar_nombres, grupo_distraidos, rankear_distraidos
+from .models import ResultadosEvaluacion, ResumenAtencion, ResumenEstado
+
+COLUMNAS = {'ATENTO': 'atento_ra', 'NEUTRO': 'neutro_ra', 'DISTRAIDO': 'distraido_ra'}
+BACKFILL_BATCH = 1000
+TABLAS_TTL = 30.0  # segundos que se recuerda que faltan las tablas del rollup
+
+
+def crear_tabla():
+    """Crea ``resumenatencion`` y ``resumenestado`` si faltan (los modelos son unmanaged)."""
+    global _tablas_ok
+    existentes = connection.introspection.table_names()
+    faltan = [m for m in (ResumenAtencion, ResumenEstado) if m._meta.db_table not in existentes]
+    if faltan:
+        with connection.schema_editor() as editor:
+            for m in faltan:
+                editor.create_model(m)
+    ResumenEstado.objects.get_or_create(id_rs=1)
+    _tablas_ok = True
+    return bool(faltan)
+
+
+# ---------- estado ----------
+_tablas_ok = False
+_tablas_revisar = 0.0  # time.monotonic() desde el que se vuelve a mirar el catálogo
+_listo = False
+
+
+def _tablas_existen():
+    """
+    True si existen las tablas del rollup. El positivo se cachea para siempre
+    (no se borran) y el negativo ``TABLAS_TTL`` segundos, así los POST y los
+    agregados no consultan el catálogo en cada request antes del backfill.
+    """
+    global _tablas_ok, _tablas_revisar
+    if not _tablas_ok and time.monotonic() >= _tablas_revisar:
+        _tablas_ok = ResumenEstado._meta.db_table in connection.introspection.table_names()
+        _tablas_revisar = time.monotonic() + TABLAS_TTL
+    return _tablas_ok
+
+
+def _completado(lock=None):
+    """``completado_rs`` de la fila de estado; ``lock``: None | 'share' | 'update'."""
+    sql = f"SELECT completado_rs FROM {connection.ops.quote_name(ResumenEstado._meta.db_table)} WHERE id_rs = 1"
+    if lock and connection.features.has_select_for_update:
+        sql += ' FOR SHARE' if lock == 'share' else ' FOR UPDATE'
+    with connection.cursor() as cur:
+        cur.execute(sql)
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def resumen_listo():
+    """True si ya corrió un backfill completo (el rollup refleja todo el historial)."""
+    global _listo
+    if not _listo:
+        _listo = _tablas_existen() and _completado() is not None
+    return _listo
+
+
+# ---------- actualización incremental ----------
+_UPSERT = None
+
+
+def _upsert_sql():
+    global _UPSERT
+    if _UPSERT is None:
+        qn = connection.ops.quote_name
+        t = qn(ResumenAtencion._meta.db_table)
+        cols = [*COLUMNAS.values(), 'total_ra']
+        # ON CONFLICT ... DO UPDATE: PostgreSQL y SQLite >= 3.24
+        _UPSERT = (
+            f"INSERT INTO {t} (fecha_ra, id_cl, id_est, {', '.join(cols)}) "
+            f"VALUES (%s, %s, %s, {', '.join(['%s'] * len(cols))}) "
+            f"ON CONFLICT (fecha_ra, id_cl, id_est) DO UPDATE SET "
+            + ", ".join(f"{c} = {t}.{c} + EXCLUDED.{c}" for c in cols)
+        )
+    return _UPSERT
+
+
+def registrar_resultados(objs):
+    """
+    Suma al rollup los ``ResultadosEvaluacion`` recién creados. Debe llamarse
+    dentro de la transacción que los insertó: si el UPSERT falla, falla el
+    request y no se guarda ni el resultado ni el rollup (no hay deriva).
+
+    Sin backfill completo todavía no hace nada: el primero incluirá estas filas.
+    """
+    if not objs or not _tablas_existen():
+        return
+    if _completado(lock='share') is None:
+        return
+    conteos = Counter()
+    for o in objs:
+        conteos[(timezone.localdate(o.fechaeva_re), o.id_cl_id, o.id_est_id, o.nivelaten_re)] += 1
+    filas = {}
+    for (fecha, id_cl, id_est, nivel), n in conteos.items():
+        fila = filas.setdefault((fecha, id_cl, id_est), dict.fromkeys(NIVELES, 0))
+        if nivel in fila:
+            fila[nivel] += n
+    params = [
+        (fecha, id_cl, id_est, *(c[n] for n in NIVELES), sum(c.values()))
+        for (fecha, id_cl, id_est), c in filas.items()
+    ]
+    with connection.cursor() as cur:
+        cur.executemany(_upsert_sql(), params)
+
+
+# ---------- reconstrucción ----------
+def reconstruir_resumen(desde=None, hasta=None):
+    """
+    Recalcula el rollup para ``[desde, hasta]`` (fechas, ambos opcionales) con
+    un GROUP BY sobre el historial, en una transacción y con el lock exclusivo
+    de ``resumenestado``. Sin rango marca el rollup como listo. Retorna filas
+    escritas.
+    """
+    crear_tabla()
+    res = ResultadosEvaluacion.objects.annotate(fecha=TruncDate('fechaeva_re'))
+    old = ResumenAtencion.objects.all()
+    if desde:
+        res = res.filter(fecha__gte=desde); old = old.filter(fecha_ra__gte=desde)
+    if hasta:
+        res = res.filter(fecha__lte=hasta); old = old.filter(fecha_ra__lte=hasta)
+    grupos = (res.values('fecha', 'id_cl', 'id_est')
+                 .annotate(total=Count('id_re'),
+                           **{n: Count('id_re', filter=Q(nivelaten_re=n)) for n in NIVELES})
+                 .order_by())
+
+    escritas = 0
+    with transaction.atomic():
+        _completado(lock='update')  # espera a los POST en curso y bloquea los nuevos
+        old.delete()
+        batch = []
+        for g in grupos.iterator(chunk_size=BACKFILL_BATCH):
+            batch.append(ResumenAtencion(
+                fecha_ra=g['fecha'], id_cl_id=g['id_cl'], id_est_id=g['id_est'], total_ra=g['total'],
+                **{COLUMNAS[n]: g[n] for n in NIVELES}))
+            if len(batch) >= BACKFILL_BATCH:
+                ResumenAtencion.objects.bulk_create(batch); escritas += len(batch); batch = []
+        if batch:
+            ResumenAtencion.objects.bulk_create(batch); escritas += len(batch)
+        if not desde and not hasta:
+            ResumenEstado.objects.filter(id_rs=1).update(completado_rs=timezone.now())
+    return escritas
+
+
+# ---------- lecturas ----------
+def resumen_aplicable(params, bucket='day'):
+    """True si la consulta se puede responder desde el rollup (granularidad de día o mayor)."""
+    if bucket == 'hour':
+        return False
+    try:
+        return all(not params.get(k) or parse_date(params[k]) is not None for k in ('desde', 'hasta'))
+    except ValueError:
+        return False  # fecha inválida: la consulta normal responde el 400
+
+
+def filtrar_resumen(params):
+    """Equivalente de ``consultas.filtrar_resultados`` sobre el rollup (fechas sin hora)."""
+    qs = ResumenAtencion.objects.all()
+    if params.get('id_est'):
+        qs = qs.filter(id_est_id=params['id_est'])
+    if params.get('id_cl'):
+        qs = qs.filter(id_cl_id=params['id_cl'])
+    if params.get('id_cur'):
+        qs = qs.filter(id_cl__id_cur_id=params['id_cur'])
+    if params.get('desde'):
+        qs = qs.filter(fecha_ra__gte=parse_date(params['desde']))
+    if params.get('hasta'):
+        qs = qs.filter(fecha_ra__lte=parse_date(params['hasta']))
+    return qs
+
+
+def _sumas():
+    return {n: Sum(c) for n, c in COLUMNAS.items()}
+
+
+def distribucion_desde_resumen(qs):
+    """Como ``consultas.distribucion_niveles``, sumando el rollup."""
+    agg = qs.aggregate(total=Sum('total_ra'), **_sumas())
+    total = agg.pop('total') or 0
+    niveles = {n: agg[n] or 0 for n in NIVELES}
+    return {
+        'total': total,
+        'niveles': niveles,
+        'porcentajes': {n: round(100.0 * niveles[n] / total, 1) if total else 0.0 for n in NIVELES},
+    }
+
+
+def tendencia_desde_resumen(qs, bucket='day'):
+    """Como ``consultas.tendencia_niveles`` (bucket day|week|month)."""
+    if bucket == 'day':
+        qs = qs.annotate(t=F('fecha_ra'))
+    else:
+        qs = qs.annotate(t=BUCKETS[bucket]('fecha_ra'))
+    rows = qs.values('t').annotate(total=Sum('total_ra'), **_sumas()).order_by('t')
+    return [dict(r, t=r['t'].isoformat()) for r in rows]
+
+
+def top_distraidos_desde_resumen(qs, top=10, por_clase=False, min_evaluaciones=1):
+    """Como ``consultas.top_distraidos``; ``total`` son evaluaciones, no filas del rollup."""
+    rows = (anotar_nombres(qs).values(*grupo_distraidos(por_clase))
+              .annotate(total=Sum('total_ra'), distraidos=Sum('distraido_ra')))
+    return rankear_distraidos(rows, top, por_clase, min_evaluaciones)
@@ -4,6 +4,7 @@ from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 
+from .claves import hashear
 from .models import Usuario, Estudiante, Docente, Curso, Clase, Matricula, ResultadosEvaluacion
 
 
@@ -50,7 +51,7 @@ class DocenteRegistroSerializer(serializers.ModelSerializer):
         p_txt = data.pop('contrasena', None)
         user = None
         if u_txt:
-            user = Usuario.objects.create(usuario_us=u_txt, contrasena_us=p_txt or '')
+            user = Usuario.objects.create(usuario_us=u_txt, contrasena_us=hashear(p_txt) if p_txt else '')
         if user:
             data['id_us'] = user
         return Docente.objects.create(**data)
@@ -69,12 +70,12 @@ class DocenteRegistroSerializer(serializers.ModelSerializer):
             if instance.id_us_id:
                 instance.id_us.usuario_us = u_txt
                 if p_txt:
-                    instance.id_us.contrasena_us = p_txt
+                    instance.id_us.contrasena_us = hashear(p_txt)
                 instance.id_us.save()
             else:
                 instance.id_us = Usuario.objects.create(
                     usuario_us=u_txt,
-                    contrasena_us=p_txt or ''
+                    contrasena_us=hashear(p_txt) if p_txt else ''
                 )
 
         instance.save()
@@ -137,7 +138,7 @@ class EstudianteRegistroSerializer(serializers.ModelSerializer):
         if usuario_txt:
             user = Usuario.objects.create(
                 usuario_us=usuario_txt,
-                contrasena_us=contrasena_txt or '',
+                contrasena_us=hashear(contrasena_txt) if contrasena_txt else '',
             )
         if user:
             validated_data['id_us'] = user
@@ -155,12 +156,12 @@ class EstudianteRegistroSerializer(serializers.ModelSerializer):
             if instance.id_us_id:
                 instance.id_us.usuario_us = u_txt
                 if p_txt:
-                    instance.id_us.contrasena_us = p_txt
+                    instance.id_us.contrasena_us = hashear(p_txt)
                 instance.id_us.save()
             else:
                 instance.id_us = Usuario.objects.create(
                     usuario_us=u_txt,
-                    contrasena_us=p_txt or ''
+                    contrasena_us=hashear(p_txt) if p_txt else ''
                 )
 
         instance.save()
@@ -191,6 +192,17 @@ class MatriculaSerializer(serializers.ModelSerializer):
         model = Matricula
         fields = ('id_mat', 'id_est', 'id_cl', 'fecha', 'estudiante', 'clase', 'curso', 'docente')
         
+class MatriculaMasivaSerializer(serializers.Serializer):
+    """Origen de los estudiantes para matricular en bloque (se combinan con OR)."""
+    id_est = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=True)
+    desde_clase = serializers.IntegerField(required=False)
+    id_cur = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if not (data.get('id_est') or data.get('desde_clase') or data.get('id_cur')):
+            raise serializers.ValidationError('Indique id_est, desde_clase o id_cur.')
+        return data
+
 class ResultadoEvalCreateSerializer(serializers.Serializer):
     id_est = serializers.IntegerField()
     id_cl  = serializers.IntegerField()
@@ -0,0 +1,218 @@
+"""
+Streaming de atención en vivo sobre WebSocket (ASGI puro, sin Channels).
+
+Rutas (ver ``backend/asgi.py``):
+    ws/atencion/<id_cl>/?token=<t>           -> estudiante: envía ventanas de métricas
+    ws/atencion/<id_cl>/docente/?token=<t>   -> docente: recibe agregados de la clase
+
+``token`` es el de ``/api/login/`` (también se acepta ``Authorization:
+Bearer``, para clientes que no son navegador). El estudiante debe estar
+matriculado en la clase (su ``id_est`` sale del token; ``?id_est=``, si
+viene, debe coincidir) y el docente ser el de la clase (o rol admin). Sin
+token válido se cierra con 4401; sin permiso sobre la clase, con 4403.
+
+El estudiante manda ``{"metrics": {...}}`` por cada ventana del timeline y
+recibe ``{"nivel", "recomendacion", "modelo"}``. Los docentes reciben a lo
+sumo un agregado cada ``BROADCAST_INTERVAL`` segundos por clase, sin importar
+cuántos estudiantes envíen.
+
+El estado vive en memoria del proceso: con varios workers ASGI cada clase
+debe enrutarse siempre al mismo worker.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import Counter
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+
+from .auth import verificar_token
+from .consultas import NIVELES
+from .models import Clase, Matricula
+from .views import clasificar_metricas
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_INTERVAL = 0.5  # segundos
+
+_ROUTE = re.compile(r"^/?ws/atencion/(?P<id_cl>\d+)/(?P<docente>docente/)?$")
+
+
+class ClassroomHub:
+    """Último nivel de cada estudiante conectado y docentes suscritos a una clase."""
+
+    def __init__(self, id_cl):
+        self.id_cl = id_cl
+        self.students = {}      # id_est -> {"nivel", "t"}
+        self.watchers = set()   # asyncio.Queue por docente
+        self.connections = 0
+        self._flush_task = None
+
+    def snapshot(self):
+        niveles = Counter(s["nivel"] for s in self.students.values())
+        return {
+            "id_cl": self.id_cl,
+            "estudiantes": len(self.students),
+            "niveles": {n: niveles.get(n, 0) for n in NIVELES},
+            "ultimo": {str(k): v["nivel"] for k, v in self.students.items()},
+            "t": time.time(),
+        }
+
+    def update(self, id_est, nivel):
+        self.students[id_est] = {"nivel": nivel, "t": time.time()}
+        self.schedule_broadcast()
+
+    def remove(self, id_est):
+        if self.students.pop(id_est, None) is not None:
+            self.schedule_broadcast()
+
+    def schedule_broadcast(self):
+        # agrupa las actualizaciones que llegan dentro del mismo intervalo
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):
+        await asyncio.sleep(BROADCAST_INTERVAL)
+        msg = self.snapshot()
+        for q in list(self.watchers):
+            if q.full():
+                q.get_nowait()  # docente lento: se descarta el agregado viejo
+            q.put_nowait(msg)
+
+
+_hubs = {}
+
+
+def get_hub(id_cl):
+    hub = _hubs.get(id_cl)
+    if hub is None:
+        hub = _hubs[id_cl] = ClassroomHub(id_cl)
+    return hub
+
+
+def _release_hub(hub):
+    hub.connections -= 1
+    if hub.connections <= 0:
+        _hubs.pop(hub.id_cl, None)
+
+
+async def _send_json(send, data):
+    await send({"type": "websocket.send", "text": json.dumps(data, ensure_ascii=False)})
+
+
+async def _student_session(hub, id_est, receive, send):
+    try:
+        while True:
+            event = await receive()
+            if event["type"] == "websocket.disconnect":
+                break
+            if event["type"] != "websocket.receive":
+                continue
+            try:
+                data = json.loads(event.get("text") or event.get("bytes") or b"")
+                metrics = data["metrics"]
+                if not isinstance(metrics, dict):
+                    raise ValueError
+            except (ValueError, KeyError, TypeError):
+                await _send_json(send, {"detail": "Se espera {\"metrics\": {...}}."})
+                continue
+            try:
+                # el predict de sklearn es bloqueante: fuera del event loop
+                nivel, recomend, modelo = await asyncio.to_thread(clasificar_metricas, metrics)
+            except Exception:
+                # un mensaje malformado no debe cortar la sesión del estudiante
+                logger.exception("No se pudo clasificar una ventana (clase %s, estudiante %s)", hub.id_cl, id_est)
+                await _send_json(send, {"detail": "No se pudieron clasificar las métricas."})
+                continue
+            hub.update(id_est, nivel)
+            await _send_json(send, {"modelo": modelo, "nivel": nivel, "recomendacion": recomend})
+    finally:
+        hub.remove(id_est)
+
+
+async def _teacher_session(hub, receive, send):
+    q = asyncio.Queue(maxsize=1)
+    hub.watchers.add(q)
+
+    async def wait_disconnect():
+        while (await receive())["type"] != "websocket.disconnect":
+            pass
+
+    closed = asyncio.ensure_future(wait_disconnect())
+    try:
+        await _send_json(send, hub.snapshot())
+        while True:
+            getter = asyncio.ensure_future(q.get())
+            done, _ = await asyncio.wait({getter, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if closed in done:
+                getter.cancel()
+                break
+            await _send_json(send, getter.result())
+    finally:
+        closed.cancel()
+        hub.watchers.discard(q)
+
+
+def _token(scope, qs):
+    if qs.get("token"):
+        return qs["token"][0]
+    for k, v in scope.get("headers") or ():
+        if k.lower() == b"authorization":
+            partes = v.decode(errors="replace").split()
+            if len(partes) == 2 and partes[0].lower() == "bearer":
+                return partes[1]
+    return None
+
+
+def _puede_entrar(sesion, id_cl, docente):
+    """Permiso del token sobre la clase (consulta la BD)."""
+    if docente:
+        if sesion["r"] == "admin":
+            return Clase.objects.filter(pk=id_cl).exists()
+        return sesion["r"] == "docente" and Clase.objects.filter(pk=id_cl, id_dce_id=sesion["p"]).exists()
+    return sesion["r"] == "estudiante" and Matricula.objects.filter(id_cl_id=id_cl, id_est_id=sesion["p"]).exists()
+
+
+async def websocket_application(scope, receive, send):
+    """Aplicación ASGI para las conexiones ``websocket``."""
+    m = _ROUTE.match(scope.get("path", ""))
+    if not m or (await receive())["type"] != "websocket.connect":
+        await send({"type": "websocket.close", "code": 4404})
+        return
+
+    id_cl = int(m.group("id_cl"))
+    docente = bool(m.group("docente"))
+    qs = parse_qs(scope.get("query_string", b"").decode())
+    try:
+        sesion = verificar_token(_token(scope, qs) or "")
+    except signing.BadSignature:
+        await send({"type": "websocket.close", "code": 4401})
+        return
+
+    id_est = None
+    if not docente:
+        id_est = sesion["p"]
+        try:
+            if "id_est" in qs and int(qs["id_est"][0]) != id_est:
+                raise ValueError
+        except ValueError:
+            await send({"type": "websocket.close", "code": 4403})
+            return
+    if not await sync_to_async(_puede_entrar)(sesion, id_cl, docente):
+        await send({"type": "websocket.close", "code": 4403})
+        return
+
+    hub = get_hub(id_cl)
+    hub.connections += 1
+    try:
+        await send({"type": "websocket.accept"})
+        if id_est is None:
+            await _teacher_session(hub, receive, send)
+        else:
+            await _student_session(hub, id_est, receive, send)
+    finally:
+        _release_hub(hub)
@@ -1,3 +1,566 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import threading
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import auth, claves, resumen
+from .consultas import NIVELES
+from .models import (
+    Administrador, Clase, Curso, Docente, Estudiante, Matricula, ResultadosEvaluacion, ResumenAtencion, Usuario,
+)
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Los modelos son unmanaged: el runner no crea sus tablas en la BD de prueba.
+_creadas = []
+
+
+def setUpModule():
+    existentes = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config('api').get_models():
+            if model._meta.db_table not in existentes:
+                editor.create_model(model)
+                _creadas.append(model)
+
+
+def tearDownModule():
+    with connection.schema_editor() as editor:
+        for model in reversed(_creadas):
+            editor.delete_model(model)
+    _creadas.clear()
+
+
+METRICS = {
+    'session_seconds': 60, 'frames_total': 1800, 'frames_face': 1700, 'noface_pct': 5,
+    'blink_count': 15, 'blink_rate': 15, 'ear_avg': 0.3, 'ear_min': 0.1, 'ear_max': 0.4,
+    'yaw_avg_abs': 5, 'pitch_avg_abs': 5, 'gaze_pct': {'centro': 70},
+}
+
+
+def _fecha(dia, hora=12):
+    return timezone.make_aware(datetime.datetime(2025, 6, dia, hora))
+
+
+# MD5 solo para que las pruebas no paguen el KDF real
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ApiTestCase(TestCase):
+    """Docente, curso con dos clases y tres estudiantes; cachés del proceso limpias."""
+
+    @classmethod
+    def setUpTestData(cls):
+        u = Usuario.objects.create(usuario_us='doc', contrasena_us='x')
+        cls.docente = Docente.objects.create(nombre_dce='Doc', apellido_dce='X', correo_dce='d@x.com', id_us=u)
+        cls.curso = Curso.objects.create(codigo_cur='C1', nombre_cur='Curso 1')
+        cls.clase = Clase.objects.create(nombre_cl='Clase 1', id_cur=cls.curso, id_dce=cls.docente)
+        cls.clase2 = Clase.objects.create(nombre_cl='Clase 2', id_cur=cls.curso, id_dce=cls.docente)
+        cls.ests = [
+            Estudiante.objects.create(
+                nombre_est=f'N{i}', apellido_est='A', correo_est=f'e{i}@x.com',
+                id_us=Usuario.objects.create(usuario_us=f'e{i}', contrasena_us='p'),
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        caches[settings.API_CACHE_ALIAS].clear()
+        claves._verificadas.clear()
+        auth._verificados.clear()
+        resumen._listo = False  # el rollup de otra prueba se revirtió con su transacción
+        resumen._tablas_ok, resumen._tablas_revisar = False, 0.0
+
+    def resultado(self, est, nivel, fecha, clase=None):
+        obj = ResultadosEvaluacion.objects.create(
+            atencion_ia_re='-', nivelaten_re=nivel, id_est=est, id_cl=clase or self.clase)
+        ResultadosEvaluacion.objects.filter(pk=obj.pk).update(fechaeva_re=fecha)  # auto_now_add
+        return obj.pk
+
+
+class ResultadosLoteTests(ApiTestCase):
+    url = '/api/resultados/lote/'
+
+    def item(self, id_est=None, id_cl=None, **extra):
+        return {'id_est': id_est or self.ests[0].pk, 'id_cl': id_cl or self.clase.pk, 'metrics': METRICS, **extra}
+
+    def test_fks_invalidos_mezclados_dan_207(self):
+        items = [
+            self.item(),
+            self.item(id_est=999999),
+            self.item(id_cl=999999),
+            {'id_est': self.ests[1].pk, 'id_cl': self.clase.pk},  # sin metrics
+            self.item(id_est=self.ests[2].pk),
+        ]
+        r = self.client.post(self.url, {'items': items}, format='json')
+        self.assertEqual(r.status_code, 207)
+        self.assertEqual(r.data['creados'], 2)
+        self.assertEqual([x['index'] for x in r.data['resultados']], [0, 4])
+        self.assertEqual([e['index'] for e in r.data['errores']], [1, 2, 3])
+        self.assertIn('id_est', r.data['errores'][0]['errores'])
+        self.assertIn('id_cl', r.data['errores'][1]['errores'])
+        self.assertIn('metrics', r.data['errores'][2]['errores'])
+
+        ids = [x['resultado_id'] for x in r.data['resultados']]
+        guardados = ResultadosEvaluacion.objects.in_bulk(ids)
+        self.assertEqual(ResultadosEvaluacion.objects.count(), 2)
+        for x in r.data['resultados']:
+            self.assertIn(x['nivel'], NIVELES)
+            self.assertEqual(guardados[x['resultado_id']].nivelaten_re, x['nivel'])
+
+    def test_todos_validos_201_y_todos_invalidos_400(self):
+        r = self.client.post(self.url, [self.item(), self.item(id_est=self.ests[1].pk)], format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data['errores'], [])
+
+        r = self.client.post(self.url, [self.item(id_est=999999)], format='json')
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.data['creados'], 0)
+        self.assertEqual(ResultadosEvaluacion.objects.count(), 2)
+
+    def test_limite_de_items(self):
+        r = self.client.post(self.url, [self.item()] * 501, format='json')
+        self.assertEqual(r.status_code, 400)
+        self.assertFalse(ResultadosEvaluacion.objects.exists())
+
+        r = self.client.post(self.url, [self.item()] * 500, format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(ResultadosEvaluacion.objects.count(), 500)
+
+    def test_cuerpo_invalido(self):
+        for body in ([], {'items': []}, {'items': 'x'}):
+            self.assertEqual(self.client.post(self.url, body, format='json').status_code, 400)
+
+
+class CursorResultadosTests(ApiTestCase):
+    url = '/api/resultados/'
+
+    def setUp(self):
+        super().setUp()
+        # fechas repetidas: el orden lo desempata id_re
+        fechas = [_fecha(1), _fecha(2), _fecha(2), _fecha(2), _fecha(3), _fecha(1), _fecha(3)]
+        pares = [(self.resultado(self.ests[i % 3], 'ATENTO', f), f) for i, f in enumerate(fechas)]
+        self.esperado = [pk for pk, _ in sorted(pares, key=lambda p: (p[1], p[0]), reverse=True)]
+
+    def recorrer(self, limit, **params):
+        ids, cursor, paginas = [], '', 0
+        while True:
+            r = self.client.get(self.url, {'cursor': cursor, 'limit': limit, **params})
+            self.assertEqual(r.status_code, 200)
+            ids += [row['id_re'] for row in r.data['results']]
+            paginas += 1
+            cursor = r.data['next_cursor']
+            if cursor is None:
+                return ids, paginas
+
+    def test_recorrido_completo_en_orden(self):
+        for limit in (1, 3, 7, 50):
+            ids, paginas = self.recorrer(limit)
+            self.assertEqual(ids, self.esperado)
+            self.assertEqual(paginas, max(1, -(-len(self.esperado) // limit)))
+
+    def test_primera_pagina_con_paginate(self):
+        r = self.client.get(self.url, {'paginate': 1, 'limit': 3})
+        self.assertEqual([row['id_re'] for row in r.data['results']], self.esperado[:3])
+        self.assertIsNotNone(r.data['next_cursor'])
+
+    def test_cursor_con_filtros(self):
+        ids, _ = self.recorrer(2, id_est=self.ests[0].pk)
+        propios = set(ResultadosEvaluacion.objects.filter(id_est=self.ests[0]).values_list('pk', flat=True))
+        self.assertEqual(ids, [pk for pk in self.esperado if pk in propios])
+
+    def test_cursor_alterado_da_400(self):
+        def b64(txt):
+            return base64.urlsafe_b64encode(txt.encode()).decode().rstrip('=')
+
+        for cursor in ('no-es-un-cursor', b64('["ayer", 5]'), b64('["2025-06-02T12:00:00+00:00"]'),
+                       b64('{"id": 1}'), b64('["2025-06-02T12:00:00+00:00", "x"]')):
+            r = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(r.status_code, 400, cursor)
+            self.assertIn('cursor', r.data)
+
+
+class AgregadosResultadosTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        e0, e1, e2 = self.ests
+        for nivel in ('ATENTO', 'ATENTO', 'DISTRAIDO', 'DISTRAIDO'):
+            self.resultado(e0, nivel, _fecha(2))
+        self.resultado(e1, 'NEUTRO', _fecha(3))
+        self.resultado(e1, 'DISTRAIDO', _fecha(3), clase=self.clase2)
+        self.resultado(e2, 'ATENTO', _fecha(3, hora=8))
+
+    def comprobar(self, **params):
+        e0, e1, _ = self.ests
+        r = self.client.get('/api/resultados/resumen/', params)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data['total'], 7)
+        self.assertEqual(r.data['niveles'], {'ATENTO': 3, 'NEUTRO': 1, 'DISTRAIDO': 3})
+        self.assertEqual(r.data['porcentajes'], {'ATENTO': 42.9, 'NEUTRO': 14.3, 'DISTRAIDO': 42.9})
+
+        r = self.client.get('/api/resultados/tendencia/', {'bucket': 'day', **params})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data, [
+            {'t': '2025-06-02', 'total': 4, 'ATENTO': 2, 'NEUTRO': 0, 'DISTRAIDO': 2},
+            {'t': '2025-06-03', 'total': 3, 'ATENTO': 1, 'NEUTRO': 1, 'DISTRAIDO': 1},
+        ])
+
+        # empate en 50 %: primero el de más distraídos; e2 no tiene ninguno
+        r = self.client.get('/api/resultados/distraidos/', params)
+        self.assertEqual([(x['id_est'], x['total'], x['distraidos'], x['pct_distraido']) for x in r.data],
+                         [(e0.pk, 4, 2, 50.0), (e1.pk, 2, 1, 50.0)])
+        r = self.client.get('/api/resultados/distraidos/', {'min': 3, **params})
+        self.assertEqual([x['id_est'] for x in r.data], [e0.pk])
+        r = self.client.get('/api/resultados/distraidos/', {'por_clase': 1, **params})
+        self.assertEqual([(x['id_cl'], x['id_est'], x['rank']) for x in r.data],
+                         [(self.clase.pk, e0.pk, 1), (self.clase2.pk, e1.pk, 1)])
+
+    @override_settings(ATTENTION_ROLLUP=False)
+    def test_agregados_sobre_el_historial(self):
+        self.comprobar()
+
+    def test_filtros(self):
+        r = self.client.get('/api/resultados/resumen/', {'id_cl': self.clase2.pk})
+        self.assertEqual(r.data['niveles'], {'ATENTO': 0, 'NEUTRO': 0, 'DISTRAIDO': 1})
+        r = self.client.get('/api/resultados/resumen/', {'desde': '2025-06-03', 'hasta': '2025-06-03'})
+        self.assertEqual(r.data['total'], 3)
+        r = self.client.get('/api/resultados/tendencia/', {'bucket': 'hour', 'id_est': self.ests[2].pk})
+        self.assertEqual(r.data, [{'t': _fecha(3, hora=8).isoformat(), 'total': 1,
+                                   'ATENTO': 1, 'NEUTRO': 0, 'DISTRAIDO': 0}])
+
+    def test_sin_resultados(self):
+        r = self.client.get('/api/resultados/resumen/', {'id_est': 999999})
+        self.assertEqual(r.data, {'total': 0, 'niveles': dict.fromkeys(NIVELES, 0),
+                                  'porcentajes': dict.fromkeys(NIVELES, 0.0)})
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get('/api/resultados/tendencia/', {'bucket': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/resultados/distraidos/', {'top': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/resultados/resumen/', {'desde': 'ayer'}).status_code, 400)
+
+    @override_settings(ATTENTION_ROLLUP=True)
+    def test_rollup_da_los_mismos_agregados(self):
+        self.assertFalse(resumen.resumen_listo())
+        resumen.reconstruir_resumen()
+        self.assertTrue(resumen.resumen_listo())
+        self.comprobar()
+        self.comprobar(fuente='resultados')
+
+
+@override_settings(ATTENTION_ROLLUP=True)
+class ResumenIncrementalTests(ApiTestCase):
+    def postear(self, *ests):
+        items = [{'id_est': e.pk, 'id_cl': self.clase.pk, 'metrics': METRICS} for e in ests]
+        r = self.client.post('/api/resultados/lote/', items, format='json')
+        self.assertEqual(r.status_code, 201)
+
+    def filas(self):
+        return sorted(ResumenAtencion.objects.values_list(
+            'fecha_ra', 'id_cl', 'id_est', 'atento_ra', 'neutro_ra', 'distraido_ra', 'total_ra'))
+
+    def test_sin_backfill_los_post_no_tocan_el_rollup(self):
+        self.postear(*self.ests)
+        self.assertFalse(ResumenAtencion.objects.exists())
+        self.assertFalse(resumen.resumen_listo())
+
+    def test_post_tras_backfill_igual_a_reconstruir(self):
+        e0, e1, _ = self.ests
+        self.resultado(e0, 'DISTRAIDO', _fecha(2))
+        resumen.reconstruir_resumen()
+        self.postear(e0, e0, e1)
+        self.client.post('/api/resultados/', {'id_est': e1.pk, 'id_cl': self.clase.pk, 'metrics': METRICS},
+                         format='json')
+        incremental = self.filas()
+        self.assertEqual(sum(f[-1] for f in incremental), 5)
+
+        resumen.reconstruir_resumen()
+        self.assertEqual(self.filas(), incremental)
+
+    def test_backfill_parcial_no_habilita_el_rollup(self):
+        self.resultado(self.ests[0], 'ATENTO', _fecha(2))
+        resumen.reconstruir_resumen(desde=datetime.date(2025, 6, 1))
+        self.assertFalse(resumen.resumen_listo())
+        self.assertEqual(len(self.filas()), 1)
+
+    def test_tablas_faltantes_no_consultan_el_catalogo_en_cada_request(self):
+        with mock.patch.object(connection.introspection, 'table_names', return_value=[]) as tablas:
+            for _ in range(3):
+                self.postear(self.ests[0])
+                self.client.get('/api/resultados/resumen/')
+            self.assertEqual(tablas.call_count, 1)
+
+            resumen._tablas_revisar = 0.0  # venció TABLAS_TTL
+            self.assertFalse(resumen.resumen_listo())
+            self.assertEqual(tablas.call_count, 2)
+        self.assertFalse(ResumenAtencion.objects.exists())
+
+        # crear_tabla (backfill_resumen) lo habilita en el proceso sin esperar el TTL
+        resumen.crear_tabla()
+        self.assertTrue(resumen._tablas_existen())
+
+
+class LoginTests(ApiTestCase):
+    url = '/api/login/'
+
+    def login(self, usuario, contrasena, role=''):
+        return self.client.post(f'{self.url}?role={role}', {'usuario': usuario, 'contrasena': contrasena},
+                                format='json')
+
+    def admin(self):
+        u = Usuario.objects.create(usuario_us='admin', contrasena_us=claves.hashear('a'))
+        return Administrador.objects.create(nombre_admin='Ad', id_us=u)
+
+    def test_roles(self):
+        adm = self.admin()
+        r = self.login('admin', 'a')
+        self.assertEqual((r.status_code, r.data['role'], r.data['profile_id']), (200, 'admin', adm.pk))
+        r = self.login('admin', 'a', role='docente')
+        self.assertEqual((r.status_code, r.data['roles']), (403, ['admin']))
+        Usuario.objects.create(usuario_us='suelto', contrasena_us='s')
+        self.assertEqual(self.login('suelto', 's').status_code, 403)
+
+    def test_una_consulta_para_usuario_y_perfiles(self):
+        u = Usuario.objects.create(usuario_us='ambos', contrasena_us=claves.hashear('z'))
+        est = Estudiante.objects.create(nombre_est='A', apellido_est='B', correo_est='a@x.com', id_us=u)
+        dce = Docente.objects.create(nombre_dce='A', apellido_dce='B', correo_dce='a@x.com', id_us=u)
+        with self.assertNumQueries(1):
+            r = self.login('ambos', 'z', role='docente')
+        self.assertEqual((r.status_code, r.data['role'], r.data['profile_id']), (200, 'docente', dce.pk))
+
+        r = self.login('ambos', 'z')  # sin rol pedido: el primero (estudiante)
+        self.assertEqual((r.data['role'], r.data['profile_id']), ('estudiante', est.pk))
+        payload = auth.verificar_token(r.data['token'])
+        self.assertEqual((payload['u'], payload['r'], payload['p']), (u.pk, 'estudiante', est.pk))
+
+    @override_settings(DEBUG=False)
+    def test_token_en_vistas_protegidas_y_abiertas(self):
+        self.admin()
+        url = '/api/diagnostico/db/'
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login('admin', 'a').data['token']}")
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login('e0', 'p').data['token']}")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        with override_settings(API_TOKEN_MAX_AGE=-1):
+            vencido = self.login('admin', 'a').data['token']
+        for token in ('no-es-un-token', vencido):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(self.client.get(url).status_code, 401)
+            # un token viejo no rompe los endpoints abiertos
+            self.assertEqual(self.client.get('/api/cursos/').status_code, 200)
+            self.assertEqual(self.login('e0', 'p').status_code, 200)
+
+    def test_texto_plano_se_rehashea_al_primer_login(self):
+        est = self.ests[0]
+        r = self.login('e0', 'p', role='estudiante')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual((r.data['role'], r.data['profile_id']), ('estudiante', est.pk))
+
+        guardado = Usuario.objects.get(pk=est.id_us_id).contrasena_us
+        self.assertNotEqual(guardado, 'p')
+        self.assertTrue(claves.es_hash(guardado))
+        self.assertTrue(check_password('p', guardado))
+
+        claves._verificadas.clear()  # el segundo login verifica contra el hash
+        self.assertEqual(self.login('e0', 'p').status_code, 200)
+        self.assertEqual(Usuario.objects.get(pk=est.id_us_id).contrasena_us, guardado)
+
+    def test_contrasena_incorrecta_no_toca_la_fila(self):
+        self.assertEqual(self.login('e1', 'otra').status_code, 401)
+        self.assertEqual(Usuario.objects.get(usuario_us='e1').contrasena_us, 'p')
+        self.assertEqual(self.login('nadie', 'p').status_code, 401)
+        self.assertEqual(self.login('e1', '').status_code, 400)
+
+    def test_login_repetido_no_recalcula_el_hash(self):
+        self.admin()
+        with mock.patch.object(claves, 'check_password', wraps=check_password) as kdf:
+            for _ in range(3):
+                self.assertEqual(self.login('admin', 'a').status_code, 200)
+            self.assertEqual(kdf.call_count, 1)
+            self.assertEqual(self.login('admin', 'otra').status_code, 401)
+            self.assertEqual(kdf.call_count, 2)
+
+    def test_saturado_responde_503(self):
+        self.admin()
+        with mock.patch.object(claves, '_cupos', threading.BoundedSemaphore(1)) as cupos:
+            cupos.acquire()  # el único cupo, ocupado
+            r = self.login('admin', 'a')
+            self.assertEqual((r.status_code, r['Retry-After']), (503, '2'))
+            r = self.client.post('/api/estudiantes/', {'nombre': 'X', 'usuario': 'nuevo', 'contrasena': 'n'},
+                                 format='json')
+            self.assertEqual((r.status_code, r['Retry-After']), (503, '2'))
+        self.assertFalse(Usuario.objects.filter(usuario_us='nuevo').exists())
+
+
+class ImportarTests(ApiTestCase):
+    def subir(self, entidad, nombre, contenido, **params):
+        qs = '&'.join(f'{k}={v}' for k, v in params.items())
+        return self.client.post(f'/api/importar/{entidad}/?{qs}',
+                                {'archivo': SimpleUploadedFile(nombre, contenido)}, format='multipart')
+
+    CSV_ESTUDIANTES = (
+        'usuario,contrasena,nombre,apellido,correo,ci\n'
+        'ana,pw1,Ana,A,ana@x.com,100\n'
+        'ana,pw2,Ana,B,ana2@x.com,101\n'      # 3: usuario repetido en el archivo
+        'bob,pw,Bob,B,no-es-correo,102\n'     # 4: correo inválido
+        'e0,pw,Ya,Existe,e0b@x.com,103\n'     # 5: usuario ya existe
+        'carl,pw,Carl,C,c@x.com,abc\n'        # 6: ci no numérico
+        '\n'
+        'dan,pw,Dan,D,d@x.com,100\n'          # 8: ci repetido en el archivo
+        'eva,pw2,Eva,E,eva@x.com,\n'
+    ).encode()
+
+    def test_csv_informa_errores_por_fila(self):
+        r = self.subir('estudiantes', 'e.csv', self.CSV_ESTUDIANTES)
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual({k: r.data['resumen'][k] for k in ('filas', 'creados', 'con_error', 'dry_run')},
+                         {'filas': 7, 'creados': 2, 'con_error': 5, 'dry_run': False})
+        errores = {e['fila']: e['errores'] for e in r.data['errores']}
+        self.assertEqual(sorted(errores), [3, 4, 5, 6, 8])
+        self.assertEqual(errores[3], {'usuario': ['Repetido en el archivo.']})
+        self.assertIn('correo', errores[4])
+        self.assertEqual(errores[5], {'usuario': ['Ya existe.']})
+        self.assertEqual(errores[6], {'ci': ['Debe ser numérico.']})
+        self.assertEqual(errores[8], {'ci': ['Repetido en el archivo.']})
+
+        # cada hash quedó con su fila
+        for usuario, clave, ci in (('ana', 'pw1', 100), ('eva', 'pw2', None)):
+            est = Estudiante.objects.select_related('id_us').get(id_us__usuario_us=usuario)
+            self.assertEqual(est.ci_est, ci)
+            self.assertTrue(check_password(clave, est.id_us.contrasena_us))
+
+    def test_dry_run_y_bloques(self):
+        r = self.subir('estudiantes', 'e.csv', self.CSV_ESTUDIANTES, dry_run=1)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual((r.data['resumen']['creados'], r.data['resumen']['con_error']), (2, 5))
+        self.assertFalse(Usuario.objects.filter(usuario_us='ana').exists())
+
+        # en bloques de 2 los repetidos se siguen detectando entre bloques
+        r = self.subir('estudiantes', 'e.csv', self.CSV_ESTUDIANTES, chunk=2)
+        self.assertEqual((r.data['resumen']['creados'], r.data['resumen']['con_error']), (2, 5))
+
+    def test_csv_con_punto_y_coma_y_stream(self):
+        contenido = 'id_cl;usuario\n{0};e0\n{0};e1\n'.format(self.clase.pk).encode()
+        r = self.subir('matriculas', 'm.csv', contenido, stream=1)
+        self.assertEqual(r.status_code, 200)
+        lineas = b''.join(r.streaming_content).decode().splitlines()
+        self.assertIn('"resumen"', lineas[-1])
+        self.assertEqual(Matricula.objects.filter(id_cl=self.clase).count(), 2)
+
+    def test_matriculas(self):
+        Matricula.objects.create(id_est=self.ests[2], id_cl=self.clase)
+        contenido = (
+            'id_cl,id_est,usuario\n'
+            f'{self.clase.pk},{self.ests[0].pk},\n'
+            f'{self.clase.pk},,e1\n'
+            f'{self.clase.pk},999999,\n'           # 4: estudiante inexistente
+            f'999999,{self.ests[0].pk},\n'         # 5: clase inexistente
+            f'{self.clase.pk},{self.ests[2].pk},\n'  # 6: ya matriculado
+            f'{self.clase.pk},,e0\n'               # 7: repetido (e0 por usuario)
+            f',{self.ests[0].pk},\n'               # 8: falta id_cl
+        ).encode()
+        r = self.subir('matriculas', 'm.csv', contenido)
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual((r.data['resumen']['creados'], r.data['resumen']['con_error']), (2, 5))
+        errores = {e['fila']: e['errores'] for e in r.data['errores']}
+        self.assertEqual(errores[4], {'id_est': ['Estudiante inexistente.']})
+        self.assertEqual(errores[5], {'id_cl': ['Clase inexistente.']})
+        self.assertEqual(errores[6], {'id_est': ['Ya está matriculado en la clase.']})
+        self.assertEqual(errores[7], {'id_est': ['Repetido en el archivo.']})
+        self.assertEqual(errores[8], {'id_cl': ['Requerido.']})
+        self.assertEqual(Matricula.objects.filter(id_cl=self.clase).count(), 3)
+
+    def test_archivos_invalidos(self):
+        self.assertEqual(self.subir('cursos', 'c.csv', b'x\n').status_code, 404)
+        self.assertEqual(self.client.post('/api/importar/estudiantes/', {}, format='multipart').status_code, 400)
+        self.assertEqual(self.subir('estudiantes', 'e.csv', b'').status_code, 400)
+        r = self.subir('estudiantes', 'e.csv', 'usuario\nñandú\n'.encode('latin-1'))
+        self.assertEqual((r.status_code, r.data['detail']), (400, 'El CSV debe estar en UTF-8.'))
+        self.assertEqual(self.subir('estudiantes', 'e.csv', b'usuario\n', chunk='x').status_code, 400)
+
+    @skipIf(openpyxl is not None, 'openpyxl instalado')
+    def test_xlsx_sin_openpyxl(self):
+        r = self.subir('estudiantes', 'e.xlsx', b'PK\x03\x04')
+        self.assertEqual(r.status_code, 400)
+        self.assertIn('openpyxl', r.data['detail'])
+
+    @skipIf(openpyxl is None, 'requiere openpyxl')
+    def test_xlsx(self):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(['Usuario', 'Contrasena', 'Nombre', 'Correo', 'CI', 'Fechanac'])
+        ws.append(['xl1', 'pw', 'Uno', 'x1@x.com', 200, datetime.date(2001, 2, 3)])
+        ws.append(['xl2', 'pw', 'Dos', 'no-es-correo', 201.0, None])
+        buf = io.BytesIO()
+        wb.save(buf)
+        r = self.subir('estudiantes', 'e.xlsx', buf.getvalue())
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual((r.data['resumen']['creados'], [e['fila'] for e in r.data['errores']]), (1, [3]))
+        est = Estudiante.objects.get(id_us__usuario_us='xl1')
+        self.assertEqual((est.ci_est, est.fechanac_est), (200, datetime.date(2001, 2, 3)))
+
+        r = self.subir('estudiantes', 'e.xlsx', b'no es un zip')
+        self.assertEqual(r.status_code, 400)
+        self.assertIn('No se pudo leer', r.data['detail'])
+
+
+class MatricularClaseTests(ApiTestCase):
+    def url(self, clase):
+        return f'/api/clases/{clase.pk}/matricular/'
+
+    def test_idempotente(self):
+        ids = [e.pk for e in self.ests]
+        r = self.client.post(self.url(self.clase), {'id_est': ids}, format='json')
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data, {'candidatos': 3, 'insertados': 3, 'omitidos': 0})
+
+        r = self.client.post(self.url(self.clase), {'id_est': ids}, format='json')
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data, {'candidatos': 3, 'insertados': 0, 'omitidos': 3})
+        self.assertEqual(Matricula.objects.filter(id_cl=self.clase).count(), 3)
+
+    def test_union_de_origenes(self):
+        e0, e1, e2 = self.ests
+        Matricula.objects.create(id_est=e0, id_cl=self.clase)
+        Matricula.objects.create(id_est=e1, id_cl=self.clase2)
+        # e1 ya está en clase2; e0 llega por desde_clase y por id_est (se cuenta una vez)
+        r = self.client.post(self.url(self.clase2), {'desde_clase': self.clase.pk, 'id_est': [e0.pk, e1.pk, e2.pk]},
+                             format='json')
+        self.assertEqual(r.data, {'candidatos': 3, 'insertados': 2, 'omitidos': 1})
+
+        r = self.client.post(self.url(self.clase), {'id_cur': self.curso.pk}, format='json')
+        self.assertEqual(r.data, {'candidatos': 3, 'insertados': 2, 'omitidos': 1})
+        for clase in (self.clase, self.clase2):
+            self.assertEqual(set(Matricula.objects.filter(id_cl=clase).values_list('id_est', flat=True)),
+                             {e.pk for e in self.ests})
+
+    def test_listado_refleja_las_nuevas_matriculas(self):
+        self.assertEqual(self.client.get('/api/matriculas/').json(), [])
+        # la caché del listado se invalida al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.post(self.url(self.clase), {'id_est': [self.ests[0].pk]}, format='json')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(self.client.get('/api/matriculas/').json()), 1)
+
+    def test_errores(self):
+        r = self.client.post('/api/clases/999999/matricular/', {'id_est': [self.ests[0].pk]}, format='json')
+        self.assertEqual(r.status_code, 404)
+        self.assertEqual(self.client.post(self.url(self.clase), {}, format='json').status_code, 400)
+        r = self.client.post(self.url(self.clase), {'id_est': [999999]}, format='json')
+        self.assertEqual(r.data, {'candidatos': 0, 'insertados': 0, 'omitidos': 0})
@@ -5,8 +5,10 @@ from .views import (
     EstudianteListCreateView, EstudianteDetailView,
     CursoListCreateView, CursoDetailView,
     ClaseListCreateView, ClaseDetailView,
-    MatriculaListCreateView, MatriculaDetailView,
-    LoginView, EvaluarAtencionView,
+    MatriculaListCreateView, MatriculaDetailView, MatricularClaseView,
+    LoginView, ImportarView, EvaluarAtencionView, EvaluarAtencionLoteView,
+    ResultadosResumenView, ResultadosTendenciaView, ResultadosDistraidosView,
+    DiagnosticoDBView,
 )
 
 urlpatterns = [
@@ -25,15 +27,26 @@ urlpatterns = [
     # Clases
     path("clases/", ClaseListCreateView.as_view(), name="clases-list-create"),
     path("clases/<int:pk>/", ClaseDetailView.as_view(), name="clases-detail"),
+    path("clases/<int:pk>/matricular/", MatricularClaseView.as_view(), name="clases-matricular"),
 
     # Matrículas
     path("matriculas/", MatriculaListCreateView.as_view(), name="matriculas-list-create"),
     path("matriculas/<int:pk>/", MatriculaDetailView.as_view(), name="matriculas-detail"),
 
+    # Importación masiva (CSV/XLSX)
+    path("importar/<str:entidad>/", ImportarView.as_view(), name="importar"),
+
     # Login
     path("login/", LoginView.as_view(), name="login"),
 
     # IA resultados
     path("resultados/", EvaluarAtencionView.as_view(), name="evaluar-atencion"),
+    path("resultados/lote/", EvaluarAtencionLoteView.as_view(), name="evaluar-atencion-lote"),
+    path("resultados/resumen/", ResultadosResumenView.as_view(), name="resultados-resumen"),
+    path("resultados/tendencia/", ResultadosTendenciaView.as_view(), name="resultados-tendencia"),
+    path("resultados/distraidos/", ResultadosDistraidosView.as_view(), name="resultados-distraidos"),
+
+    # Diagnóstico
+    path("diagnostico/db/", DiagnosticoDBView.as_view(), name="diagnostico-db"),
     # (sin ruta de PDF)
 ]
@@ -1,24 +1,57 @@
 from rest_framework import generics, status, views
 from rest_framework.generics import ListCreateAPIView
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 
 from .models import Docente, Estudiante, Curso, Clase, Matricula, Usuario, Administrador, ResultadosEvaluacion
 from .serializers import (
     DocenteRegistroSerializer, EstudianteRegistroSerializer,
-    CursoSerializer, ClaseSerializer, MatriculaSerializer,
+    CursoSerializer, ClaseSerializer, MatriculaSerializer, MatriculaMasivaSerializer,
     ResultadoEvalCreateSerializer, ResultadoEvalSerializer
 )
+from .consultas import (
+    filtrar_resultados, resultados_values, fila_json, pagina_keyset, exportar_csv, exportar_json,
+    BUCKETS, distribucion_niveles, tendencia_niveles, top_distraidos,
+)
+from .auth import EsAdminODebug, emitir_token
+from .cache import CachedListMixin
+from .claves import Saturado, simular_verificacion, verificar
+from .diagnostico import estado_db
+from .importacion import CHUNK as IMPORT_CHUNK, ENTIDADES, ArchivoInvalido, importar, leer_filas
+from .listados import FastListMixin
+from .matriculas import estudiantes_origen, matricular
+from .resumen import (
+    registrar_resultados, resumen_aplicable, resumen_listo, filtrar_resumen,
+    distribucion_desde_resumen, tendencia_desde_resumen, top_distraidos_desde_resumen,
+)
+
+import json
 
-from ia.attention_model_rf import RandomForestAttentionModel, heuristic_label
-import os
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.db import transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast
+
+from ia.attention_model_rf import get_registry
 
 # ----------------- LOGIN POR ROL -----------------
 class LoginView(APIView):
     """
     POST /api/login/?role=estudiante|docente|admin
     body: { "usuario": "...", "contrasena": "..." }
+
+    Usuario y perfiles se resuelven en una sola consulta (LEFT JOIN a
+    estudiante/docente/administrador). La respuesta incluye ``token`` para
+    mandar como ``Authorization: Bearer <token>``. La contraseña se verifica
+    contra el hash en ``api/claves.py``.
     """
+    authentication_classes = ()  # un token viejo en el encabezado no debe impedir el login
+
+    ROLES = (('estudiante', 'estudiante__id_est'), ('docente', 'docente__id_dce'),
+             ('admin', 'administrador__id_admin'))
+
     def post(self, request):
         usuario = (request.data.get('usuario') or '').strip()
         contrasena = (request.data.get('contrasena') or '').strip()
@@ -27,24 +60,28 @@ class LoginView(APIView):
         if not usuario or not contrasena:
             return Response({'detail': 'Faltan credenciales.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # una fila por combinación de perfiles (normalmente una sola)
+        filas = list(Usuario.objects.filter(usuario_us=usuario)
+                     .values('id_us', 'usuario_us', 'contrasena_us', *(f for _, f in self.ROLES)))
         try:
-            u = Usuario.objects.get(usuario_us=usuario, contrasena_us=contrasena)
-        except Usuario.DoesNotExist:
+            if not filas:
+                simular_verificacion(contrasena)
+                ok = False
+            else:
+                ok, nuevo_hash = verificar(filas[0]['id_us'], contrasena, filas[0]['contrasena_us'])
+        except Saturado as e:
+            return Response({'detail': e.detail}, status=e.status_code, headers={'Retry-After': str(e.wait)})
+        if not ok:
             return Response({'detail': 'Usuario o contraseña incorrectos.'}, status=status.HTTP_401_UNAUTHORIZED)
+        u = filas[0]
+        if nuevo_hash:  # texto plano o parámetros viejos: se actualiza al vuelo
+            Usuario.objects.filter(pk=u['id_us'], contrasena_us=u['contrasena_us']).update(contrasena_us=nuevo_hash)
 
         roles = []
-
-        e = Estudiante.objects.filter(id_us=u).values('id_est', 'nombre_est', 'apellido_est').first()
-        if e:
-            roles.append({'role': 'estudiante', 'id': e['id_est']})
-
-        d = Docente.objects.filter(id_us=u).values('id_dce', 'nombre_dce', 'apellido_dce').first()
-        if d:
-            roles.append({'role': 'docente', 'id': d['id_dce']})
-
-        a = Administrador.objects.filter(id_us=u).values('id_admin', 'nombre_admin', 'apellido_admin').first()
-        if a:
-            roles.append({'role': 'admin', 'id': a['id_admin']})
+        for role, field in self.ROLES:
+            pid = next((f[field] for f in filas if f[field] is not None), None)
+            if pid is not None:
+                roles.append({'role': role, 'id': pid})
 
         if not roles:
             return Response({'detail': 'El usuario no está vinculado a ningún rol.'}, status=status.HTTP_403_FORBIDDEN)
@@ -58,14 +95,22 @@ class LoginView(APIView):
         return Response({
             'ok': True,
             'role': chosen['role'],
-            'user': {'id_us': u.id_us, 'usuario': u.usuario_us},
-            'profile_id': chosen['id']
+            'user': {'id_us': u['id_us'], 'usuario': u['usuario_us']},
+            'profile_id': chosen['id'],
+            'token': emitir_token(u['id_us'], chosen['role'], chosen['id']),
         }, status=status.HTTP_200_OK)
 # -------------------------------------------------
 
 
 # ----------------- DOCENTES -----------------
-class DocenteListCreateView(generics.ListCreateAPIView):
+class DocenteListCreateView(CachedListMixin, FastListMixin, generics.ListCreateAPIView):
+    cache_models = (Docente, Usuario)
+    values_fields = {
+        'id_dce': 'id_dce', 'ci': Cast('ci_dce', CharField()), 'nombre': 'nombre_dce',
+        'apellido': 'apellido_dce', 'fechanac': 'fechanac_dce', 'sexo': 'sexo_dce',
+        'correo': 'correo_dce', 'telefono': 'telefono_dce', 'titulo': 'titulo_dce',
+        'usuario_us': 'id_us__usuario_us',
+    }
     queryset = Docente.objects.select_related('id_us').all()
     serializer_class = DocenteRegistroSerializer
 
@@ -75,7 +120,12 @@ class DocenteDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # ----------------- ESTUDIANTES -----------------
-class EstudianteListCreateView(generics.ListCreateAPIView):
+class EstudianteListCreateView(FastListMixin, generics.ListCreateAPIView):
+    values_fields = {
+        'id_est': 'id_est', 'ci': Cast('ci_est', CharField()), 'nombre': 'nombre_est',
+        'apellido': 'apellido_est', 'fechanac': 'fechanac_est', 'sexo': 'sexo_est',
+        'correo': 'correo_est', 'telefono': 'telefono_est', 'usuario_us': 'id_us__usuario_us',
+    }
     queryset = Estudiante.objects.select_related('id_us').all()
     serializer_class = EstudianteRegistroSerializer
 
@@ -85,7 +135,9 @@ class EstudianteDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # ----------------- CURSOS -----------------
-class CursoListCreateView(generics.ListCreateAPIView):
+class CursoListCreateView(CachedListMixin, FastListMixin, generics.ListCreateAPIView):
+    cache_models = (Curso,)
+    values_fields = {'id_cur': 'id_cur', 'codigo_cur': 'codigo_cur', 'nombre_cur': 'nombre_cur'}
     queryset = Curso.objects.all()
     serializer_class = CursoSerializer
 
@@ -95,7 +147,12 @@ class CursoDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # ----------------- CLASES -----------------
-class ClaseListCreateView(ListCreateAPIView):
+class ClaseListCreateView(CachedListMixin, FastListMixin, ListCreateAPIView):
+    cache_models = (Clase, Curso, Docente)
+    values_fields = {
+        'id_cl': 'id_cl', 'nombre_cl': 'nombre_cl', 'video_cl': 'video_cl', 'id_cur': 'id_cur',
+        'id_dce': 'id_dce', 'curso': 'id_cur__nombre_cur', 'docente': 'id_dce__nombre_dce',
+    }
     serializer_class = ClaseSerializer
     def get_queryset(self):
         qs = Clase.objects.select_related('id_cur', 'id_dce').all()
@@ -113,7 +170,13 @@ class ClaseDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # ----------------- MATRICULAS -----------------
-class MatriculaListCreateView(generics.ListCreateAPIView):
+class MatriculaListCreateView(CachedListMixin, FastListMixin, generics.ListCreateAPIView):
+    cache_models = (Matricula, Estudiante, Clase, Curso, Docente)
+    values_fields = {
+        'id_mat': 'id_mat', 'id_est': 'id_est', 'id_cl': 'id_cl', 'fecha': 'fecha',
+        'estudiante': 'id_est__nombre_est', 'clase': 'id_cl__nombre_cl',
+        'curso': 'id_cl__id_cur__nombre_cur', 'docente': 'id_cl__id_dce__nombre_dce',
+    }
     queryset = Matricula.objects.select_related('id_est', 'id_cl', 'id_cl__id_cur', 'id_cl__id_dce')
     serializer_class = MatriculaSerializer
 
@@ -122,71 +185,139 @@ class MatriculaDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = MatriculaSerializer
 
 
-# ----------------- IA / Evaluar -----------------
-MODEL_PATH = os.path.join(os.path.dirname(__file__), 'MODELS', 'modelo_rf_v1.joblib')
-_rf = None
-try:
-    _rf = RandomForestAttentionModel.load(MODEL_PATH)
-    _MODEL_TAG = "RF_v1"
-except Exception:
-    _MODEL_TAG = "Heuristica_v1"
+class MatricularClaseView(APIView):
+    """
+    POST /api/clases/<pk>/matricular/
+    body: { "id_est": [1, 2, ...], "desde_clase": 5, "id_cur": 3 }  (uno o más; se unen)
+      desde_clase -> los matriculados en esa clase
+      id_cur      -> los matriculados en cualquier clase del curso
+    Resp: { candidatos, insertados, omitidos }  (omitidos = ya matriculados)
+    """
+    def post(self, request, pk):
+        if not Clase.objects.filter(pk=pk).exists():
+            return Response({'detail': 'Clase no encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+        ser = MatriculaMasivaSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        res = matricular(pk, estudiantes_origen(**ser.validated_data))
+        return Response(res, status=status.HTTP_201_CREATED if res['insertados'] else status.HTTP_200_OK)
+
+
+# ----------------- IMPORTACIÓN MASIVA -----------------
+class ImportarView(APIView):
+    """
+    POST /api/importar/estudiantes|docentes|matriculas/
+    multipart, campo "archivo": .csv (UTF-8, separador , ; o tab) o .xlsx
+      ?dry_run=1   solo valida, no guarda
+      ?chunk=500   filas por bloque/transacción
+      ?stream=1    NDJSON: una línea por bloque y la última con el resumen
+    Sin stream -> { resumen: {...}, errores: [{fila, errores}] }
+    """
+    parser_classes = (MultiPartParser,)
+
+    def post(self, request, entidad):
+        if entidad not in ENTIDADES:
+            return Response({'detail': f'Entidad inválida. Use: {", ".join(ENTIDADES)}.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response({'detail': 'Falta el archivo (campo "archivo").'}, status=status.HTTP_400_BAD_REQUEST)
+        params = request.query_params
+        dry_run = params.get('dry_run') in ('1', 'true')
+        try:
+            chunk = max(1, min(5000, int(params.get('chunk') or IMPORT_CHUNK)))
+        except ValueError:
+            return Response({'detail': 'chunk debe ser un entero.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            filas = leer_filas(archivo, archivo.name)
+        except ArchivoInvalido as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        informes = importar(entidad, filas, chunk=chunk, dry_run=dry_run)
+
+        if params.get('stream') in ('1', 'true'):
+            def ndjson():
+                try:
+                    for inf in informes:
+                        yield json.dumps(inf, ensure_ascii=False) + '\n'
+                except ArchivoInvalido as e:
+                    yield json.dumps({'detail': str(e)}, ensure_ascii=False) + '\n'
+            return StreamingHttpResponse(ndjson(), content_type='application/x-ndjson')
+
+        errores = []
+        try:
+            for inf in informes:
+                if 'resumen' in inf:
+                    return Response({'resumen': inf['resumen'], 'errores': errores},
+                                    status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+                errores.extend(inf['errores'])
+        except ArchivoInvalido as e:
+            return Response({'detail': str(e), 'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+
 
 # ----------------- IA / Evaluar -----------------
-MODEL_PATH = os.path.join(os.path.dirname(__file__), 'MODELS', 'modelo_rf_v1.joblib')
-_rf = None
-try:
-    _rf = RandomForestAttentionModel.load(MODEL_PATH)
-    _MODEL_TAG = "RF_v1"
-except Exception:
-    _MODEL_TAG = "Heuristica_v1"
+# registro compartido: carga perezosa, recarga al cambiar el archivo y tag por versión
+_models = get_registry(settings.ATTENTION_MODEL_PATH)
+
+RECOMENDACIONES = {
+    "ATENTO":   "Buen enfoque. Pausas cada 15–20 min.",
+    "NEUTRO":   "Atención variable. Resúmenes + checks.",
+    "DISTRAIDO":"Actividades interactivas y segmentar."
+}
+
+def clasificar_metricas(metrics):
+    """metrics -> (nivel, recomendación, modelo) con el RF si está cargado, si no heurística."""
+    nivel, modelo = _models.predict_label(metrics)
+    return nivel, RECOMENDACIONES.get(nivel, "—"), modelo
+
+def clasificar_lote(metrics_list):
+    """Lista de metrics -> ([(nivel, recomendación)], modelo) con un solo predict del RF."""
+    niveles, modelo = _models.predict_labels(metrics_list)
+    return [(n, RECOMENDACIONES.get(n, "—")) for n in niveles], modelo
 
 class EvaluarAtencionView(views.APIView):
     """
     POST  /api/resultados/           -> crear resultado (igual que antes)
     GET   /api/resultados/?id_est=&id_cl=&id_cur=&latest=1&limit=20  -> listar/filtrar resultados
+    GET   /api/resultados/?...&cursor=<c>&limit=50   -> página {results, next_cursor}
+                                                         (cursor vacío o paginate=1 = primera página)
+    GET   /api/resultados/?...&export=csv|json        -> exportación completa en streaming
+    Filtros adicionales: desde=, hasta= (fecha o fecha-hora ISO).
     """
-    # === NUEVO: GET para consultar resultados desde BD ===
+    PAGE_MAX = 500
+
     def get(self, request):
-        qs = ResultadosEvaluacion.objects.select_related(
-            'id_est', 'id_cl', 'id_cl__id_cur'
-        ).all().order_by('-fechaeva_re')
-
-        id_est = request.query_params.get('id_est')
-        id_cl  = request.query_params.get('id_cl')
-        id_cur = request.query_params.get('id_cur')
-        latest = request.query_params.get('latest')  # '1' para solo el último
-        limit  = request.query_params.get('limit')
-
-        if id_est:
-            qs = qs.filter(id_est_id=id_est)
-        if id_cl:
-            qs = qs.filter(id_cl_id=id_cl)
-        if id_cur:
-            qs = qs.filter(id_cl__id_cur_id=id_cur)
+        params = request.query_params
+        qs = filtrar_resultados(params)
+
+        export = (params.get('export') or '').lower()
+        if export == 'csv':
+            return exportar_csv(qs)
+        if export == 'json':
+            return exportar_json(qs)
+        if export:
+            return Response({'detail': 'export debe ser csv o json.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        latest = params.get('latest')  # '1' para solo el último
+        limit  = params.get('limit')
+
+        if 'cursor' in params or params.get('paginate') == '1':
+            try:
+                n = max(1, min(self.PAGE_MAX, int(limit or 20)))
+            except ValueError:
+                n = 20
+            rows, next_cursor = pagina_keyset(qs, params.get('cursor'), n)
+            return Response({'results': rows, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
+
+        rows = resultados_values(qs)
         if latest == '1':
-            qs = qs[:1]
+            rows = rows[:1]
         elif limit:
             try:
                 n = max(1, min(100, int(limit)))
-                qs = qs[:n]
+                rows = rows[:n]
             except ValueError:
-                qs = qs[:20]
-
-        data = []
-        for r in qs:
-            data.append({
-                'id_re': r.id_re,
-                'nivelaten_re': r.nivelaten_re,
-                'atencion_ia_re': r.atencion_ia_re,
-                'fechaeva_re': r.fechaeva_re.isoformat(),
-                'id_est': r.id_est_id,
-                'id_cl': r.id_cl_id,
-                'clase': getattr(r.id_cl, 'nombre_cl', None),
-                'curso': getattr(getattr(r.id_cl, 'id_cur', None), 'nombre_cur', None),
-                'estudiante': f"{getattr(r.id_est, 'nombre_est', '')} {getattr(r.id_est, 'apellido_est', '')}".strip()
-            })
-        return Response(data, status=status.HTTP_200_OK)
+                rows = rows[:20]
+
+        return Response([fila_json(r) for r in rows], status=status.HTTP_200_OK)
 
     # === POST igual que tenías ===
     def post(self, request):
@@ -196,27 +327,174 @@ class EvaluarAtencionView(views.APIView):
         id_cl  = s.validated_data['id_cl']
         metrics = s.validated_data['metrics']
 
-        if _rf:
-            nivel = _rf.predict_label_from_metrics(metrics)
-        else:
-            nivel = heuristic_label(metrics)
-
-        recomend = {
-            "ATENTO":   "Buen enfoque. Pausas cada 15–20 min.",
-            "NEUTRO":   "Atención variable. Resúmenes + checks.",
-            "DISTRAIDO":"Actividades interactivas y segmentar."
-        }.get(nivel, "—")
-
-        obj = ResultadosEvaluacion.objects.create(
-            atencion_ia_re=recomend[:60],   # por si el campo es 60
-            nivelaten_re=nivel[:20],
-            id_est_id=id_est,
-            id_cl_id=id_cl
-        )
+        nivel, recomend, modelo = clasificar_metricas(metrics)
+
+        with transaction.atomic():
+            obj = ResultadosEvaluacion.objects.create(
+                atencion_ia_re=recomend[:60],   # por si el campo es 60
+                nivelaten_re=nivel[:20],
+                id_est_id=id_est,
+                id_cl_id=id_cl
+            )
+            if settings.ATTENTION_ROLLUP:
+                registrar_resultados([obj])
         return Response({
-            "modelo": _MODEL_TAG,
+            "modelo": modelo,
             "nivel": nivel,
             "recomendacion": recomend,
             "resultado_id": obj.id_re,
             "resultado": ResultadoEvalSerializer(obj).data
-        }, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        }, status=status.HTTP_201_CREATED)
+
+
+class EvaluarAtencionLoteView(views.APIView):
+    """
+    POST /api/resultados/lote/
+    body: [{ "id_est", "id_cl", "metrics" }, ...]  (o { "items": [...] })
+
+    Valida cada item, clasifica todos con un solo predict y los inserta con
+    bulk_create en una transacción. Responde resultados y errores por índice.
+    """
+    MAX_ITEMS = 500
+
+    def post(self, request):
+        items = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'Se espera una lista de resultados.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.MAX_ITEMS:
+            return Response({'detail': f'Máximo {self.MAX_ITEMS} resultados por lote.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        errores, validos = [], []
+        for i, item in enumerate(items):
+            s = ResultadoEvalCreateSerializer(data=item)
+            if s.is_valid():
+                validos.append((i, s.validated_data))
+            else:
+                errores.append({'index': i, 'errores': s.errors})
+
+        # FKs inexistentes harían fallar todo el bulk_create: se validan en 2 consultas
+        est_ok = set(Estudiante.objects.filter(
+            id_est__in={d['id_est'] for _, d in validos}).values_list('id_est', flat=True))
+        cl_ok = set(Clase.objects.filter(
+            id_cl__in={d['id_cl'] for _, d in validos}).values_list('id_cl', flat=True))
+        filas = []
+        for i, d in validos:
+            faltan = {}
+            if d['id_est'] not in est_ok:
+                faltan['id_est'] = ['Estudiante no existe.']
+            if d['id_cl'] not in cl_ok:
+                faltan['id_cl'] = ['Clase no existe.']
+            if faltan:
+                errores.append({'index': i, 'errores': faltan})
+            else:
+                filas.append((i, d))
+
+        clasif, modelo = clasificar_lote([d['metrics'] for _, d in filas])
+        objs = [
+            ResultadosEvaluacion(
+                atencion_ia_re=recomend[:60],
+                nivelaten_re=nivel[:20],
+                id_est_id=d['id_est'],
+                id_cl_id=d['id_cl'],
+            )
+            for (_, d), (nivel, recomend) in zip(filas, clasif)
+        ]
+        with transaction.atomic():
+            objs = ResultadosEvaluacion.objects.bulk_create(objs)
+            if settings.ATTENTION_ROLLUP:
+                registrar_resultados(objs)
+
+        resultados = [
+            {'index': i, 'nivel': nivel, 'recomendacion': recomend, 'resultado_id': obj.id_re}
+            for (i, _), (nivel, recomend), obj in zip(filas, clasif, objs)
+        ]
+        errores.sort(key=lambda e: e['index'])
+        if not resultados:
+            code = status.HTTP_400_BAD_REQUEST
+        elif errores:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_201_CREATED
+        return Response({
+            'modelo': modelo,
+            'creados': len(resultados),
+            'resultados': resultados,
+            'errores': errores,
+        }, status=code)
+
+
+# ----------------- Agregados para dashboards -----------------
+# Filtros comunes: id_cl | id_cur | id_est, desde=, hasta= (ver consultas.filtrar_resultados)
+# Con ATTENTION_ROLLUP se leen del resumen diario si ya corrió un backfill completo,
+# los filtros son por fecha (sin hora) y el bucket no es 'hour';
+# ?fuente=resultados fuerza el historial.
+def _usar_resumen(params, bucket='day'):
+    return (settings.ATTENTION_ROLLUP and params.get('fuente') != 'resultados'
+            and resumen_aplicable(params, bucket) and resumen_listo())
+
+class ResultadosResumenView(views.APIView):
+    """
+    GET /api/resultados/resumen/?id_cl=&id_cur=&id_est=&desde=&hasta=
+    -> { total, niveles: {ATENTO, NEUTRO, DISTRAIDO}, porcentajes: {...} }
+    """
+    def get(self, request):
+        params = request.query_params
+        if _usar_resumen(params):
+            data = distribucion_desde_resumen(filtrar_resumen(params))
+        else:
+            data = distribucion_niveles(filtrar_resultados(params))
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ResultadosTendenciaView(views.APIView):
+    """
+    GET /api/resultados/tendencia/?...&bucket=hour|day|week|month
+    -> [{ t, total, ATENTO, NEUTRO, DISTRAIDO }, ...]
+    """
+    def get(self, request):
+        bucket = request.query_params.get('bucket') or 'day'
+        if bucket not in BUCKETS:
+            return Response({'detail': f'bucket debe ser uno de: {", ".join(BUCKETS)}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        params = request.query_params
+        if _usar_resumen(params, bucket):
+            data = tendencia_desde_resumen(filtrar_resumen(params), bucket)
+        else:
+            data = tendencia_niveles(filtrar_resultados(params), bucket)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ResultadosDistraidosView(views.APIView):
+    """
+    GET /api/resultados/distraidos/?...&top=10&por_clase=1&min=3
+    -> [{ id_est, estudiante, total, distraidos, pct_distraido }, ...]
+       (con por_clase=1 además id_cl, clase y rank; top N por clase)
+    """
+    TOP_MAX = 100
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            top = max(1, min(self.TOP_MAX, int(params.get('top') or 10)))
+            min_eval = max(1, int(params.get('min') or 1))
+        except ValueError:
+            return Response({'detail': 'top y min deben ser enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+        por_clase = params.get('por_clase') == '1'
+        if _usar_resumen(params):
+            data = top_distraidos_desde_resumen(filtrar_resumen(params), top, por_clase, min_eval)
+        else:
+            data = top_distraidos(filtrar_resultados(params), top, por_clase, min_eval)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+# ----------------- Diagnóstico -----------------
+class DiagnosticoDBView(views.APIView):
+    """
+    GET /api/diagnostico/db/  -> modo de conexión, tiempos y uso del pool
+    (solo admin, salvo DEBUG).
+    """
+    permission_classes = (EsAdminODebug,)
+
+    def get(self, request):
+        return Response(estado_db())
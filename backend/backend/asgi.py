@@ -2,6 +2,7 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+WebSocket connections are routed to ``api.streaming`` (live attention).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +14,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# después de get_asgi_application(): las apps ya están cargadas
+from api.streaming import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """HTTP va a Django; los WebSocket (ws/atencion/...) al streaming de atención."""
+    if scope["type"] == "websocket":
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
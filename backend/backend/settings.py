@@ -4,6 +4,7 @@ Django settings for backend project.
 Generated by 'django-admin startproject' using Django 5.2.5.
 """
 
+import os
 from pathlib import Path
 
 # Paths
@@ -67,9 +68,28 @@ DATABASES = {
         'PASSWORD': '1234',
         'HOST': 'localhost',
         'PORT': '5432',
+        # reusa la conexión verificándola antes (evita el connect por request)
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Conexiones a la BD (tamaños por variables de entorno):
+# - por defecto, conexión persistente por hilo/worker durante DB_CONN_MAX_AGE s;
+# - DB_POOL=1: pool de psycopg 3 (pip install "psycopg[pool]"), recomendado con
+#   ASGI o muchos hilos. Django exige CONN_MAX_AGE=0 con pool.
+# Estado actual: GET /api/diagnostico/db/ (ver api/diagnostico.py).
+if os.environ.get('DB_POOL', '').lower() in ('1', 'true', 'yes'):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {'pool': {
+        'name': 'api',
+        'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),     # s esperando una conexión libre
+        'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),  # s antes de cerrar las sobrantes
+    }}
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
 # Validadores de contraseña (para el admin de Django; tu API usa sus propias validaciones también)
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -90,13 +110,55 @@ STATIC_URL = 'static/'
 # PK por defecto
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ---------- IA ----------
+# Modelo de atención; si existe el .npz compilado al lado se usa ese. Se recarga
+# solo cuando el archivo cambia en disco (ver ia.attention_model_rf.ModelRegistry).
+ATTENTION_MODEL_PATH = BASE_DIR / 'ia' / 'MODELS' / 'modelo_rf_v1.joblib'
+# Rollup diario (tabla resumenatencion): se activa recién cuando un
+# `python manage.py backfill_resumen` completo (sin --desde/--hasta) termina;
+# desde ahí cada POST de resultados lo actualiza y los agregados de dashboards lo leen.
+ATTENTION_ROLLUP = True
+
 # ---------- DRF ----------
 REST_FRAMEWORK = {
-    # Cuando agregues auth real, añade JWT o Session aquí.
-    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    # Token firmado que emite /api/login/ (ver api/auth.py). Los permisos siguen
+    # abiertos: las vistas que lo requieran deben pedir IsAuthenticated.
+    'DEFAULT_AUTHENTICATION_CLASSES': ['api.auth.TokenAuthentication'],
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
 }
 
+API_TOKEN_MAX_AGE = int(os.environ.get('API_TOKEN_MAX_AGE', 12 * 3600))  # segundos
+API_TOKEN_CACHE_SIZE = 10000  # tokens ya verificados que se recuerdan por proceso
+API_TOKEN_CACHE_TTL = 300     # segundos
+
+# Hash de contraseñas (ver api/claves.py)
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 64))  # pendientes antes de responder 503
+PASSWORD_HASH_BATCH_WORKERS = int(os.environ.get('PASSWORD_HASH_BATCH_WORKERS', max(1, PASSWORD_HASH_WORKERS // 2)))  # importaciones
+PASSWORD_VERIFY_CACHE_SIZE = 10000
+PASSWORD_VERIFY_CACHE_TTL = 60  # segundos
+
+# ---------- Caché ----------
+# locmem por defecto (por proceso); con REDIS_URL=redis://host:6379/0 se usa Redis,
+# necesario si hay varios workers para que la invalidación llegue a todos.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'atencion-api',
+            'OPTIONS': {'MAX_ENTRIES': 2000},
+        }
+    }
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = 300  # segundos; las escrituras invalidan antes (ver api/cache.py)
+
 # ---------- CORS / CSRF para desarrollo ----------
 # Opción 1 (recomendada): especificar orígenes permitidos
 CORS_ALLOWED_ORIGINS = [
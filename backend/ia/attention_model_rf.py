@@ -1,16 +1,24 @@
+import io
 import os
 import glob
 import json
 import math
+import time
+import zipfile
+import hashlib
+import logging
 import argparse
+import threading
 from collections import Counter
-from typing import Tuple
+from typing import NamedTuple, Optional, Tuple
 
 import numpy as np
 from joblib import dump, load
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.model_selection import train_test_split, StratifiedKFold, ParameterGrid, ParameterSampler
+from sklearn.metrics import classification_report, confusion_matrix, f1_score
+
+logger = logging.getLogger(__name__)
 
 """
 RandomForest para nivel de atención (ATENTO / NEUTRO / DISTRAIDO)
@@ -23,6 +31,10 @@ FUNCIONA EN DOS MODOS:
 
 2) Inferencia: cargar el modelo y predecir desde un diccionario 'metrics' con los mismos campos.
 
+3) Compilación: aplanar el bosque entrenado en arreglos NumPy contiguos (.npz) y
+   predecir con NumPy puro (CompiledForest), sin joblib ni validaciones de
+   sklearn por llamada. Da las mismas etiquetas que el RandomForest original.
+
 Requisitos (ejemplo compatible con Python 3.13 en Windows):
     pip install --only-binary=:all: scikit-learn==1.5.2 joblib==1.4.2 scipy==1.16.1
 """
@@ -120,33 +132,117 @@ def _read_json(path: str) -> dict:
         return json.load(f)
 
 
-def load_dataset(json_dir: str, use_pseudo: bool = True) -> Tuple[np.ndarray, np.ndarray]:
-    pattern = os.path.join(json_dir, "*.json")
-    files = sorted(glob.glob(pattern))
-    X, y = [], []
-    for fp in files:
-        try:
-            data = _read_json(fp)
-            metrics = data.get("metricas") or data.get("metrics") or {}
-            if not metrics:
-                continue
+def _parse_session(args) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    """Un JSON de sesión -> (fila de features, etiqueta); (None, None) si no sirve."""
+    fp, use_pseudo = args
+    try:
+        data = _read_json(fp)
+        metrics = data.get("metricas") or data.get("metrics") or {}
+        if not metrics:
+            return None, None
 
-            # etiquetas reales si vienen en el JSON
-            label = data.get("label") or data.get("nivel_atencion_gt") or data.get("nivel_atencion")
-            if label is None and use_pseudo:
-                label = heuristic_label(metrics)
+        # etiquetas reales si vienen en el JSON
+        label = data.get("label") or data.get("nivel_atencion_gt") or data.get("nivel_atencion")
+        if label is None and use_pseudo:
+            label = heuristic_label(metrics)
 
-            if label is None:
-                # si no hay etiqueta y no queremos pseudo, saltar
-                continue
+        if label is None:
+            # si no hay etiqueta y no queremos pseudo, saltar
+            return None, None
 
-            X.append(features_from_metrics(metrics))
-            y.append(str(label).upper())
-        except Exception as e:
-            print(f"[WARN] No se pudo leer {fp}: {e}")
+        return features_from_metrics(metrics), str(label).upper()
+    except Exception as e:
+        print(f"[WARN] No se pudo leer {fp}: {e}")
+        return None, None
+
+
+FEATURE_CACHE_DIR = ".features_cache"
 
-    X = np.stack(X, axis=0) if X else np.empty((0, len(FEATURE_NAMES)), dtype=np.float32)
-    y = np.array(y, dtype=object)
+
+def _read_feature_cache(cache_dir: str, use_pseudo: bool):
+    """(manifest, X, y) del caché, o (None, None, None) si no existe o no es compatible."""
+    try:
+        with open(os.path.join(cache_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("features") != FEATURE_NAMES or manifest.get("use_pseudo") != use_pseudo:
+            return None, None, None
+        X = np.load(os.path.join(cache_dir, "X.npy"))
+        y = np.load(os.path.join(cache_dir, "y.npy"))
+        return manifest, X, y
+    except (OSError, ValueError):
+        return None, None, None
+
+
+def _write_feature_cache(cache_dir: str, use_pseudo: bool, files: dict, X: np.ndarray, y: np.ndarray):
+    os.makedirs(cache_dir, exist_ok=True)
+    # escritura atómica: un entrenamiento interrumpido no deja un caché inconsistente
+    for name, arr in (("X.npy", X), ("y.npy", y.astype(str))):
+        tmp = os.path.join(cache_dir, name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, os.path.join(cache_dir, name))
+    tmp = os.path.join(cache_dir, "manifest.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"features": FEATURE_NAMES, "use_pseudo": use_pseudo, "files": files}, f)
+    os.replace(tmp, os.path.join(cache_dir, "manifest.json"))
+
+
+def load_dataset(json_dir: str, use_pseudo: bool = True, workers: Optional[int] = None,
+                 cache: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lee los JSON de sesión de ``json_dir`` (en orden de nombre) y devuelve (X, y).
+
+    Los archivos se parsean en paralelo (``workers`` procesos) y las filas se
+    escriben en una matriz float32 preasignada. Con ``cache=True`` se guarda en
+    ``json_dir/.features_cache`` la matriz (.npy) y un manifiesto con
+    mtime/tamaño de cada archivo: las siguientes corridas solo parsean los
+    archivos nuevos o modificados.
+    """
+    pattern = os.path.join(json_dir, "*.json")
+    files = sorted(glob.glob(pattern))
+    cache_dir = os.path.join(json_dir, FEATURE_CACHE_DIR)
+    manifest, X_old, y_old = _read_feature_cache(cache_dir, use_pseudo) if cache else (None, None, None)
+    old_files = manifest["files"] if manifest else {}
+
+    X = np.empty((len(files), len(FEATURE_NAMES)), dtype=np.float32)
+    y = np.empty(len(files), dtype=object)
+    keep = np.zeros(len(files), dtype=bool)
+    stats, todo = {}, []
+    for i, fp in enumerate(files):
+        name = os.path.basename(fp)
+        st = os.stat(fp)
+        stats[name] = [st.st_mtime_ns, st.st_size, -1]
+        prev = old_files.get(name)
+        if prev and prev[:2] == stats[name][:2]:
+            if prev[2] >= 0:
+                X[i] = X_old[prev[2]]; y[i] = str(y_old[prev[2]]); keep[i] = True
+        else:
+            todo.append(i)
+
+    if todo:
+        tasks = [(files[i], use_pseudo) for i in todo]
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(tasks) > 256:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                parsed = ex.map(_parse_session, tasks, chunksize=max(1, len(tasks) // (workers * 8)))
+                for i, (row, label) in zip(todo, parsed):
+                    if row is not None:
+                        X[i] = row; y[i] = label; keep[i] = True
+        else:
+            for i, task in zip(todo, tasks):
+                row, label = _parse_session(task)
+                if row is not None:
+                    X[i] = row; y[i] = label; keep[i] = True
+
+    X, y = X[keep], y[keep]
+    if cache and (todo or len(old_files) != len(files)):
+        for row, i in enumerate(np.flatnonzero(keep)):
+            stats[os.path.basename(files[i])][2] = row
+        try:
+            _write_feature_cache(cache_dir, use_pseudo, stats, X, y)
+        except OSError as e:
+            print(f"[WARN] No se pudo escribir el caché de features: {e}")
     return X, y
 
 
@@ -177,25 +273,282 @@ class RandomForestAttentionModel:
         x = features_from_metrics(metrics).reshape(1, -1)
         return str(self.predict(x)[0])
 
+    def compile(self) -> "CompiledForest":
+        return CompiledForest.from_sklearn(self.clf)
+
     def save(self, path: str):
         os.makedirs(os.path.dirname(path), exist_ok=True)
         dump({"model": self.clf, "features": FEATURE_NAMES}, path)
 
     @staticmethod
-    def load(path: str) -> "RandomForestAttentionModel":
-        pkg = load(path)
+    def load(path: str, mmap: bool = False) -> "RandomForestAttentionModel":
+        pkg = load(path, mmap_mode="r" if mmap else None)
         obj = RandomForestAttentionModel()
         obj.clf = pkg["model"]
         obj.classes_ = list(obj.clf.classes_)
         return obj
 
 
+# ------------------------------
+# Bosque compilado (NumPy puro)
+# ------------------------------
+class CompiledForest:
+    """
+    RandomForest aplanado: todos los nodos de todos los árboles en arreglos
+    contiguos. Las hojas apuntan a sí mismas, así el descenso es un bucle fijo
+    de ``max_depth`` pasos vectorizado sobre filas y árboles.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes):
+        self.feature = feature       # (n_nodes,) int32; 0 en hojas
+        self.threshold = threshold   # (n_nodes,) float64
+        self.left = left             # (n_nodes,) int32, índice global
+        self.right = right
+        self.value = value           # (n_nodes, n_classes) float32, proporciones por hoja
+        self.roots = roots           # (n_trees,) int32
+        self.max_depth = int(max_depth)
+        self.classes_ = list(classes)
+        self._classes = np.array(self.classes_, dtype=object)
+
+    @classmethod
+    def from_sklearn(cls, clf) -> "CompiledForest":
+        feats, thrs, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for est in clf.estimators_:
+            t = est.tree_
+            n = t.node_count
+            idx = np.arange(n, dtype=np.int32) + offset
+            leaf = t.children_left == -1
+            feats.append(np.where(leaf, 0, t.feature).astype(np.int32))
+            thrs.append(t.threshold.astype(np.float64))
+            lefts.append(np.where(leaf, idx, t.children_left + offset).astype(np.int32))
+            rights.append(np.where(leaf, idx, t.children_right + offset).astype(np.int32))
+            v = t.value[:, 0, :]
+            values.append((v / np.maximum(v.sum(axis=1, keepdims=True), 1e-12)).astype(np.float32))
+            roots.append(offset)
+            offset += n
+        return cls(
+            np.concatenate(feats), np.concatenate(thrs),
+            np.concatenate(lefts), np.concatenate(rights),
+            np.concatenate(values), np.array(roots, dtype=np.int32),
+            max(est.tree_.max_depth for est in clf.estimators_), clf.classes_,
+        )
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].mean(axis=1)
+
+    def predict(self, X: np.ndarray):
+        return self._classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def predict_label_from_metrics(self, metrics: dict) -> str:
+        return str(self.predict(features_from_metrics(metrics))[0])
+
+    def save(self, path, source_sha256: str = ""):
+        if isinstance(path, (str, os.PathLike)):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # sin compresión: permite mapear cada arreglo a memoria (ver load)
+        np.savez(
+            path, feature=self.feature, threshold=self.threshold, left=self.left,
+            right=self.right, value=self.value, roots=self.roots,
+            max_depth=np.array(self.max_depth), classes=np.array(self.classes_, dtype=str),
+            features=np.array(FEATURE_NAMES, dtype=str),
+            source_sha256=np.array(source_sha256),
+        )
+
+    @staticmethod
+    def load(path: str, mmap: bool = False) -> "CompiledForest":
+        """Con ``mmap=True`` los arreglos se mapean del archivo (compartidos entre workers)."""
+        z = _npz_memmap(path) if mmap else dict(np.load(path))
+        if [str(f) for f in z["features"]] != FEATURE_NAMES:
+            raise ValueError(f"{path}: features distintas a FEATURE_NAMES")
+        return CompiledForest(
+            z["feature"], z["threshold"], z["left"], z["right"], z["value"],
+            z["roots"], z["max_depth"], [str(c) for c in z["classes"]],
+        )
+
+
+def _npz_memmap(path: str) -> dict:
+    """Mapea a memoria (solo lectura) cada arreglo de un .npz sin compresión."""
+    out = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                out[name] = np.load(zf.open(info))
+                continue
+            # cabecera local del zip: 30 bytes + nombre + extra
+            f.seek(info.header_offset + 26)
+            n_name, n_extra = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(n_name) + int(n_extra))
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, fortran, dtype = read_header(f)
+            if dtype.hasobject or not shape:
+                f.seek(info.header_offset + 30 + int(n_name) + int(n_extra))
+                out[name] = np.lib.format.read_array(f)
+            else:
+                out[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(),
+                                      shape=shape, order="F" if fortran else "C")
+    return out
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def compiled_path(path: str) -> str:
+    """Ruta del .npz compilado junto al .joblib."""
+    return os.path.splitext(path)[0] + ".npz"
+
+
+def _compiled_is_current(path: str) -> bool:
+    """El .npz vale si existe y fue compilado desde el .joblib actual (por hash, no por mtime)."""
+    npz = compiled_path(path)
+    if not os.path.exists(npz):
+        return False
+    if not os.path.exists(path):
+        return True
+    with np.load(npz) as z:
+        src = str(z["source_sha256"]) if "source_sha256" in z.files else ""
+    return src == file_sha256(path)
+
+
+def load_model(path: str, mmap: bool = False):
+    """
+    Carga el modelo para inferencia: usa el .npz compilado si corresponde al
+    .joblib actual; si no, el RandomForest original.
+    """
+    if _compiled_is_current(path):
+        return CompiledForest.load(compiled_path(path), mmap=mmap)
+    if os.path.exists(compiled_path(path)):
+        logger.warning("%s no corresponde a %s; recompilar con 'compile'", compiled_path(path), path)
+    return RandomForestAttentionModel.load(path, mmap=mmap)
+
+
+# ------------------------------
+# Registro de modelos (por proceso)
+# ------------------------------
+class LoadedModel(NamedTuple):
+    model: Optional[object]   # CompiledForest / RandomForestAttentionModel, None = heurística
+    tag: str                  # versión que sirvió la predicción, p.ej. "RF_v1@3f2a9c1b"
+
+
+class ModelRegistry:
+    """
+    Carga perezosa del modelo en el primer uso, con recarga en caliente: cada
+    ``check_interval`` segundos compara mtime/tamaño de los artefactos y, si
+    cambiaron, carga el nuevo y lo intercambia sin reiniciar el proceso. Las
+    predicciones en curso terminan con el modelo que tomaron.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0, mmap: bool = True,
+                 fallback_tag: str = "Heuristica_v1"):
+        self.path = str(path)
+        self.check_interval = check_interval
+        self.mmap = mmap
+        self.fallback_tag = fallback_tag
+        self._current: Optional[LoadedModel] = None
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _stat_signature(self):
+        sig = []
+        for p in (self.path, compiled_path(self.path)):
+            try:
+                st = os.stat(p)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _base_tag(self) -> str:
+        # modelo_rf_v1.joblib -> RF_v1
+        stem = os.path.splitext(os.path.basename(self.path))[0]
+        return stem.replace("modelo_", "").upper().replace("_V", "_v")
+
+    def _load(self) -> LoadedModel:
+        try:
+            model = load_model(self.path, mmap=self.mmap)
+        except Exception as e:
+            logger.warning("No se pudo cargar el modelo %s (%s); usando heurística", self.path, e)
+            return LoadedModel(None, self.fallback_tag)
+        src = compiled_path(self.path) if isinstance(model, CompiledForest) else self.path
+        return LoadedModel(model, f"{self._base_tag()}@{file_sha256(src)[:8]}")
+
+    def get(self) -> LoadedModel:
+        now = time.monotonic()
+        current = self._current
+        if current is not None and now < self._next_check:
+            return current
+        with self._lock:
+            if self._current is None or now >= self._next_check:
+                sig = self._stat_signature()
+                if self._current is None or sig != self._signature:
+                    if self._current is not None:
+                        logger.info("Modelo %s cambió en disco; recargando", self.path)
+                    loaded = self._load()
+                    if loaded.model is None and self._current is not None and self._current.model is not None:
+                        # archivo a medio escribir: se conserva el anterior y se reintenta
+                        pass
+                    else:
+                        self._current = loaded
+                        self._signature = sig
+                self._next_check = now + self.check_interval
+            return self._current
+
+    def predict_label(self, metrics: dict) -> Tuple[str, str]:
+        """(etiqueta, tag del modelo que la produjo)."""
+        model, tag = self.get()
+        if model is None:
+            return heuristic_label(metrics), tag
+        return model.predict_label_from_metrics(metrics), tag
+
+    def predict_labels(self, metrics_list) -> Tuple[list, str]:
+        """Etiquetas de varias sesiones con un solo predict."""
+        model, tag = self.get()
+        if model is None:
+            return [heuristic_label(m) for m in metrics_list], tag
+        if not metrics_list:
+            return [], tag
+        X = np.stack([features_from_metrics(m) for m in metrics_list])
+        return [str(n) for n in model.predict(X)], tag
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(path: str, **kwargs) -> ModelRegistry:
+    """Registro compartido en el proceso para la ruta dada."""
+    key = os.path.abspath(str(path))
+    with _registries_lock:
+        reg = _registries.get(key)
+        if reg is None:
+            reg = _registries[key] = ModelRegistry(key, **kwargs)
+        return reg
+
+
 # ------------------------------
 # CLI
 # ------------------------------
 
 def train_cli(args):
-    X, y = load_dataset(args.data, use_pseudo=not args.no_pseudo)
+    X, y = load_dataset(args.data, use_pseudo=not args.no_pseudo,
+                        workers=args.workers, cache=not args.no_cache)
     if X.shape[0] < 10:
         raise SystemExit(
             f"Muy pocos ejemplos en '{args.data}'. "
@@ -225,6 +578,96 @@ def train_cli(args):
     model.save(out_path)
     print(f"\nModelo guardado en: {out_path}")
 
+    # el .npz viejo ya no coincide (hash del .joblib): sin recompilar, el
+    # registro caería a predict_proba de sklearn
+    compiled, npz_path, n = compile_model(out_path, X=X)
+    print(f"Bosque compilado ({len(compiled.roots)} árboles, verificado con {n} filas): {npz_path}")
+
+
+def _tune_fold(X, y, params, tr, te, seed, measure):
+    """Entrena/evalúa un fold; en ``measure`` además mide latencia y tamaño del modelo."""
+    model = RandomForestAttentionModel(random_state=seed, **params)
+    model.clf.set_params(n_jobs=1)  # el paralelismo es entre folds/configs
+    t0 = time.perf_counter()
+    model.fit(X[tr], y[tr])
+    res = {"fit_s": time.perf_counter() - t0,
+           "f1_macro": f1_score(y[te], model.predict(X[te]), average="macro")}
+
+    if measure:
+        rows = X[te][:50]
+        compiled = model.compile()
+        for key, predict in (("predict_ms_row", model.predict), ("predict_ms_row_compiled", compiled.predict)):
+            t0 = time.perf_counter()
+            for r in rows:
+                predict(r.reshape(1, -1))
+            res[key] = 1000.0 * (time.perf_counter() - t0) / max(1, len(rows))
+        buf = io.BytesIO(); dump({"model": model.clf, "features": FEATURE_NAMES}, buf)
+        res["size_kb"] = len(buf.getvalue()) / 1024.0
+        buf = io.BytesIO(); compiled.save(buf)
+        res["size_kb_npz"] = len(buf.getvalue()) / 1024.0
+    return res
+
+
+def tune_cli(args):
+    from joblib import Parallel, delayed
+
+    X, y = load_dataset(args.data, use_pseudo=not args.no_pseudo,
+                        workers=args.workers, cache=not args.no_cache)
+    if X.shape[0] < 10:
+        raise SystemExit(f"Muy pocos ejemplos en '{args.data}'.")
+    print(f"Dataset: {X.shape[0]} ejemplos, {X.shape[1]} features")
+
+    space = {
+        "n_estimators": args.estimators,
+        "max_depth": [d or None for d in args.max_depth],   # 0 = sin límite
+        "min_samples_leaf": args.min_leaf,
+    }
+    if args.search == "random":
+        configs = list(ParameterSampler(space, n_iter=args.n_iter, random_state=args.seed))
+    else:
+        configs = list(ParameterGrid(space))
+    folds = list(StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=args.seed).split(X, y))
+    print(f"{len(configs)} configuraciones x {len(folds)} folds")
+
+    out = Parallel(n_jobs=args.jobs)(
+        delayed(_tune_fold)(X, y, cfg, tr, te, args.seed, k == 0)
+        for cfg in configs for k, (tr, te) in enumerate(folds)
+    )
+
+    report = []
+    for c, cfg in enumerate(configs):
+        res = out[c*len(folds):(c+1)*len(folds)]
+        f1 = np.array([r["f1_macro"] for r in res])
+        row = dict(cfg)
+        row.update({
+            "f1_macro": float(f1.mean()), "f1_std": float(f1.std()),
+            "fit_s": float(np.mean([r["fit_s"] for r in res])),
+        })
+        row.update({k: float(v) for k, v in res[0].items() if k not in ("fit_s", "f1_macro")})
+        report.append(row)
+    report.sort(key=lambda r: -r["f1_macro"])
+
+    print(f"\n{'trees':>5} {'depth':>5} {'leaf':>4} {'F1':>6} {'±':>5} {'fit s':>6} "
+          f"{'ms/fila':>8} {'ms/fila*':>8} {'KB':>8} {'KB npz':>7}")
+    for r in report:
+        print(f"{r['n_estimators']:>5} {str(r['max_depth']):>5} {r['min_samples_leaf']:>4} "
+              f"{r['f1_macro']:>6.3f} {r['f1_std']:>5.3f} {r['fit_s']:>6.2f} "
+              f"{r['predict_ms_row']:>8.3f} {r['predict_ms_row_compiled']:>8.3f} "
+              f"{r['size_kb']:>8.0f} {r['size_kb_npz']:>7.0f}")
+    print("(* bosque compilado)")
+
+    # el más chico/rápido que no pierde más de f1_tol respecto al mejor
+    best = report[0]["f1_macro"]
+    ok = [r for r in report if r["f1_macro"] >= best - args.f1_tol]
+    pick = min(ok, key=lambda r: (r["size_kb_npz"], r["predict_ms_row_compiled"]))
+    print(f"\nRecomendado (F1 >= {best - args.f1_tol:.3f}): --estimators {pick['n_estimators']} "
+          f"--max-depth {pick['max_depth'] or 0} --min-leaf {pick['min_samples_leaf']}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"configs": report, "recomendado": pick}, f, indent=2)
+        print(f"Reporte guardado en: {args.report}")
+
 
 def predict_from_json_cli(args):
     model = RandomForestAttentionModel.load(args.model)
@@ -236,6 +679,33 @@ def predict_from_json_cli(args):
     print("Predicción:", label)
 
 
+def compile_model(model_path: str, out_path: str = None, X=None):
+    """
+    Compila el .joblib de ``model_path`` a .npz (por defecto junto a él),
+    verificando que el bosque compilado dé las mismas etiquetas que sklearn
+    sobre ``X`` (o filas sintéticas). Retorna ``(compiled, out_path, filas)``.
+    """
+    model = RandomForestAttentionModel.load(model_path)
+    compiled = model.compile()
+    out_path = out_path or compiled_path(model_path)
+
+    if X is None:
+        rng = np.random.default_rng(0)
+        X = (rng.random((5000, len(FEATURE_NAMES))) * [40, 0.5, 0.5, 0.5, 100, 100, 100, 30, 30, 100]).astype(np.float32)
+    if X.shape[0] and not np.array_equal(model.predict(X), compiled.predict(X)):
+        raise SystemExit("El bosque compilado no coincide con el modelo original.")
+
+    compiled.save(out_path, source_sha256=file_sha256(model_path))
+    return compiled, out_path, X.shape[0]
+
+
+def compile_cli(args):
+    X = load_dataset(args.data)[0] if args.data else None
+    compiled, out_path, n = compile_model(args.model, args.out, X)
+    print(f"Bosque compilado: {len(compiled.roots)} árboles, {len(compiled.feature)} nodos, "
+          f"verificado con {n} filas -> {out_path}")
+
+
 def build_argparser():
     p = argparse.ArgumentParser(description="RandomForest para nivel de atención")
     sub = p.add_subparsers(dest="cmd")
@@ -250,12 +720,37 @@ def build_argparser():
     t.add_argument("--min-leaf", type=int, default=1)
     t.add_argument("--seed", type=int, default=42)
     t.add_argument("--no-pseudo", action="store_true", help="No usar pseudo-etiquetas; requiere labels reales en JSON")
+    t.add_argument("--workers", type=int, default=None, help="Procesos para parsear los JSON (por defecto, núcleos)")
+    t.add_argument("--no-cache", action="store_true", help="No usar ni escribir el caché de features")
+
+    # búsqueda de hiperparámetros con CV estratificada
+    u = sub.add_parser("tune", help="Búsqueda grid/random con k-fold estratificado y reporte de tiempos")
+    u.add_argument("--data", required=True, help="Directorio con session_summary_*.json")
+    u.add_argument("--search", choices=("grid", "random"), default="grid")
+    u.add_argument("--n-iter", type=int, default=10, help="Configuraciones en modo random")
+    u.add_argument("--estimators", type=int, nargs="+", default=[25, 50, 100, 300])
+    u.add_argument("--max-depth", type=int, nargs="+", default=[4, 8, 12, 0], help="0 = sin límite")
+    u.add_argument("--min-leaf", type=int, nargs="+", default=[1, 3])
+    u.add_argument("--folds", type=int, default=5)
+    u.add_argument("--jobs", type=int, default=-1, help="Procesos para folds/configs en paralelo")
+    u.add_argument("--f1-tol", type=float, default=0.01, help="Pérdida de F1 aceptada al elegir el modelo")
+    u.add_argument("--report", default=None, help="Guardar el reporte en JSON")
+    u.add_argument("--seed", type=int, default=42)
+    u.add_argument("--no-pseudo", action="store_true")
+    u.add_argument("--workers", type=int, default=None)
+    u.add_argument("--no-cache", action="store_true")
 
     # predicción directa desde un JSON
     g = sub.add_parser("predict-json", help="Predecir desde un JSON de sesión")
     g.add_argument("--predict-json", required=True)
     g.add_argument("--model", required=True)
 
+    # compilar a arreglos NumPy (.npz)
+    c = sub.add_parser("compile", help="Aplanar el modelo a .npz para inferencia con NumPy")
+    c.add_argument("--model", required=True)
+    c.add_argument("--out", default=None, help="Por defecto, mismo nombre con .npz")
+    c.add_argument("--data", default=None, help="JSONs para verificar (si no, filas aleatorias)")
+
     return p
 
 
@@ -267,5 +762,9 @@ if __name__ == "__main__":
         train_cli(args)
     elif args.cmd == "predict-json":
         predict_from_json_cli(args)
+    elif args.cmd == "tune":
+        tune_cli(args)
+    elif args.cmd == "compile":
+        compile_cli(args)
     else:
         parser.print_help()
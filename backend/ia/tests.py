@@ -0,0 +1,232 @@
+import json
+import os
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+import numpy as np
+
+from . import attention_model_rf
+from .attention_model_rf import (
+    FEATURE_CACHE_DIR, FEATURE_NAMES, CompiledForest, ModelRegistry, RandomForestAttentionModel,
+    compile_model, compiled_path, features_from_metrics, get_registry, load_dataset,
+)
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), 'MODELS', 'modelo_rf_v1.joblib')
+ESCALA = np.array([40, 0.5, 0.5, 0.5, 100, 100, 100, 30, 30, 100], np.float32)
+
+
+def _filas(n, seed=0):
+    """Filas de features en rangos plausibles (mismas escalas que compile_model)."""
+    return (np.random.default_rng(seed).random((n, len(FEATURE_NAMES))) * ESCALA).astype(np.float32)
+
+
+def _entrenar(seed=0, n_estimators=25, max_depth=None):
+    X = _filas(400, seed)
+    y = np.where(X[:, 4] > 60, 'ATENTO', np.where(X[:, 9] > 40, 'DISTRAIDO', 'NEUTRO'))
+    return RandomForestAttentionModel(n_estimators=n_estimators, max_depth=max_depth, random_state=seed).fit(X, y)
+
+
+class CompiledForestTests(unittest.TestCase):
+    def assertIgual(self, rf, compiled, X):
+        np.testing.assert_allclose(compiled.predict_proba(X), rf.clf.predict_proba(X), rtol=0, atol=1e-6)
+        np.testing.assert_array_equal(compiled.predict(X), rf.predict(X))
+
+    def test_igual_a_sklearn(self):
+        for max_depth in (None, 3):
+            rf = _entrenar(max_depth=max_depth)
+            compiled = rf.compile()
+            self.assertEqual(compiled.classes_, rf.classes_)
+            self.assertIgual(rf, compiled, _filas(2000, seed=1))
+
+    def test_modelo_incluido(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # pickle de otra versión de sklearn
+            rf = RandomForestAttentionModel.load(MODEL_PATH)
+        self.assertIgual(rf, rf.compile(), _filas(2000, seed=2))
+
+    def test_una_fila(self):
+        rf = _entrenar()
+        x = _filas(1, seed=3)
+        self.assertEqual(rf.compile().predict_proba(x[0]).shape, (1, len(rf.classes_)))
+        self.assertEqual(rf.compile().predict(x[0])[0], rf.predict(x)[0])
+
+    def test_guardar_y_cargar(self):
+        rf = _entrenar()
+        X = _filas(500, seed=4)
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'modelo_rf_v1.joblib')
+            rf.save(path)
+            compiled, out, n = compile_model(path, X=X)
+            self.assertEqual((out, n), (compiled_path(path), 500))
+            for mmap in (False, True):
+                cargado = CompiledForest.load(out, mmap=mmap)
+                self.assertIgual(rf, cargado, X)
+                del cargado  # el memmap mantiene el archivo abierto
+
+    def test_features_distintas(self):
+        compiled = _entrenar().compile()
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'm.npz')
+            compiled.save(path)
+            with np.load(path) as z:
+                arrays = dict(z)
+            arrays['features'] = np.array(FEATURE_NAMES[::-1])
+            np.savez(path, **arrays)
+            with self.assertRaises(ValueError):
+                CompiledForest.load(path)
+
+
+METRICS = {
+    'session_seconds': 60, 'frames_total': 1800, 'frames_face': 1700, 'noface_pct': 5,
+    'blink_count': 15, 'blink_rate': 15, 'ear_avg': 0.3, 'ear_min': 0.1, 'ear_max': 0.4,
+    'yaw_avg_abs': 5, 'pitch_avg_abs': 5, 'gaze_pct': {'centro': 70},
+}
+
+
+class ModelRegistryTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'modelo_rf_v2.joblib')
+        patcher = mock.patch.object(attention_model_rf, 'load_model', wraps=attention_model_rf.load_model)
+        self.load_model = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def guardar(self, rf, segundos):
+        """Guarda el modelo con un mtime distinto (la firma es mtime/tamaño)."""
+        rf.save(self.path)
+        os.utime(self.path, ns=(segundos * 10**9, segundos * 10**9))
+
+    def test_carga_perezosa(self):
+        self.guardar(_entrenar(), 1000)
+        reg = ModelRegistry(self.path, check_interval=60, mmap=False)
+        self.load_model.assert_not_called()
+        model, tag = reg.get()
+        self.assertIsInstance(model, RandomForestAttentionModel)
+        self.assertRegex(tag, r'^RF_v2@[0-9a-f]{8}$')
+        self.assertIs(reg.get().model, model)
+        self.assertEqual(self.load_model.call_count, 1)
+
+    def test_sin_modelo_usa_la_heuristica(self):
+        reg = ModelRegistry(self.path, mmap=False)
+        with self.assertLogs(attention_model_rf.logger, 'WARNING'):
+            self.assertEqual(reg.get(), (None, 'Heuristica_v1'))
+        label, tag = reg.predict_label(METRICS)
+        self.assertEqual((label, tag), (attention_model_rf.heuristic_label(METRICS), 'Heuristica_v1'))
+
+    def test_recarga_en_caliente(self):
+        self.guardar(_entrenar(seed=0), 1000)
+        reg = ModelRegistry(self.path, check_interval=60, mmap=False)
+        antes = reg.get()
+
+        self.guardar(_entrenar(seed=1), 2000)
+        self.assertIs(reg.get(), antes)  # hasta check_interval no mira el disco
+        reg._next_check = 0.0
+        despues = reg.get()
+        self.assertIsNot(despues.model, antes.model)
+        self.assertNotEqual(despues.tag, antes.tag)
+        self.assertEqual(self.load_model.call_count, 2)
+
+        # sin cambios en disco: no recarga
+        reg._next_check = 0.0
+        self.assertIs(reg.get(), despues)
+        self.assertEqual(self.load_model.call_count, 2)
+
+        # el .npz compilado reemplaza al RandomForest
+        compile_model(self.path)
+        reg._next_check = 0.0
+        self.assertIsInstance(reg.get().model, CompiledForest)
+
+    def test_recarga_fallida_conserva_el_modelo_anterior(self):
+        self.guardar(_entrenar(), 1000)
+        reg = ModelRegistry(self.path, check_interval=0, mmap=False)
+        antes = reg.get()
+        with open(self.path, 'wb') as f:
+            f.write(b'a medio escribir')
+        with self.assertLogs(attention_model_rf.logger, 'WARNING'):
+            self.assertIs(reg.get(), antes)
+        # y reintenta en el siguiente chequeo
+        self.guardar(_entrenar(seed=1), 3000)
+        self.assertIsNot(reg.get().model, antes.model)
+
+    def test_registro_compartido_por_ruta(self):
+        reg = get_registry(self.path)
+        self.assertIs(get_registry(os.path.join(os.path.dirname(self.path), '.', 'modelo_rf_v2.joblib')), reg)
+        self.assertIsNot(get_registry(self.path + '.otro'), reg)
+
+
+class LoadDatasetTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        for i in range(6):
+            self.escribir(i, 'ATENTO' if i % 2 else 'NEUTRO', blink_rate=10 + i)
+        patcher = mock.patch.object(attention_model_rf, '_parse_session', wraps=attention_model_rf._parse_session)
+        self.parse = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def escribir(self, i, label, segundos=1000, **metrics):
+        path = os.path.join(self.dir, f's{i:02d}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'metrics': dict(METRICS, **metrics), 'label': label}, f)
+        os.utime(path, ns=(segundos * 10**9, segundos * 10**9))
+
+    def cargar(self, cache=True):
+        self.parse.reset_mock()
+        return load_dataset(self.dir, workers=1, cache=cache)
+
+    def assertIgualASinCache(self, X, y):
+        X2, y2 = self.cargar(cache=False)
+        np.testing.assert_array_equal(X, X2)
+        self.assertEqual(list(y), list(y2))
+
+    def test_segunda_carga_sale_del_cache(self):
+        X, y = self.cargar()
+        self.assertEqual(self.parse.call_count, 6)
+        self.assertTrue(os.path.exists(os.path.join(self.dir, FEATURE_CACHE_DIR, 'manifest.json')))
+        self.assertEqual(X.dtype, np.float32)
+        np.testing.assert_array_equal(X[3], features_from_metrics(dict(METRICS, blink_rate=13)))
+
+        X2, y2 = self.cargar()
+        self.assertEqual(self.parse.call_count, 0)
+        np.testing.assert_array_equal(X2, X)
+        self.assertEqual(list(y2), list(y))
+
+    def test_solo_reprocesa_archivos_cambiados(self):
+        self.cargar()
+        self.escribir(2, 'DISTRAIDO', segundos=2000, blink_rate=99)   # cambia el mtime
+        self.escribir(9, 'ATENTO')                                    # nuevo
+        os.remove(os.path.join(self.dir, 's04.json'))                 # borrado
+        X, y = self.cargar()
+        self.assertEqual(sorted(os.path.basename(c.args[0][0]) for c in self.parse.call_args_list),
+                         ['s02.json', 's09.json'])
+        self.assertEqual(len(X), 6)
+        self.assertEqual((X[2][0], y[2]), (99, 'DISTRAIDO'))
+        self.assertIgualASinCache(X, y)
+
+        self.cargar()
+        self.assertEqual(self.parse.call_count, 0)
+
+    def test_mismo_tamano_y_mtime_distinto(self):
+        self.cargar()
+        self.escribir(1, 'ATENTO', segundos=1001, blink_rate=11)  # mismo contenido y tamaño
+        self.cargar()
+        self.assertEqual(self.parse.call_count, 1)
+
+    def test_archivos_invalidos_no_se_reprocesan(self):
+        with open(os.path.join(self.dir, 'roto.json'), 'w') as f:
+            f.write('{no es json')
+        with mock.patch('builtins.print'):
+            X, _ = self.cargar()
+        self.assertEqual((len(X), self.parse.call_count), (6, 7))
+        self.cargar()
+        self.assertEqual(self.parse.call_count, 0)
+
+    def test_cache_incompatible(self):
+        self.cargar()
+        self.parse.reset_mock()
+        X, _ = load_dataset(self.dir, use_pseudo=False, workers=1)
+        self.assertEqual((len(X), self.parse.call_count), (6, 6))  # otro use_pseudo: se recalcula
@@ -0,0 +1,75 @@
+"""
+Benchmarks de la API: ida y vuelta POST/GET de /api/resultados/ con el
+cliente de DRF contra una BD local (ver bench_settings).
+"""
+import os
+import sys
+
+from harness import bench
+from bench_model import SAMPLE_METRICS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+
+def _setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bench_settings")
+    import django
+    django.setup()
+
+    from django.apps import apps
+    from django.conf import settings
+    from django.db import connection
+
+    if settings.DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+        connection.close()
+        try:
+            os.remove(settings.DATABASES["default"]["NAME"])
+        except FileNotFoundError:
+            pass
+    # los modelos son managed=False: las tablas se crean a mano
+    existing = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config("api").get_models():
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
+
+
+def _seed(n_students=40):
+    from api.models import Usuario, Docente, Curso, Clase, Estudiante
+
+    u = Usuario.objects.create(usuario_us="bench_doc", contrasena_us="x")
+    doc = Docente.objects.create(nombre_dce="Bench", apellido_dce="Doc", correo_dce="doc@bench.test", id_us=u)
+    cur = Curso.objects.create(codigo_cur="BENCH", nombre_cur="Bench")
+    cl = Clase.objects.create(nombre_cl="Bench", id_cur=cur, id_dce=doc)
+    ests = Estudiante.objects.bulk_create([
+        Estudiante(nombre_est=f"E{i}", apellido_est="Bench", correo_est=f"e{i}@bench.test")
+        for i in range(n_students)
+    ])
+    if ests[0].pk is None:  # backends sin RETURNING
+        ests = list(Estudiante.objects.filter(apellido_est="Bench"))
+    return cl, ests
+
+
+def run(quick=False):
+    _setup_django()
+    from rest_framework.test import APIClient
+
+    cl, ests = _seed()
+    client = APIClient()
+    n = 50 if quick else 300
+    it = iter(range(10**9))
+
+    def post():
+        e = ests[next(it) % len(ests)]
+        r = client.post("/api/resultados/", {"id_est": e.pk, "id_cl": cl.pk, "metrics": SAMPLE_METRICS}, format="json")
+        assert r.status_code == 201, r.content
+
+    def get():
+        r = client.get("/api/resultados/", {"id_cl": cl.pk, "limit": 20})
+        assert r.status_code == 200, r.content
+
+    return [
+        bench("api.resultados.post", post, n=n, warmup=10, unit="req/s"),
+        bench("api.resultados.get", get, n=n, warmup=10, unit="req/s"),
+    ]
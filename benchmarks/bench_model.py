@@ -0,0 +1,44 @@
+"""
+Benchmarks del modelo: features_from_metrics + predict (sklearn y compilado).
+"""
+import os
+import sys
+
+import numpy as np
+
+from harness import bench
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+MODEL_PATH = os.path.join(ROOT, "backend", "ia", "MODELS", "modelo_rf_v1.joblib")
+
+SAMPLE_METRICS = {
+    "session_seconds": 60.0, "frames_total": 1800, "frames_face": 1750, "noface_pct": 2.78,
+    "blink_count": 15, "blink_rate": 15.0, "ear_avg": 0.31, "ear_min": 0.12, "ear_max": 0.39,
+    "yaw_avg_abs": 4.2, "pitch_avg_abs": 5.1,
+    "gaze_pct": {"centro": 78.0, "izquierda": 10.0, "derecha": 8.0, "abajo": 4.0},
+}
+
+
+def run(quick=False):
+    from ia.attention_model_rf import (
+        RandomForestAttentionModel, CompiledForest, compiled_path, features_from_metrics,
+    )
+
+    n = 50 if quick else 300
+    results = [bench("model.features_from_metrics", lambda: features_from_metrics(SAMPLE_METRICS), n=n * 10)]
+
+    rf = RandomForestAttentionModel.load(MODEL_PATH)
+    x = features_from_metrics(SAMPLE_METRICS).reshape(1, -1)
+    X40 = np.repeat(x, 40, axis=0)
+    results.append(bench("model.rf.predict_row", lambda: rf.predict(x), n=max(20, n // 5), warmup=3))
+    results.append(bench("model.rf.predict_batch40", lambda: rf.predict(X40),
+                         n=max(20, n // 5), warmup=3, items=40, unit="rows/s"))
+
+    if os.path.exists(compiled_path(MODEL_PATH)):
+        cf = CompiledForest.load(compiled_path(MODEL_PATH))
+        results.append(bench("model.compiled.predict_row", lambda: cf.predict(x), n=n))
+        results.append(bench("model.compiled.predict_batch40", lambda: cf.predict(X40),
+                             n=n, items=40, unit="rows/s"))
+    return results
@@ -0,0 +1,23 @@
+"""
+Settings para benchmarks de la API: los del backend con una BD aislada.
+
+BENCH_DB=sqlite (por defecto) usa un SQLite temporal; BENCH_DB=postgres usa
+el servidor de ``backend.settings`` con la base ``BENCH_PG_NAME`` (debe
+existir y estar vacía: se crean las tablas).
+"""
+import os
+import tempfile
+
+from backend.settings import *  # noqa: F401,F403
+
+ALLOWED_HOSTS = ['*']
+
+if os.environ.get('BENCH_DB', 'sqlite') == 'postgres':
+    DATABASES = {'default': dict(DATABASES['default'], NAME=os.environ.get('BENCH_PG_NAME', 'atencion_educativa_bench'))}  # noqa: F405
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(tempfile.gettempdir(), 'atencion_bench.sqlite3'),
+        }
+    }
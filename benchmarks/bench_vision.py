@@ -0,0 +1,83 @@
+"""
+Benchmarks de visión: FaceMeshGenerator.create_face_mesh y features por frame.
+"""
+import os
+import sys
+
+import numpy as np
+
+from harness import bench
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "frontend", "vision"), os.path.join(ROOT, "backend", "ia")]
+
+
+def _synthetic_landmarks(rng):
+    """Landmarks normalizados plausibles (rostro centrado)."""
+    return (rng.random((478, 3)) * 0.3 + 0.35).astype(np.float32)
+
+
+def _frames(video, shape=(480, 640, 3), n=30):
+    """Frames de un video grabado, o frames sintéticos si no se pasa ninguno."""
+    if video:
+        import cv2 as cv
+        cap = cv.VideoCapture(video)
+        frames = []
+        while len(frames) < n:
+            ok, frame = cap.read()
+            if not ok: break
+            frames.append(frame)
+        cap.release()
+        if frames:
+            return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, shape, dtype=np.uint8) for _ in range(n)]
+
+
+def run(video=None, quick=False):
+    results = []
+    n = 50 if quick else 300
+
+    # --- FaceMesh (requiere mediapipe con mp.solutions) ---
+    try:
+        from FaceMeshModule import FaceMeshGenerator
+        gen = FaceMeshGenerator(num_faces=1)
+    except Exception as e:
+        print(f"[skip] FaceMeshGenerator no disponible: {e}")
+    else:
+        frames = _frames(video)
+        it = iter(range(10**9))
+        results.append(bench("vision.create_face_mesh.dict",
+                             lambda: gen.create_face_mesh(frames[next(it) % len(frames)], draw=False),
+                             n=n // 3, warmup=5, unit="fps"))
+        results.append(bench("vision.create_face_mesh.array",
+                             lambda: gen.create_face_mesh(frames[next(it) % len(frames)], draw=False, as_array=True),
+                             n=n // 3, warmup=5, unit="fps"))
+
+    # --- features por frame ---
+    try:
+        import live_attn_min as L
+        from attn_features import FeatureKernel
+    except Exception as e:
+        print(f"[skip] features de live_attn_min no disponibles: {e}")
+        return results
+
+    rng = np.random.default_rng(1)
+    shape = (480, 640, 3)
+    kernel = FeatureKernel(shape)
+    norm = _synthetic_landmarks(rng)
+    px = kernel.to_pixels(norm)
+    lm = {i: (int(x), int(y)) for i, (x, y) in enumerate(px)}
+
+    def dict_features():
+        L.eye_aspect_ratio(L.RIGHT_EYE_EAR, lm); L.eye_aspect_ratio(L.LEFT_EYE_EAR, lm)
+        L.iris_gaze(lm)
+        L.head_pose_angles(lm, shape)
+
+    results.append(bench("vision.features.dict", dict_features, n=n, unit="fps"))
+    results.append(bench("vision.features.kernel", lambda: kernel.compute(norm), n=n, unit="fps"))
+
+    batch = np.stack([_synthetic_landmarks(rng) for _ in range(256)])
+    results.append(bench("vision.features.kernel_batch256", lambda: kernel.compute(batch),
+                         n=max(5, n // 30), warmup=2, items=len(batch), unit="fps"))
+    return results
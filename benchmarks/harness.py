@@ -0,0 +1,72 @@
+"""
+Medición de latencia (p50/p99) y throughput, y comparación contra una línea base JSON.
+"""
+import json
+import time
+
+import numpy as np
+
+
+class BenchResult(dict):
+    """{"name", "p50_ms", "p99_ms", "mean_ms", "throughput", "unit", "n"}"""
+
+
+def bench(name, fn, n=200, warmup=20, items=1, unit="ops/s", setup=None):
+    """
+    Ejecuta ``fn()`` ``n`` veces (tras ``warmup``) y mide cada llamada.
+
+    ``items`` = elementos procesados por llamada (p.ej. filas de un lote),
+    para que el throughput quede en elementos por segundo.
+    """
+    if setup is not None:
+        setup()
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        t0 = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - t0
+    ms = samples / 1e6
+    total_s = samples.sum() / 1e9
+    return BenchResult(
+        name=name,
+        p50_ms=round(float(np.percentile(ms, 50)), 4),
+        p99_ms=round(float(np.percentile(ms, 99)), 4),
+        mean_ms=round(float(ms.mean()), 4),
+        throughput=round(n * items / total_s, 2) if total_s else 0.0,
+        unit=unit,
+        n=n,
+    )
+
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {r["name"]: r for r in json.load(f)["results"]}
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results, meta=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta or {}, "results": list(results)}, f, indent=2, ensure_ascii=False)
+
+
+def compare(results, baseline, max_regression_pct):
+    """
+    Lista de regresiones: p50/p99 que suben o throughput que baja más de
+    ``max_regression_pct`` % respecto a la línea base.
+    """
+    regressions = []
+    limit = max_regression_pct / 100.0
+    for r in results:
+        base = baseline.get(r["name"])
+        if not base:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if base[key] > 0 and (r[key] - base[key]) / base[key] > limit:
+                regressions.append((r["name"], key, base[key], r[key]))
+        if base["throughput"] > 0 and (base["throughput"] - r["throughput"]) / base["throughput"] > limit:
+            regressions.append((r["name"], "throughput", base["throughput"], r["throughput"]))
+    return regressions
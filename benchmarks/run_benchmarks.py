@@ -0,0 +1,79 @@
+"""
+Suite de benchmarks de los caminos críticos (visión, modelo, API).
+
+Uso (desde la raíz del repo):
+    python benchmarks/run_benchmarks.py                    # corre y compara con la línea base
+    python benchmarks/run_benchmarks.py --save-baseline    # guarda la línea base
+    python benchmarks/run_benchmarks.py --only model api --max-regression 15
+
+Sale con código 1 si algún p50/p99 sube, o throughput baja, más del
+porcentaje configurado. Las líneas base dependen de la máquina: generarlas
+en el mismo equipo donde se compara.
+"""
+import argparse
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import compare, load_baseline, save_baseline  # noqa: E402
+
+GROUPS = ("vision", "model", "api")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "baseline.json")
+
+
+def build_argparser():
+    p = argparse.ArgumentParser(description="Benchmarks de visión, modelo y API")
+    p.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS))
+    p.add_argument("--baseline", default=DEFAULT_BASELINE)
+    p.add_argument("--save-baseline", action="store_true", help="Guardar resultados como línea base")
+    p.add_argument("--max-regression", type=float, default=20.0, help="Regresión tolerada en %%")
+    p.add_argument("--video", default=None, help="Video grabado para FaceMesh (si no, frames sintéticos)")
+    p.add_argument("--quick", action="store_true", help="Menos iteraciones")
+    return p
+
+
+def main(argv=None):
+    args = build_argparser().parse_args(argv)
+    results = []
+    if "vision" in args.only:
+        import bench_vision
+        results += bench_vision.run(video=args.video, quick=args.quick)
+    if "model" in args.only:
+        import bench_model
+        results += bench_model.run(quick=args.quick)
+    if "api" in args.only:
+        import bench_api
+        results += bench_api.run(quick=args.quick)
+
+    print(f"{'benchmark':<36} {'p50 ms':>9} {'p99 ms':>9} {'throughput':>12}")
+    for r in results:
+        print(f"{r['name']:<36} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['throughput']:>12.1f} {r['unit']}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        save_baseline(args.baseline, results, meta={
+            "python": platform.python_version(), "machine": platform.machine(),
+            "node": platform.node(), "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        print(f"\nLínea base guardada en: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nSin línea base en {args.baseline}; usar --save-baseline para crearla.")
+        return 0
+    regressions = compare(results, baseline, args.max_regression)
+    if regressions:
+        print(f"\nRegresiones (> {args.max_regression:.0f}%):")
+        for name, key, old, new in regressions:
+            print(f"  {name} {key}: {old} -> {new}")
+        return 1
+    print(f"\nSin regresiones (> {args.max_regression:.0f}%) respecto a la línea base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
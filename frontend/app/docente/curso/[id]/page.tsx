@@ -14,7 +14,7 @@ import { Badge } from '@/components/ui/badge'
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter } from '@/components/ui/dialog'
 import { Separator } from '@/components/ui/separator'
 
-import { listClases, updateClase, listMatriculas } from '@/app/lib/api'
+import { apiFetch, listClases, updateClase, listMatriculas } from '@/app/lib/api'
 
 /* ===== Resultados API (si quieres, muévelo a app/lib/api.ts) ===== */
 async function fetchResultados(params: {
@@ -26,7 +26,7 @@ async function fetchResultados(params: {
   q.set('id_est', String(params.id_est))
   q.set('id_cur', String(params.id_cur))
   // sin latest ni limit: queremos todos
-  const res = await fetch(`${base}/api/resultados/?${q.toString()}`, { cache: 'no-store' as any })
+  const res = await apiFetch(`${base}/api/resultados/?${q.toString()}`, { cache: 'no-store' as any })
   if (!res.ok) throw new Error('Error al obtener resultados')
   return res.json() as Promise<Array<ResultadoRow>>
 }
@@ -29,6 +29,7 @@ export default function DocenteLoginPage() {
         role: data.role ?? 'admin',
         id_us: data.user?.id_us ?? null,
         profile_id: data.profile_id ?? null,
+        token: data.token ?? null, // Authorization: Bearer <token>
       }
       localStorage.setItem('userType', normalized.role); // 'docente'
       localStorage.setItem('userData', JSON.stringify(normalized));
@@ -38,6 +38,7 @@ export default function EstudianteLoginPage() {
         role: data.role ?? 'admin',
         id_us: data.user?.id_us ?? null,
         profile_id: data.profile_id ?? null,
+        token: data.token ?? null, // Authorization: Bearer <token>
       }
       localStorage.setItem('userType', normalized.role); // 'admin'
       localStorage.setItem('userData', JSON.stringify(normalized));
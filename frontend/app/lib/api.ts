@@ -22,10 +22,40 @@ async function safeJson<T>(res: Response): Promise<T> {
   return data as T;
 }
 
+/* ===== Sesión: token firmado que devuelve /api/login/ (guardado en userData) ===== */
+function sessionToken(): string | null {
+  if (typeof window === 'undefined') return null
+  try { return JSON.parse(localStorage.getItem('userData') || 'null')?.token ?? null }
+  catch { return null }
+}
+
+function dropSessionToken() {
+  try {
+    const u = JSON.parse(localStorage.getItem('userData') || 'null')
+    if (u?.token) localStorage.setItem('userData', JSON.stringify({ ...u, token: null }))
+  } catch { /* userData corrupto: nada que limpiar */ }
+}
+
+/**
+ * fetch con `Authorization: Bearer <token>` si hay sesión. Si el backend
+ * responde 401 (token vencido o inválido) se descarta el token y se
+ * reintenta una vez sin él.
+ */
+export async function apiFetch(url: string, init: RequestInit = {}): Promise<Response> {
+  const token = sessionToken()
+  if (!token) return fetch(url, init)
+  const headers = new Headers(init.headers)
+  headers.set('Authorization', `Bearer ${token}`)
+  const res = await fetch(url, { ...init, headers })
+  if (res.status !== 401) return res
+  dropSessionToken()
+  return fetch(url, init)
+}
+
 async function jsonFetch<T>(url: string, init?: RequestInit): Promise<T> {
-  const res = await fetch(url, {
-    headers: { 'Content-Type': 'application/json' },
+  const res = await apiFetch(url, {
     ...init,
+    headers: { 'Content-Type': 'application/json', ...(init?.headers as Record<string, string> | undefined) },
   })
   return safeJson<T>(res)
 }
@@ -75,7 +105,7 @@ export async function updateDocente(
 }
 
 export async function deleteDocente(id: number) {
-  const res = await fetch(`${BASE}/api/docentes/${id}/`, { method: 'DELETE' })
+  const res = await apiFetch(`${BASE}/api/docentes/${id}/`, { method: 'DELETE' })
   if (!res.ok) throw new Error(await res.text())
   return true
 }
@@ -147,14 +177,14 @@ export async function listClases(params?: { id_cur?: number; id_dce?: number })
   const q = new URLSearchParams()
   if (params?.id_cur) q.append('id_cur', String(params.id_cur))
   if (params?.id_dce) q.append('id_dce', String(params.id_dce))
-  const res = await fetch(`${API}/clases/${q.toString() ? `?${q.toString()}` : ''}`)
+  const res = await apiFetch(`${API}/clases/${q.toString() ? `?${q.toString()}` : ''}`)
   if (!res.ok) throw new Error('Error listClases')
   return res.json()
 }
 
 export function createClase(body: { nombre_cl: string; id_cur: number; id_dce: number }) {
   const url = `${BASE}/api/clases/`
-  return fetch(url, {
+  return apiFetch(url, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(body),
@@ -162,7 +192,7 @@ export function createClase(body: { nombre_cl: string; id_cur: number; id_dce: n
 }
 
 export async function updateClase(id: number, payload: { nombre_cl?: string; video_cl?: string }) {
-  const res = await fetch(`${API}/clases/${id}/`, {
+  const res = await apiFetch(`${API}/clases/${id}/`, {
     method: 'PATCH',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(payload),
@@ -174,7 +204,7 @@ export async function updateClase(id: number, payload: { nombre_cl?: string; vid
 /* ==================== MATRÍCULAS ==================== */
 
 export const createMatricula = (p: { id_est: number; id_cl: number }) =>
-  fetch(`${BASE}/api/matriculas/`, {
+  apiFetch(`${BASE}/api/matriculas/`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(p),
@@ -186,11 +216,22 @@ export const createMatricula = (p: { id_est: number; id_cl: number }) =>
   })
 
 export async function listMatriculas() {
-  const res = await fetch(`${API}/matriculas/`)
+  const res = await apiFetch(`${API}/matriculas/`)
   if (!res.ok) throw new Error('Error listMatriculas')
   return res.json()
 }
 
+/** Matricula en bloque: ids explícitos, los de otra clase y/o los de un curso (se unen). */
+export function matricularEnClase(
+  id_cl: number,
+  body: { id_est?: number[]; desde_clase?: number; id_cur?: number },
+) {
+  return jsonFetch<{ candidatos: number; insertados: number; omitidos: number }>(
+    `${API}/clases/${id_cl}/matricular/`,
+    { method: 'POST', body: JSON.stringify(body) },
+  )
+}
+
 /* ==================== RESULTADOS (IA en backend) ==================== */
 /**
  * Enviamos SOLO lo que la vista espera: id_est, id_cl, metrics.
@@ -204,7 +245,7 @@ export async function createResultadoEvaluacion(input: {
   id_cl: number
   metrics: any
 }) {
-  const res = await fetch(`${API}/resultados/`, {
+  const res = await apiFetch(`${API}/resultados/`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(input),
@@ -217,4 +258,48 @@ export function getResultadoId(r: any): number | null {
   if (typeof r.resultado_id === 'number') return r.resultado_id
   const obj = r.resultado ?? {}
   return obj.id ?? obj.id_re ?? obj.pk ?? null
-}
\ No newline at end of file
+}
+/* ==================== AGREGADOS (calculados en la BD) ==================== */
+export type Nivel = 'ATENTO' | 'NEUTRO' | 'DISTRAIDO'
+
+export type FiltroResultados = {
+  id_cl?: number
+  id_cur?: number
+  id_est?: number
+  desde?: string // fecha o fecha-hora ISO
+  hasta?: string
+}
+
+function qsResultados(f: Record<string, string | number | undefined>) {
+  const q = new URLSearchParams()
+  Object.entries(f).forEach(([k, v]) => { if (v !== undefined && v !== '') q.set(k, String(v)) })
+  return q.toString()
+}
+
+export async function getResumenResultados(f: FiltroResultados = {}) {
+  const res = await apiFetch(`${API}/resultados/resumen/?${qsResultados(f)}`, { cache: 'no-store' })
+  return safeJson<{ total: number; niveles: Record<Nivel, number>; porcentajes: Record<Nivel, number> }>(res)
+}
+
+export async function getTendenciaResultados(
+  f: FiltroResultados & { bucket?: 'hour' | 'day' | 'week' | 'month' } = {},
+) {
+  const res = await apiFetch(`${API}/resultados/tendencia/?${qsResultados(f)}`, { cache: 'no-store' })
+  return safeJson<Array<{ t: string; total: number } & Record<Nivel, number>>>(res)
+}
+
+export async function getTopDistraidos(
+  f: FiltroResultados & { top?: number; por_clase?: 0 | 1; min?: number } = {},
+) {
+  const res = await apiFetch(`${API}/resultados/distraidos/?${qsResultados(f)}`, { cache: 'no-store' })
+  return safeJson<Array<{
+    id_est: number
+    estudiante: string
+    total: number
+    distraidos: number
+    pct_distraido: number
+    id_cl?: number
+    clase?: string
+    rank?: number
+  }>>(res)
+}
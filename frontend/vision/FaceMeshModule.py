@@ -1,6 +1,71 @@
 import cv2 as cv
 import mediapipe as mp
+import numpy as np
 import os
+from collections.abc import Mapping
+from itertools import chain
+
+NUM_LANDMARKS = 478  # 468 de la malla + 10 del iris (refine_landmarks=True)
+
+
+class LandmarkDict(Mapping):
+    """Adaptador de solo lectura con la API antigua ``{id: (x, y)}`` sobre un rostro."""
+
+    __slots__ = ("_px",)
+
+    def __init__(self, px):
+        self._px = px  # (N, 2) int32 en píxeles, o None si no hay rostro
+
+    def __getitem__(self, ID):
+        if self._px is None or not 0 <= ID < len(self._px):
+            raise KeyError(ID)
+        x, y = self._px[ID]
+        return int(x), int(y)
+
+    def __contains__(self, ID):
+        return self._px is not None and isinstance(ID, (int, np.integer)) and 0 <= ID < len(self._px)
+
+    def __iter__(self):
+        return iter(range(0 if self._px is None else len(self._px)))
+
+    def __len__(self):
+        return 0 if self._px is None else len(self._px)
+
+
+class FaceLandmarks:
+    """
+    Landmarks de un frame como arreglo ``(num_faces, N, 3)`` float32 normalizado [0, 1].
+
+    ``norm`` es una vista del buffer del generador: se sobrescribe en el
+    siguiente frame, usar ``norm.copy()`` si hay que conservarlo.
+    """
+
+    __slots__ = ("norm", "frame_shape", "_px")
+
+    def __init__(self, norm, frame_shape):
+        self.norm = norm
+        self.frame_shape = frame_shape
+        self._px = None
+
+    def __len__(self):
+        return self.norm.shape[0]
+
+    def __bool__(self):
+        return self.norm.shape[0] > 0
+
+    @property
+    def pixels(self):
+        """Coordenadas (num_faces, N, 2) int32 en píxeles; se calculan solo si se piden."""
+        if self._px is None:
+            ih, iw = self.frame_shape[:2]
+            self._px = (self.norm[..., :2] * np.array((iw, ih), np.float32)).astype(np.int32)
+        return self._px
+
+    def as_dict(self, face: int = -1) -> LandmarkDict:
+        """Vista compatible con el dict antiguo (por defecto el último rostro, como antes)."""
+        if not self:
+            return LandmarkDict(None)
+        return LandmarkDict(self.pixels[face])
 
 
 class FaceMeshGenerator:
@@ -31,14 +96,27 @@ class FaceMeshGenerator:
 
             self.mp_Draw = mp.solutions.drawing_utils
             self.drawSpecs = self.mp_Draw.DrawingSpec(thickness=1, circle_radius=2)
+
+            # buffer reutilizado entre frames para el modo array
+            self.num_landmarks = NUM_LANDMARKS if refine_landmarks else 468
+            self.landmarks_buf = np.zeros((self.num_faces, self.num_landmarks, 3), np.float32)
         except Exception as e:
             raise RuntimeError(f"Failed to initialize FaceMeshGenerator: {str(e)}")
 
-    def create_face_mesh(self, frame, draw: bool = True):
-        """Procesa un frame y retorna (frame, dict{id: (x,y)})."""
+    def create_face_mesh(self, frame, draw: bool = True, as_array: bool = False, prof=None):
+        """
+        Procesa un frame y retorna (frame, dict{id: (x,y)}).
+
+        Con ``as_array=True`` retorna (frame, FaceLandmarks) respaldado por un
+        buffer preasignado, sin crear objetos Python por landmark; ``prof``
+        (ver attn_profile) separa los tiempos de BGR->RGB y FaceMesh.
+        """
         if frame is None:
             raise ValueError("Input frame cannot be None")
 
+        if as_array:
+            return self._create_face_mesh_array(frame, draw, prof)
+
         try:
             frame_rgb = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
             self.results = self.face_mesh.process(frame_rgb)
@@ -64,6 +142,33 @@ class FaceMeshGenerator:
         except Exception as e:
             raise RuntimeError(f"Error processing frame: {str(e)}")
 
+    def _create_face_mesh_array(self, frame, draw: bool, prof=None):
+        try:
+            frame_rgb = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
+            if prof is not None: prof.lap("bgr2rgb")
+            self.results = self.face_mesh.process(frame_rgb)
+            faces = self.results.multi_face_landmarks or []
+            n = min(len(faces), self.num_faces)
+            per_face = self.num_landmarks * 3
+
+            for i, face_lms in enumerate(faces[:n]):
+                if draw:
+                    self.mp_Draw.draw_landmarks(
+                        frame,
+                        face_lms,
+                        self.mp_faceDetector.FACEMESH_CONTOURS,
+                        self.drawSpecs,
+                        self.drawSpecs,
+                    )
+                # copia directa al buffer; sin tuplas ni dict por landmark
+                coords = chain.from_iterable((lm.x, lm.y, lm.z) for lm in face_lms.landmark)
+                self.landmarks_buf[i].reshape(-1)[:] = np.fromiter(coords, np.float32, count=per_face)
+            if prof is not None: prof.lap("facemesh")
+
+            return frame, FaceLandmarks(self.landmarks_buf[:n], frame.shape)
+        except Exception as e:
+            raise RuntimeError(f"Error processing frame: {str(e)}")
+
 
 def generate_face_mesh(video_path, resizing_factor, save_video=False, filename=None):
     """Demo para previsualizar la malla facial en video/cámara."""
@@ -0,0 +1,126 @@
+"""
+Evaluación offline de videos de clase grabados.
+
+Reparte los archivos de un directorio en un pool de procesos (un
+``FaceMeshGenerator`` por worker), pasa cada frame por la misma acumulación
+que la sesión en vivo y emite, por archivo, el dict ``metrics`` que espera
+``RandomForestAttentionModel``.
+
+Uso:
+    python attn_batch.py VIDEOS/ --out resultados.jsonl --workers 8 \\
+        --model ../../backend/ia/MODELS/modelo_rf_v1.joblib
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import cv2 as cv
+
+from FaceMeshModule import FaceMeshGenerator
+from attn_metrics import AttentionAccumulator
+from attn_pipeline import FrameAnalyzer
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+_analyzer = None  # uno por proceso worker
+
+
+def _init_worker():
+    global _analyzer
+    cv.setNumThreads(1)  # el paralelismo lo da el pool, no OpenCV
+    _analyzer = FrameAnalyzer(FaceMeshGenerator(num_faces=1, refine_landmarks=True))
+
+
+def list_videos(video_dir, exts=VIDEO_EXTS):
+    """Videos del directorio ordenados por nombre."""
+    return sorted(
+        os.path.join(video_dir, f) for f in os.listdir(video_dir)
+        if f.lower().endswith(exts)
+    )
+
+
+def score_video(path, analyzer=None, flip=True):
+    """
+    Procesa un video completo y retorna su dict ``metrics``.
+
+    La duración es la del video (frames / fps), no el tiempo de proceso,
+    para que ``blink_rate`` sea comparable con la sesión en vivo.
+    """
+    analyzer = analyzer or _analyzer
+    cap = cv.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"No se pudo abrir el video: {path}")
+    fps = cap.get(cv.CAP_PROP_FPS) or 30.0
+
+    acc = AttentionAccumulator()
+    try:
+        while True:
+            ok, frame = cap.read()
+            if not ok: break
+            if flip:
+                frame = cv.flip(frame, 1)  # igual que en vivo (cámara espejada)
+            _, feats = analyzer(frame)
+            acc.add_frame(feats, acc.frames / fps)
+    finally:
+        cap.release()
+
+    return acc.summary(acc.frames / fps, "Fin del video")
+
+
+def _score_task(args):
+    path, flip = args
+    t0 = time.perf_counter()
+    try:
+        metrics = score_video(path, flip=flip)
+        return {"video": path, "metrics": metrics, "seconds": round(time.perf_counter() - t0, 2)}
+    except Exception as e:
+        return {"video": path, "error": str(e)}
+
+
+def score_directory(video_dir, workers=None, flip=True):
+    """Genera un resultado por video (en orden de término) usando un pool de procesos."""
+    paths = list_videos(video_dir)
+    workers = workers or os.cpu_count() or 1
+    with Pool(processes=min(workers, max(1, len(paths))), initializer=_init_worker) as pool:
+        yield from pool.imap_unordered(_score_task, [(p, flip) for p in paths])
+
+
+def build_argparser():
+    p = argparse.ArgumentParser(description="Evaluación offline de videos de clase")
+    p.add_argument("videos", help="Directorio con videos grabados")
+    p.add_argument("--out", default="-", help="Archivo JSONL de salida ('-' = stdout)")
+    p.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, núcleos)")
+    p.add_argument("--model", default=None, help="Modelo RF (.joblib) para etiquetar cada video")
+    p.add_argument("--no-flip", action="store_true", help="No espejar los frames")
+    return p
+
+
+def main(argv=None):
+    args = build_argparser().parse_args(argv)
+
+    models = None
+    if args.model:
+        from attention_model_rf import get_registry
+        models = get_registry(args.model)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    t0 = time.perf_counter(); n = 0; frames = 0
+    try:
+        for res in score_directory(args.videos, args.workers, flip=not args.no_flip):
+            if models is not None and "metrics" in res:
+                res["nivel"], res["modelo"] = models.predict_label(res["metrics"])
+            frames += res.get("metrics", {}).get("frames_total", 0)
+            out.write(json.dumps(res, ensure_ascii=False) + "\n"); out.flush()
+            n += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    dt = time.perf_counter() - t0
+    print(f"{n} videos, {frames} frames en {dt:.1f}s ({frames/dt if dt else 0:.0f} fps)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Kernel vectorizado de features de atención sobre arreglos de landmarks.
+
+Calcula EAR, ratios de iris y yaw/pitch/roll a partir de landmarks en forma
+``(478, 2|3)`` (un frame) o ``(N, 478, 2|3)`` (lote), para usarlo tanto en
+vivo como para re-evaluar sesiones grabadas offline.
+"""
+from typing import NamedTuple
+
+import cv2 as cv
+import numpy as np
+
+# Landmarks de ojo/iris
+RIGHT_EYE = [33,7,163,144,145,153,154,155,133,173,157,158,159,160,161,246]
+LEFT_EYE  = [362,382,381,380,374,373,390,249,263,466,388,387,386,385,384,398]
+RIGHT_EYE_EAR = [33,159,158,133,153,145]
+LEFT_EYE_EAR  = [362,380,374,263,386,385]
+RIGHT_IRIS = [468,469,470,471,472]
+LEFT_IRIS  = [473,474,475,476,477]
+
+IRIS_LEFT_THR, IRIS_RIGHT_THR = 0.35, 0.65
+IRIS_UP_THR,   IRIS_DOWN_THR  = 0.40, 0.60
+YAW_LEFT_DEG, YAW_RIGHT_DEG   = -15.0, 15.0
+PITCH_UP_DEG, PITCH_DOWN_DEG  = -15.0, 15.0
+
+# códigos de mirada; -1 = sin dato
+GAZE_LABELS = ("centro", "izquierda", "derecha", "arriba", "abajo")
+GAZE_NONE = -1
+
+# modelo 3D genérico para solvePnP y sus landmarks 2D correspondientes
+MODEL_3D = np.array([
+    (0.0,0.0,0.0),(0.0,-63.6,-12.5),
+    (-43.3,32.7,-26.0),(43.3,32.7,-26.0),
+    (-28.9,-28.9,-24.1),(28.9,-28.9,-24.1)
+], np.float32)
+POSE_IDS = np.array([1,152,263,33,291,61])
+
+_EAR_IDS = np.array([RIGHT_EYE_EAR, LEFT_EYE_EAR])   # (2 ojos, 6)
+_IRIS_IDS = np.array([RIGHT_IRIS, LEFT_IRIS])        # (2 ojos, 5)
+_CORNER_IDS = np.array([[33,133],[362,263]])         # (2 ojos, izq/der)
+_LID_IDS = np.array([[159,145],[386,374]])           # (2 ojos, arriba/abajo)
+
+
+class Features(NamedTuple):
+    """Features por frame; cada campo tiene la forma del lote (``()`` para un frame)."""
+    ear: np.ndarray
+    h_ratio: np.ndarray   # NaN si no hay iris
+    v_ratio: np.ndarray
+    yaw: np.ndarray       # NaN si solvePnP falla
+    pitch: np.ndarray
+    roll: np.ndarray
+    gaze: np.ndarray      # códigos de GAZE_LABELS por iris, GAZE_NONE sin iris
+
+
+def gaze_label(code):
+    """Código de mirada -> etiqueta (o None)."""
+    code = int(code)
+    return None if code == GAZE_NONE else GAZE_LABELS[code]
+
+
+def iris_gaze_codes(h_ratio, v_ratio):
+    """Clasifica la mirada por iris (mismo orden de reglas que ``iris_gaze``)."""
+    h = np.asarray(h_ratio); v = np.asarray(v_ratio)
+    return np.select(
+        [~np.isfinite(h) | ~np.isfinite(v),
+         h <= IRIS_LEFT_THR, h >= IRIS_RIGHT_THR, v <= IRIS_UP_THR, v >= IRIS_DOWN_THR],
+        [GAZE_NONE, 1, 2, 3, 4], 0,
+    ).astype(np.int8)
+
+
+def pose_gaze_codes(yaw, pitch):
+    """Clasifica la mirada por pose (mismo orden de reglas que ``gaze_from_pose``)."""
+    y = np.asarray(yaw); p = np.asarray(pitch)
+    return np.select(
+        [~np.isfinite(y) | ~np.isfinite(p),
+         y <= YAW_LEFT_DEG, y >= YAW_RIGHT_DEG, p <= PITCH_UP_DEG, p >= PITCH_DOWN_DEG],
+        [GAZE_NONE, 1, 2, 3, 4], 0,
+    ).astype(np.int8)
+
+
+def _rodrigues_to_euler(rvecs):
+    """rvecs (M, 3) -> yaw, pitch, roll en grados, vectorizado."""
+    theta = np.linalg.norm(rvecs, axis=1)
+    k = rvecs / np.where(theta > 1e-12, theta, 1.0)[:, None]
+    c, s = np.cos(theta), np.sin(theta)
+    kx, ky, kz = k.T
+    R00 = c + kx*kx*(1-c); R10 = kz*s + kx*ky*(1-c); R20 = -ky*s + kx*kz*(1-c)
+    R11 = c + ky*ky*(1-c); R12 = -kx*s + ky*kz*(1-c)
+    R21 = kx*s + ky*kz*(1-c); R22 = c + kz*kz*(1-c)
+    R01 = -kz*s + kx*ky*(1-c)
+
+    sy = np.sqrt(R00**2 + R10**2)
+    singular = sy < 1e-6
+    yaw = np.degrees(np.arctan2(-R20, sy))
+    pitch = np.degrees(np.where(singular, np.arctan2(-R12, R11), np.arctan2(R21, R22)))
+    roll = np.where(singular, 0.0, np.degrees(np.arctan2(R10, R00)))
+    return yaw, pitch, roll
+
+
+class FeatureKernel:
+    """
+    Precalcula las constantes dependientes del tamaño de frame (matriz de
+    cámara, escala a píxeles) y evalúa todas las features de una pasada.
+    """
+
+    __slots__ = ("frame_size", "scale", "K", "dist")
+
+    def __init__(self, frame_shape):
+        h, w = frame_shape[:2]
+        self.frame_size = (h, w)
+        self.scale = np.array((w, h), np.float32)
+        self.K = np.array([[w,0,w/2],[0,w,h/2],[0,0,1]], np.float32)
+        self.dist = np.zeros((4,1), np.float32)
+
+    def matches(self, frame_shape) -> bool:
+        return self.frame_size == tuple(frame_shape[:2])
+
+    def to_pixels(self, landmarks):
+        """Landmarks normalizados (..., N, 2|3) -> píxeles float32 (..., N, 2)."""
+        return np.asarray(landmarks, np.float32)[..., :2] * self.scale
+
+    def ear(self, px):
+        p = px[..., _EAR_IDS, :]   # (..., 2, 6, 2)
+        A = np.linalg.norm(p[..., 1, :] - p[..., 5, :], axis=-1)
+        B = np.linalg.norm(p[..., 2, :] - p[..., 4, :], axis=-1)
+        C = np.linalg.norm(p[..., 0, :] - p[..., 3, :], axis=-1)
+        return ((A + B) / (2.0*C + 1e-6)).mean(axis=-1)
+
+    def iris_ratios(self, px):
+        if px.shape[-2] <= _IRIS_IDS.max():
+            nan = np.full(px.shape[:-2], np.nan, np.float32)
+            return nan, nan.copy()
+        centers = px[..., _IRIS_IDS, :].mean(axis=-2)    # (..., 2, 2)
+        corners = px[..., _CORNER_IDS, 0]                 # (..., 2, 2) x izq/der
+        lids = px[..., _LID_IDS, 1]                       # (..., 2, 2) y arriba/abajo
+        h = (centers[..., 0] - corners[..., 0]) / (corners[..., 1] - corners[..., 0] + 1e-6)
+        v = (centers[..., 1] - lids[..., 0]) / (lids[..., 1] - lids[..., 0] + 1e-6)
+        return h.mean(axis=-1), v.mean(axis=-1)
+
+    def head_pose(self, px):
+        """yaw, pitch, roll (grados). solvePnP se llama por frame; el resto es vectorizado."""
+        pts = np.ascontiguousarray(px[..., POSE_IDS, :], np.float32)
+        batch = pts.shape[:-2]
+        flat = pts.reshape(-1, len(POSE_IDS), 2)
+        rvecs = np.full((len(flat), 3), np.nan)
+        for i, img2d in enumerate(flat):
+            ok, rvec, _ = cv.solvePnP(MODEL_3D, img2d, self.K, self.dist, flags=cv.SOLVEPNP_ITERATIVE)
+            if ok:
+                rvecs[i] = rvec.ravel()
+        yaw, pitch, roll = _rodrigues_to_euler(rvecs)
+        return yaw.reshape(batch), pitch.reshape(batch), roll.reshape(batch)
+
+    def compute(self, landmarks, normalized: bool = True, prof=None) -> Features:
+        """
+        Evalúa todas las features para ``(478, 2|3)`` o ``(N, 478, 2|3)``.
+
+        ``normalized=True`` para la salida de ``FaceLandmarks.norm``; ``False``
+        si los landmarks ya están en píxeles. ``prof`` (ver attn_profile)
+        separa solvePnP del resto de las features.
+        """
+        px = self.to_pixels(landmarks) if normalized else np.asarray(landmarks, np.float32)[..., :2]
+        ear = self.ear(px)
+        h_ratio, v_ratio = self.iris_ratios(px)
+        gaze = iris_gaze_codes(h_ratio, v_ratio)
+        if prof is not None: prof.lap("features")
+        yaw, pitch, roll = self.head_pose(px)
+        if prof is not None: prof.lap("solvepnp")
+        return Features(
+            ear=ear,
+            h_ratio=h_ratio,
+            v_ratio=v_ratio,
+            yaw=yaw,
+            pitch=pitch,
+            roll=roll,
+            gaze=gaze,
+        )
@@ -0,0 +1,167 @@
+"""
+Acumulación de métricas de atención por sesión.
+
+Recibe las ``Features`` de cada frame (o ``None`` si no hubo rostro) y
+produce el dict ``metrics`` que espera ``RandomForestAttentionModel``, tanto
+para la sesión completa como por ventanas de tiempo (timeline), en O(1) por
+frame.
+"""
+import time
+from collections import deque, Counter
+
+from attn_features import GAZE_NONE, gaze_label, pose_gaze_codes
+
+
+class RunningMean:
+    """Media de los últimos ``n`` valores con suma incremental (O(1) por valor)."""
+
+    __slots__ = ("_q", "_sum")
+
+    def __init__(self, n):
+        self._q = deque(maxlen=n)
+        self._sum = 0.0
+
+    def append(self, v):
+        if len(self._q) == self._q.maxlen:
+            self._sum -= self._q[0]
+        self._q.append(v)
+        self._sum += v
+
+    def __bool__(self):
+        return bool(self._q)
+
+    @property
+    def mean(self):
+        return self._sum / len(self._q)
+
+
+class _Totals:
+    """Contadores de un tramo (sesión o ventana) y su conversión a ``metrics``."""
+
+    __slots__ = ("frames", "frames_face", "blinks", "ear_sum", "ear_min", "ear_max",
+                 "yaw_abs_sum", "pitch_abs_sum", "gaze_counts")
+
+    def __init__(self):
+        self.frames = 0; self.frames_face = 0; self.blinks = 0
+        self.ear_sum = 0.0; self.ear_min = 10.0; self.ear_max = 0.0
+        self.yaw_abs_sum = 0.0; self.pitch_abs_sum = 0.0
+        self.gaze_counts = Counter()
+
+    def to_metrics(self, duration, end_reason=""):
+        dur = max(1.0, duration); minutes = dur/60.0
+        frames = max(1, self.frames); frames_face = self.frames_face
+        ear_avg = (self.ear_sum/frames_face) if frames_face else 0.0
+        blink_rate = self.blinks / minutes
+        noface_pct = (1.0 - (frames_face/frames)) * 100.0
+        yaw_avg_abs = (self.yaw_abs_sum/frames_face) if frames_face else 0.0
+        pitch_avg_abs = (self.pitch_abs_sum/frames_face) if frames_face else 0.0
+        gaze_pct = {k: (v/frames_face)*100.0 for k,v in self.gaze_counts.items()} if frames_face else {}
+
+        return {
+            "session_seconds": round(dur,2),
+            "frames_total": frames,
+            "frames_face": frames_face,
+            "noface_pct": round(noface_pct,2),
+            "blink_count": self.blinks,
+            "blink_rate": round(blink_rate,2),
+            "ear_avg": round(ear_avg,3),
+            "ear_min": 0.0 if self.ear_min>9.0 else round(self.ear_min,3),
+            "ear_max": round(self.ear_max,3),
+            "yaw_avg_abs": round(yaw_avg_abs,2),
+            "pitch_avg_abs": round(pitch_avg_abs,2),
+            "gaze_pct": {k: round(v,2) for k,v in gaze_pct.items()},
+            "end_reason": end_reason,
+        }
+
+
+class AttentionAccumulator:
+    """
+    Acumulador incremental de la sesión.
+
+    Con ``window_seconds`` se cierra una ventana cada tantos segundos (según el
+    ``t`` de cada frame); sus métricas se agregan a ``timeline`` y se pasan a
+    ``on_window`` para clasificar la atención durante la clase.
+    """
+
+    __slots__ = ("ear_threshold", "consec_frames", "window_seconds", "on_window",
+                 "total", "window", "timeline", "frame_counter",
+                 "yaw_mean", "pitch_mean", "t_first", "t_last", "t_window")
+
+    def __init__(self, ear_threshold=0.30, consec_frames=4, smooth_n=5,
+                 window_seconds=None, on_window=None):
+        self.ear_threshold = ear_threshold
+        self.consec_frames = consec_frames
+        self.window_seconds = window_seconds
+        self.on_window = on_window
+        self.total = _Totals()
+        self.window = _Totals()
+        self.timeline = []
+        self.frame_counter = 0
+        self.yaw_mean, self.pitch_mean = RunningMean(smooth_n), RunningMean(smooth_n)
+        self.t_first = self.t_last = self.t_window = None
+
+    @property
+    def frames(self):
+        return self.total.frames
+
+    def add_frame(self, f=None, t=None):
+        """Suma un frame; ``f`` son las Features del rostro o None si no hubo."""
+        if t is None:
+            t = time.perf_counter()
+        if self.t_first is None:
+            self.t_first = self.t_window = t
+        elif self.window_seconds and (t - self.t_window) >= self.window_seconds:
+            self.flush_window(t)
+        self.t_last = t
+
+        tot, win = self.total, self.window
+        tot.frames += 1; win.frames += 1
+        if f is None:
+            return
+        tot.frames_face += 1; win.frames_face += 1
+
+        # EAR + blink
+        ear = float(f.ear)
+        for s in (tot, win):
+            s.ear_sum += ear
+            if ear < s.ear_min: s.ear_min = ear
+            if ear > s.ear_max: s.ear_max = ear
+        if ear < self.ear_threshold: self.frame_counter += 1
+        else:
+            if self.frame_counter >= self.consec_frames:
+                tot.blinks += 1; win.blinks += 1
+            self.frame_counter = 0
+
+        # mirada por iris + pose suavizada como respaldo
+        yaw, pitch = float(f.yaw), float(f.pitch)
+        if yaw == yaw:     self.yaw_mean.append(yaw)      # descarta NaN
+        if pitch == pitch: self.pitch_mean.append(pitch)
+        code = int(f.gaze)
+        if code == GAZE_NONE and self.yaw_mean and self.pitch_mean:
+            code = int(pose_gaze_codes(self.yaw_mean.mean, self.pitch_mean.mean))
+        label = gaze_label(code)
+        if label:
+            tot.gaze_counts[label] += 1; win.gaze_counts[label] += 1
+        if self.yaw_mean:
+            y = abs(self.yaw_mean.mean); tot.yaw_abs_sum += y; win.yaw_abs_sum += y
+        if self.pitch_mean:
+            p = abs(self.pitch_mean.mean); tot.pitch_abs_sum += p; win.pitch_abs_sum += p
+
+    def flush_window(self, t=None):
+        """Cierra la ventana actual (si tiene frames) y la agrega a ``timeline``."""
+        t = self.t_last if t is None else t
+        if self.window.frames == 0 or t is None:
+            return None
+        m = self.window.to_metrics(t - self.t_window)
+        m["t_start"] = round(self.t_window - self.t_first, 2)
+        m["t_end"] = round(t - self.t_first, 2)
+        self.timeline.append(m)
+        self.window = _Totals()
+        self.t_window = t
+        if self.on_window:
+            self.on_window(m)
+        return m
+
+    def summary(self, duration, end_reason=""):
+        """Métricas agregadas de la sesión (mismas claves que antes)."""
+        return self.total.to_metrics(duration, end_reason)
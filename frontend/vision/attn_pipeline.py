@@ -0,0 +1,328 @@
+"""
+Runtimes para la sesión en vivo.
+
+- ``run_pipeline``: captura -> inferencia -> render; cada etapa corre en su
+  propio hilo (el render en el hilo que llama, porque ``cv.imshow`` debe
+  usarse desde el hilo principal) y se comunican por colas acotadas que
+  descartan el frame más antiguo, así una inferencia lenta no bloquea la
+  captura.
+- ``run_headless``: sin ventana ni dibujo; corre FaceMesh cada k frames
+  (``SkipScheduler``) e interpola los landmarks de los frames intermedios.
+
+Ambos aceptan ``prof`` (``attn_profile.StageProfiler``) para medir cada etapa.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+import cv2 as cv
+import numpy as np
+
+from attn_features import FeatureKernel, Features
+from attn_profile import NULL_PROFILER
+
+
+class DropOldestQueue:
+    """Cola acotada: si está llena, ``put`` descarta el elemento más antiguo."""
+
+    def __init__(self, maxsize=2):
+        self._items = deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Siguiente elemento, o None si la cola se cerró y quedó vacía (o vence ``timeout``)."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class FramePacket:
+    """Frame en tránsito con las marcas de tiempo de cada etapa (time.perf_counter)."""
+
+    __slots__ = ("seq", "frame", "t_capture", "t_infer_start", "t_infer_end", "points")
+
+    def __init__(self, seq, frame, t_capture):
+        self.seq = seq
+        self.frame = frame
+        self.t_capture = t_capture
+        self.t_infer_start = self.t_infer_end = None
+        self.points = None  # landmarks en píxeles (copia) para el render
+
+
+class FrameAnalyzer:
+    """FaceMesh + FeatureKernel sobre un frame; crea el kernel con el tamaño del frame."""
+
+    def __init__(self, gen):
+        self.gen = gen
+        self.kernel = None
+
+    def __call__(self, frame, prof=None):
+        """Retorna (FaceLandmarks, Features del último rostro o None)."""
+        _, faces = self.gen.create_face_mesh(frame, draw=False, as_array=True, prof=prof)
+        if not faces:
+            return faces, None
+        if self.kernel is None or not self.kernel.matches(frame.shape):
+            self.kernel = FeatureKernel(frame.shape)
+        return faces, self.kernel.compute(faces.norm[-1], prof=prof)
+
+
+def run_pipeline(cap, analyzer, acc, session_seconds, render=None, flip=True, queue_size=2,
+                 prof=NULL_PROFILER):
+    """
+    Ejecuta la sesión en pipeline y retorna ``(end_reason, duración, runtime)``.
+
+    ``render(frame, points, prof)`` se llama en el hilo actual con cada frame
+    inferido (``points`` = landmarks en píxeles o None) y puede retornar un
+    motivo de fin (str) para detener la sesión. ``runtime`` trae fps
+    observados, frames descartados y latencias por etapa. Con ``prof`` cada
+    hilo mide en su propio ``fork()``; el tiempo de frame es el de inferencia.
+    """
+    infer_q = DropOldestQueue(queue_size)
+    render_q = DropOldestQueue(1) if render else None
+    stop = threading.Event()
+    state = {"end_reason": "Fin de la captura", "captured": 0, "inferred": 0,
+             "latency_sum": 0.0, "latency_max": 0.0, "wait_sum": 0.0}
+    profs = {"capture": prof.fork(), "infer": prof.fork(track_frame=True), "render": prof.fork()}
+    start = time.perf_counter()
+
+    errors = []  # excepción de un hilo: se relanza al terminar
+
+    def capture():
+        p = profs["capture"]
+        seq = 0
+        try:
+            while not stop.is_set():
+                p.frame_start()
+                ok, frame = cap.read()
+                now = time.perf_counter()
+                p.lap("capture")
+                if not ok:
+                    break
+                if (now - start) >= session_seconds:
+                    state["end_reason"] = f"Fin automático de {session_seconds}s"
+                    break
+                if flip:
+                    frame = cv.flip(frame, 1)
+                    p.lap("flip")
+                infer_q.put(FramePacket(seq, frame, now))
+                p.frame_end()
+                seq += 1
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            state["captured"] = seq
+            infer_q.close()
+
+    def infer():
+        p = profs["infer"]
+        try:
+            while True:
+                pkt = infer_q.get()
+                if pkt is None:
+                    break
+                p.frame_start()
+                pkt.t_infer_start = time.perf_counter()
+                faces, feats = analyzer(pkt.frame, p)
+                acc.add_frame(feats, pkt.t_capture)
+                pkt.t_infer_end = time.perf_counter()
+                p.lap("metrics")
+
+                latency = pkt.t_infer_end - pkt.t_capture
+                state["inferred"] += 1
+                state["latency_sum"] += latency
+                state["latency_max"] = max(state["latency_max"], latency)
+                state["wait_sum"] += pkt.t_infer_start - pkt.t_capture
+                if render_q is not None:
+                    pkt.points = faces.pixels[-1].copy() if faces else None
+                    render_q.put(pkt)
+                p.frame_end()
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            # sin esto, un error deja a la captura y al render esperando para siempre
+            stop.set()
+            if render_q is not None:
+                render_q.close()
+
+    threads = [threading.Thread(target=capture, name="attn-capture", daemon=True),
+               threading.Thread(target=infer, name="attn-infer", daemon=True)]
+    for t in threads:
+        t.start()
+
+    rendered = 0
+    try:
+        if render_q is None:
+            # sin render la sesión termina cuando la captura se agota o vence
+            threads[1].join()
+        else:
+            while True:
+                pkt = render_q.get()
+                if pkt is None:
+                    break
+                rendered += 1
+                profs["render"].frame_start()
+                reason = render(pkt.frame, pkt.points, profs["render"])
+                profs["render"].frame_end()
+                if reason:
+                    state["end_reason"] = reason
+                    stop.set()
+                    break
+    except BaseException:
+        stop.set()  # error del render o Ctrl+C: detener la captura antes de esperar los hilos
+        raise
+    finally:
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    for p in profs.values():
+        prof.merge(p)
+
+    dur = time.perf_counter() - start
+    n = max(1, state["inferred"])
+    runtime = {
+        "fps_capture": round(state["captured"]/dur, 2) if dur else 0.0,
+        "fps_inference": round(state["inferred"]/dur, 2) if dur else 0.0,
+        "frames_captured": state["captured"],
+        "frames_dropped": infer_q.dropped,
+        "latency_ms_avg": round(1000.0*state["latency_sum"]/n, 2),
+        "latency_ms_max": round(1000.0*state["latency_max"], 2),
+        "queue_wait_ms_avg": round(1000.0*state["wait_sum"]/n, 2),
+    }
+    if render_q is not None:
+        runtime["fps_render"] = round(rendered/dur, 2) if dur else 0.0
+        runtime["frames_dropped_render"] = render_q.dropped
+    return state["end_reason"], dur, runtime
+
+
+class SkipScheduler:
+    """
+    Elige cada cuántos frames correr FaceMesh (k) para sostener ``target_fps``.
+
+    k se ajusta con una media móvil del tiempo de inferencia y se limita a
+    ``max_skip``; con ``max_skip <= CONSEC_FRAMES // 2`` todo parpadeo de
+    ``CONSEC_FRAMES`` frames cae en al menos dos keyframes.
+    """
+
+    def __init__(self, target_fps=15.0, max_skip=2, alpha=0.2):
+        self.budget = 1.0 / target_fps
+        self.max_skip = max(1, int(max_skip))
+        self.alpha = alpha
+        self.k = 1
+        self.infer_ema = None
+        self._k_sum = 0; self._k_n = 0
+
+    def due(self, since_key):
+        """True si el frame número ``since_key`` desde el último keyframe debe inferirse."""
+        return since_key >= self.k
+
+    def observe(self, infer_seconds):
+        """Registra el tiempo de una inferencia y recalcula k."""
+        if self.infer_ema is None:
+            self.infer_ema = infer_seconds
+        else:
+            self.infer_ema += self.alpha * (infer_seconds - self.infer_ema)
+        self.k = min(self.max_skip, max(1, math.ceil(self.infer_ema / self.budget)))
+        self._k_sum += self.k; self._k_n += 1
+
+    @property
+    def k_avg(self):
+        return self._k_sum / self._k_n if self._k_n else 1.0
+
+
+def interpolate_landmarks(norm0, norm1, weights):
+    """Interpolación lineal (M, N, 3) entre dos keyframes con pesos en [0, 1]."""
+    w = np.asarray(weights, np.float32)[:, None, None]
+    return norm0 + w * (norm1 - norm0)
+
+
+def run_headless(cap, analyzer, acc, session_seconds, scheduler, flip=True, prof=NULL_PROFILER):
+    """
+    Sesión sin render: solo se decodifican e infieren los keyframes.
+
+    Los frames saltados se leen con ``cap.grab()`` (sin decodificar) y, al
+    llegar el siguiente keyframe, sus landmarks se interpolan por tiempo y
+    sus features se calculan en lote. Retorna ``(end_reason, duración, runtime)``.
+    """
+    start = time.perf_counter()
+    end_reason = "Fin de la captura"
+    prev = None       # (t, landmarks copia o None, Features o None) del último keyframe
+    pending = []      # timestamps de los frames saltados desde el último keyframe
+    inferred = 0
+
+    def flush(cur):
+        t0, lm0, f0 = prev
+        t1, lm1, _ = cur
+        if lm0 is not None and lm1 is not None:
+            w = [(t - t0) / ((t1 - t0) or 1.0) for t in pending]
+            batch = analyzer.kernel.compute(interpolate_landmarks(lm0, lm1, w))
+            for i, t in enumerate(pending):
+                acc.add_frame(Features._make(col[i] for col in batch), t)
+        else:
+            # sin rostro en algún extremo: se repite el keyframe anterior
+            for t in pending:
+                acc.add_frame(f0, t)
+
+    while True:
+        now = time.perf_counter()
+        if (now - start) >= session_seconds:
+            end_reason = f"Fin automático de {session_seconds}s"; break
+
+        prof.frame_start()
+        if prev is not None and not scheduler.due(len(pending) + 1):
+            if not cap.grab(): break
+            pending.append(now)
+            prof.lap("grab"); prof.frame_end()
+            continue
+
+        ok, frame = cap.read()
+        if not ok: break
+        prof.lap("capture")
+        if flip:
+            frame = cv.flip(frame, 1)
+            prof.lap("flip")
+
+        t_infer = time.perf_counter()
+        faces, feats = analyzer(frame, prof)
+        scheduler.observe(time.perf_counter() - t_infer)
+        inferred += 1
+
+        cur = (now, faces.norm[-1].copy() if faces else None, feats)
+        if pending:
+            flush(cur)
+            prof.lap("interpolate")
+        acc.add_frame(feats, now)
+        prev, pending = cur, []
+        prof.lap("metrics"); prof.frame_end()
+
+    # frames saltados después del último keyframe
+    for t in pending:
+        acc.add_frame(prev[2], t)
+
+    dur = time.perf_counter() - start
+    runtime = {
+        "fps_capture": round(acc.frames/dur, 2) if dur else 0.0,
+        "fps_inference": round(inferred/dur, 2) if dur else 0.0,
+        "frames_inferred": inferred,
+        "skip_k_avg": round(scheduler.k_avg, 2),
+    }
+    return end_reason, dur, runtime
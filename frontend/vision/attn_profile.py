@@ -0,0 +1,215 @@
+"""
+Instrumentación opcional de la sesión en vivo.
+
+- ``StageProfiler``: cronómetro por etapa (captura, BGR->RGB, FaceMesh,
+  solvePnP, dibujo, display...) sobre histogramas logarítmicos de tamaño
+  fijo; registrar una muestra es O(1) y no guarda las muestras.
+- ``SamplingProfiler``: muestreador de pilas (``sys._current_frames``) en un
+  hilo aparte; escribe stacks colapsados (formato flamegraph.pl / speedscope).
+
+Variables de entorno:
+    ATTN_PROFILE=1                      timers por etapa; ``result["profile"]``
+    ATTN_PROFILE_SAMPLER=pilas.txt      activa el muestreador y escribe ahí
+    ATTN_PROFILE_INTERVAL_MS=5          período de muestreo
+"""
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+_BUCKETS_PER_OCTAVE = 8    # error relativo de percentiles ~ 9 %
+_OCTAVES = 26              # 1 µs .. ~67 s
+_MIN_NS = 1000
+
+
+class LogHistogram:
+    """Histograma de duraciones (ns) con buckets log2; guarda conteo, suma y máximo exactos."""
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * (_BUCKETS_PER_OCTAVE * _OCTAVES)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        i = 0 if ns <= _MIN_NS else int(math.log2(ns / _MIN_NS) * _BUCKETS_PER_OCTAVE)
+        self.counts[min(i, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile_ms(self, q):
+        """Percentil ``q`` (0-100) en ms, centro geométrico del bucket (acotado por el máximo)."""
+        if not self.count:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.counts), math.ceil(self.count * q / 100.0)))
+        ns = _MIN_NS * 2.0 ** ((i + 0.5) / _BUCKETS_PER_OCTAVE)
+        return min(ns, self.max_ns) / 1e6
+
+    def summary(self):
+        mean = self.total_ns / self.count / 1e6 if self.count else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(mean, 3),
+            "p50_ms": round(self.percentile_ms(50), 3),
+            "p90_ms": round(self.percentile_ms(90), 3),
+            "p99_ms": round(self.percentile_ms(99), 3),
+            "max_ms": round(self.max_ns / 1e6, 3),
+        }
+
+
+class StageProfiler:
+    """
+    Tiempos por etapa dentro de cada frame.
+
+    Uso: ``frame_start()``, luego ``lap("etapa")`` al terminar cada etapa
+    (mide desde el lap anterior) y ``frame_end()``. Una etapa puede aparecer
+    varias veces en el frame; se suma antes de registrarse. No es seguro
+    entre hilos: cada hilo usa su propio ``fork()`` y al final se hace ``merge``.
+    """
+
+    enabled = True
+
+    def __init__(self, track_frame=True):
+        self.track_frame = track_frame
+        self.stages = {}            # etapa -> LogHistogram
+        self.frame = LogHistogram()
+        self._cur = {}
+        self._t0 = self._last = None
+
+    def fork(self, track_frame=False):
+        return StageProfiler(track_frame)
+
+    def frame_start(self):
+        self._t0 = self._last = time.perf_counter_ns()
+
+    def lap(self, stage):
+        if self._last is None:
+            return
+        now = time.perf_counter_ns()
+        self._cur[stage] = self._cur.get(stage, 0) + now - self._last
+        self._last = now
+
+    def frame_end(self):
+        if self._t0 is None:
+            return
+        for stage, ns in self._cur.items():
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = LogHistogram()
+            hist.add(ns)
+        if self.track_frame:
+            self.frame.add(time.perf_counter_ns() - self._t0)
+        self._cur.clear()
+        self._t0 = self._last = None
+
+    def merge(self, other):
+        for stage, hist in other.stages.items():
+            if stage in self.stages:
+                self.stages[stage].merge(hist)
+            else:
+                self.stages[stage] = hist
+        self.frame.merge(other.frame)
+
+    def report(self):
+        """Percentiles del frame completo y por etapa, con su porcentaje del tiempo de frame."""
+        frame = self.frame.summary()
+        base = self.frame.total_ns or sum(h.total_ns for h in self.stages.values()) or 1
+        stages = {}
+        for stage, hist in sorted(self.stages.items(), key=lambda kv: -kv[1].total_ns):
+            s = hist.summary()
+            s["share_pct"] = round(100.0 * hist.total_ns / base, 1)
+            stages[stage] = s
+        return {
+            "frames": frame["count"],
+            "fps": round(1000.0 / frame["mean_ms"], 2) if frame["mean_ms"] else 0.0,
+            "frame_ms": frame,
+            "stages": stages,
+        }
+
+
+class _NullProfiler:
+    """Perfilador deshabilitado: mismos métodos, sin costo más allá de la llamada."""
+
+    enabled = False
+
+    def fork(self, track_frame=False): return self
+    def frame_start(self): pass
+    def lap(self, stage): pass
+    def frame_end(self): pass
+    def merge(self, other): pass
+    def report(self): return None
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class SamplingProfiler:
+    """Muestrea las pilas de todos los hilos (menos el propio) cada ``interval`` segundos."""
+
+    def __init__(self, path, interval=0.005):
+        self.path = path
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="attn-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Detiene el muestreo y escribe los stacks colapsados en ``path``."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, n in self.samples.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+def profiler_from_env(enabled=None):
+    """StageProfiler si ``enabled`` (o ATTN_PROFILE=1 cuando es None), si no NULL_PROFILER."""
+    if enabled is None:
+        enabled = os.environ.get("ATTN_PROFILE", "").lower() in ("1", "true", "yes", "on")
+    return StageProfiler() if enabled else NULL_PROFILER
+
+
+def sampler_from_env():
+    """SamplingProfiler configurado por ATTN_PROFILE_SAMPLER, o None."""
+    path = os.environ.get("ATTN_PROFILE_SAMPLER")
+    if not path:
+        return None
+    interval_ms = float(os.environ.get("ATTN_PROFILE_INTERVAL_MS", "5"))
+    return SamplingProfiler(path, interval_ms / 1000.0)
@@ -1,9 +1,16 @@
 import cv2 as cv
 import numpy as np
 import time
-from collections import deque, Counter
-from attention_model_rf import RandomForestAttentionModel
+from attention_model_rf import get_registry
 from FaceMeshModule import FaceMeshGenerator
+from attn_metrics import AttentionAccumulator
+from attn_pipeline import FrameAnalyzer, SkipScheduler, run_pipeline, run_headless
+from attn_profile import NULL_PROFILER, profiler_from_env, sampler_from_env
+from attn_features import (
+    RIGHT_EYE, LEFT_EYE, RIGHT_EYE_EAR, LEFT_EYE_EAR, RIGHT_IRIS, LEFT_IRIS,
+    IRIS_LEFT_THR, IRIS_RIGHT_THR, IRIS_UP_THR, IRIS_DOWN_THR,
+    YAW_LEFT_DEG, YAW_RIGHT_DEG, PITCH_UP_DEG, PITCH_DOWN_DEG,
+)
 
 # ====== Config ======
 CAM_INDEX = 0
@@ -12,30 +19,22 @@ RESIZE_TO = (1280, 360)    # ventana de vista; solo ojos, más angosta
 EAR_THRESHOLD = 0.30
 CONSEC_FRAMES = 4
 SMOOTH_N = 5               # suavizado yaw/pitch
-
-# Modelo IA
+WINDOW_SECONDS = 10        # ventana del timeline de atención
+PIPELINED = False          # captura/inferencia/render en hilos separados
+HEADLESS = False           # sin ventana: solo métricas (equipos de laboratorio)
+TARGET_FPS = 15.0          # headless: fps a sostener saltando inferencias
+MAX_SKIP = max(1, CONSEC_FRAMES // 2)  # headless: k máximo sin perder parpadeos
+PROFILE = None             # timers por etapa; None = variable ATTN_PROFILE (ver attn_profile)
+
+# Modelo IA (mismo registro que el backend: .npz compilado si existe, heurística si no hay modelo)
 MODEL_PATH = "ml/MODELS/modelo_rf_v1.joblib"
-try:
-    rf = RandomForestAttentionModel.load(MODEL_PATH)
-    MODEL_TAG = "RF_v1"
-except Exception:
-    rf = None
-    MODEL_TAG = "Heuristica_v1"  # fallback
-
-# Landmarks de ojo/iris
-RIGHT_EYE = [33,7,163,144,145,153,154,155,133,173,157,158,159,160,161,246]
-LEFT_EYE  = [362,382,381,380,374,373,390,249,263,466,388,387,386,385,384,398]
-RIGHT_EYE_EAR = [33,159,158,133,153,145]
-LEFT_EYE_EAR  = [362,380,374,263,386,385]
-RIGHT_IRIS = [468,469,470,471,472]
-LEFT_IRIS  = [473,474,475,476,477]
-
-IRIS_LEFT_THR, IRIS_RIGHT_THR = 0.35, 0.65
-IRIS_UP_THR,   IRIS_DOWN_THR  = 0.40, 0.60
-YAW_LEFT_DEG, YAW_RIGHT_DEG   = -15.0, 15.0
-PITCH_UP_DEG, PITCH_DOWN_DEG  = -15.0, 15.0
-
-# ====== Utils de visión ======
+models = get_registry(MODEL_PATH)
+
+# Landmarks de ojo/iris (índices y umbrales viven en attn_features)
+EYE_IDS = np.array(RIGHT_EYE + LEFT_EYE)
+IRIS_IDS = np.array([RIGHT_IRIS, LEFT_IRIS])
+
+# ====== Utils de visión (API por dict; run_session usa attn_features) ======
 def eye_aspect_ratio(eye_idx, lm):
     p1,p2,p3,p4,p5,p6 = [np.array(lm[i], np.float32) for i in eye_idx]
     A = np.linalg.norm(p2 - p6); B = np.linalg.norm(p3 - p5); C = np.linalg.norm(p1 - p4)
@@ -117,7 +116,48 @@ def recommend_from_label(label):
     }.get(label,"—")
 
 # ====== Runtime ======
-def run_session(on_result=None):
+def draw_points(frame, px):
+    """Dibuja landmarks de ojo (rojo) y centros de iris (amarillo)."""
+    for x, y in px[EYE_IDS]:
+        cv.circle(frame, (int(x),int(y)), 2, (0,0,255), cv.FILLED)
+    if len(px) > IRIS_IDS.max():
+        for x, y in px[IRIS_IDS].mean(axis=1):
+            cv.circle(frame, (int(x),int(y)), 4, (0,255,255), cv.FILLED)
+
+def show_frame(frame, px, prof=NULL_PROFILER):
+    """Render de la sesión; retorna un motivo de fin si el usuario sale."""
+    if px is not None: draw_points(frame, px)
+    prof.lap("draw")
+    # mostrar ventana (sin textos)
+    disp = cv.resize(frame, RESIZE_TO) if RESIZE_TO else frame
+    cv.imshow("Atención (solo puntos) - p para salir", disp)
+    key = cv.waitKey(1)
+    prof.lap("display")
+    if key & 0xFF == ord('p'):
+        return "Salida manual con p"
+    return None
+
+def classify(metrics):
+    """Clasificación (IA si hay modelo) -> {modelo, nivel, recomendacion, metrics}."""
+    model, tag = models.get()
+    if model is not None:
+        nivel = model.predict_label_from_metrics(metrics)
+        recomendacion = recommend_from_label(nivel)
+    else:
+        nivel, recomendacion = classify_and_recommend(metrics)
+    return {"modelo": tag, "nivel": nivel, "recomendacion": recomendacion, "metrics": metrics}
+
+def run_session(on_result=None, pipelined=PIPELINED, headless=HEADLESS, on_window=None, profile=PROFILE):
+    """
+    Sesión en vivo. ``on_window(result)`` recibe la clasificación de cada
+    ventana de WINDOW_SECONDS mientras corre (en modo pipeline, desde el hilo
+    de inferencia); el resultado final trae además el ``timeline`` completo
+    y ``runtime`` (fps y latencias de la sesión, aparte de ``metrics``).
+
+    Con ``profile`` (o ATTN_PROFILE=1) el resultado trae ``profile``:
+    percentiles del tiempo de frame y de cada etapa. ATTN_PROFILE_SAMPLER
+    escribe además un muestreo de pilas de toda la sesión.
+    """
     cap = cv.VideoCapture(CAM_INDEX)
     if not cap.isOpened():
         raise RuntimeError("No se pudo abrir la cámara")
@@ -125,104 +165,72 @@ def run_session(on_result=None):
     # FaceMesh sin dibujar; solo usaremos puntos para render
     try:    gen = FaceMeshGenerator(refine_landmarks=True)
     except: gen = FaceMeshGenerator()
-
-    start = time.time()
-    frames=0; frames_face=0
-    blink_counter=0; frame_counter=0
-    ear_sum=0.0; ear_min=10.0; ear_max=0.0
-    yaw_abs_sum=0.0; pitch_abs_sum=0.0
-    gaze_counts=Counter()
-    yaw_q, pitch_q = deque(maxlen=SMOOTH_N), deque(maxlen=SMOOTH_N)
-
-    while True:
-        ok, frame = cap.read()
-        if not ok: break
-        frame = cv.flip(frame,1)
-
-        if (time.time()-start) >= SESSION_SECONDS:
-            end_reason=f"Fin automático de {SESSION_SECONDS}s"; break
-
-        _, lm = gen.create_face_mesh(frame, draw=False)
-        frames += 1
-
-        # --- DIBUJO SOLO PUNTOS (como tu imagen) ---
-        # borra textos, solo ojos y centros de iris
-        if lm:
-            frames_face += 1
-
-            # EAR + blink
-            r_ear = eye_aspect_ratio(RIGHT_EYE_EAR,lm)
-            l_ear = eye_aspect_ratio(LEFT_EYE_EAR,lm)
-            ear = (r_ear + l_ear)/2.0
-            ear_sum += ear; ear_min=min(ear_min,ear); ear_max=max(ear_max,ear)
-            if ear < EAR_THRESHOLD: frame_counter += 1
-            else:
-                if frame_counter >= CONSEC_FRAMES: blink_counter += 1
-                frame_counter = 0
-
-            # dibujar landmarks de ojo (rojo) y centros de iris (amarillo)
-            for loc in RIGHT_EYE + LEFT_EYE:
-                if loc in lm: cv.circle(frame, lm[loc], 2, (0,0,255), cv.FILLED)
-            for ids in (RIGHT_IRIS, LEFT_IRIS):
-                c = iris_center(lm, ids)
-                if c is not None: cv.circle(frame, (int(c[0]),int(c[1])), 4, (0,255,255), cv.FILLED)
-
-            # mirada por iris + pose siempre
-            gaze_label = iris_gaze(lm)
-            yaw,pitch,_ = head_pose_angles(lm, frame.shape)
-            if yaw is not None:   yaw_q.append(yaw)
-            if pitch is not None: pitch_q.append(pitch)
-            if (gaze_label is None) and (yaw_q and pitch_q):
-                gaze_label = gaze_from_pose(float(np.mean(yaw_q)), float(np.mean(pitch_q)))
-            if gaze_label: gaze_counts[gaze_label] += 1
-            if yaw_q:   yaw_abs_sum += abs(float(np.mean(yaw_q)))
-            if pitch_q: pitch_abs_sum += abs(float(np.mean(pitch_q)))
-
-        # mostrar ventana (sin textos)
-        disp = cv.resize(frame, RESIZE_TO) if RESIZE_TO else frame
-        cv.imshow("Atención (solo puntos) - p para salir", disp)
-        if cv.waitKey(1) & 0xFF == ord('p'):
-            end_reason = "Salida manual con p"; break
-
-    cap.release(); cv.destroyAllWindows()
+    analyzer = FrameAnalyzer(gen)
+    timeline = []
+    def window_done(m):
+        res = classify(m); timeline.append(res)
+        if on_window: on_window(res)
+    acc = AttentionAccumulator(EAR_THRESHOLD, CONSEC_FRAMES, SMOOTH_N,
+                               window_seconds=WINDOW_SECONDS, on_window=window_done)
+    prof = profiler_from_env(profile)
+    sampler = sampler_from_env()
+    if sampler: sampler.start()
+
+    if headless:
+        # sin dibujo ni ventana; FaceMesh cada k frames con interpolación
+        try:
+            end_reason, dur, runtime = run_headless(
+                cap, analyzer, acc, SESSION_SECONDS, SkipScheduler(TARGET_FPS, MAX_SKIP), prof=prof)
+        finally:
+            cap.release()
+            if sampler: sampler.stop()
+    elif pipelined:
+        # captura / inferencia / render en hilos separados con colas acotadas
+        try:
+            end_reason, dur, runtime = run_pipeline(cap, analyzer, acc, SESSION_SECONDS,
+                                                    render=show_frame, prof=prof)
+        finally:
+            cap.release(); cv.destroyAllWindows()
+            if sampler: sampler.stop()
+    else:
+        start = time.time()
+        end_reason = "Fin de la captura"
+        try:
+            while True:
+                prof.frame_start()
+                ok, frame = cap.read()
+                if not ok: break
+                prof.lap("capture")
+                frame = cv.flip(frame,1)
+                prof.lap("flip")
+
+                if (time.time()-start) >= SESSION_SECONDS:
+                    end_reason=f"Fin automático de {SESSION_SECONDS}s"; break
+
+                faces, feats = analyzer(frame, prof)
+                acc.add_frame(feats)
+                prof.lap("metrics")
+
+                reason = show_frame(frame, faces.pixels[-1] if faces else None, prof)
+                prof.frame_end()
+                if reason:
+                    end_reason = reason; break
+        finally:
+            cap.release(); cv.destroyAllWindows()
+            if sampler: sampler.stop()
+        dur = time.time()-start
+        runtime = {"fps_inference": round(acc.frames/dur, 2) if dur else 0.0}
 
     # métricas agregadas (en memoria)
-    dur = max(1.0, time.time()-start); minutes = dur/60.0
-    frames = max(1, frames); frames_face = max(0, frames_face)
-    ear_avg = (ear_sum/frames_face) if frames_face else 0.0
-    blink_rate = blink_counter / minutes
-    noface_pct = (1.0 - (frames_face/frames)) * 100.0
-    yaw_avg_abs = (yaw_abs_sum/frames_face) if frames_face else 0.0
-    pitch_avg_abs= (pitch_abs_sum/frames_face) if frames_face else 0.0
-    gaze_pct = {k: (v/frames_face)*100.0 for k,v in gaze_counts.items()} if frames_face else {}
-
-    metrics = {
-        "session_seconds": round(dur,2),
-        "frames_total": frames,
-        "frames_face": frames_face,
-        "noface_pct": round(noface_pct,2),
-        "blink_count": blink_counter,
-        "blink_rate": round(blink_rate,2),
-        "ear_avg": round(ear_avg,3),
-        "ear_min": 0.0 if ear_min>9.0 else round(ear_min,3),
-        "ear_max": round(ear_max,3),
-        "yaw_avg_abs": round(yaw_avg_abs,2),
-        "pitch_avg_abs": round(pitch_avg_abs,2),
-        "gaze_pct": {k: round(v,2) for k,v in gaze_pct.items()},
-        "end_reason": end_reason,
-    }
-
-    # Clasificación (IA si hay modelo)
-    if rf is not None:
-        nivel = rf.predict_label_from_metrics(metrics)
-        recomendacion = recommend_from_label(nivel)
-        modelo = MODEL_TAG
-    else:
-        nivel, recomendacion = classify_and_recommend(metrics)
-        modelo = MODEL_TAG
+    acc.flush_window()
+    metrics = acc.summary(dur, end_reason)
 
     # Retorna al backend (no escribe archivos)
-    result = {"modelo": modelo, "nivel": nivel, "recomendacion": recomendacion, "metrics": metrics}
+    result = classify(metrics)
+    result["timeline"] = timeline
+    result["runtime"] = runtime
+    if prof.enabled:
+        result["profile"] = prof.report()
     if on_result: on_result(result)
     return result
 
@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [os.path.join(ROOT, "frontend", "vision"), os.path.join(ROOT, "backend", "ia")]
+
+import live_attn_min as L
+from attn_features import GAZE_NONE, FeatureKernel, gaze_label, iris_gaze_codes
+
+SHAPE = (480, 640, 3)
+
+
+def _landmarks(rng, n=None):
+    """Landmarks normalizados plausibles (rostro centrado), como en bench_vision."""
+    size = (478, 3) if n is None else (n, 478, 3)
+    return (rng.random(size) * 0.3 + 0.35).astype(np.float32)
+
+
+class FeatureKernelTests(unittest.TestCase):
+    """El kernel debe dar lo mismo que las funciones por dict de live_attn_min."""
+
+    def setUp(self):
+        self.kernel = FeatureKernel(SHAPE)
+        self.frames = _landmarks(np.random.default_rng(0), 200)
+
+    def dict_features(self, norm):
+        px = self.kernel.to_pixels(norm)
+        lm = {i: (float(x), float(y)) for i, (x, y) in enumerate(px)}
+        ear = 0.5 * (L.eye_aspect_ratio(L.RIGHT_EYE_EAR, lm) + L.eye_aspect_ratio(L.LEFT_EYE_EAR, lm))
+        return ear, L.iris_gaze(lm), L.head_pose_angles(lm, SHAPE)
+
+    def test_igual_a_las_funciones_por_dict(self):
+        labels = set()
+        for norm in self.frames:
+            f = self.kernel.compute(norm)
+            ear, label, (yaw, pitch, roll) = self.dict_features(norm)
+            self.assertAlmostEqual(float(f.ear), ear, places=5)
+            self.assertEqual(gaze_label(f.gaze), label)
+            np.testing.assert_allclose([f.yaw, f.pitch, f.roll], [yaw, pitch, roll], atol=1e-3)
+            labels.add(label)
+        self.assertGreater(len(labels), 1)
+
+    def test_lote_igual_a_frame_por_frame(self):
+        batch = self.kernel.compute(self.frames)
+        self.assertEqual(batch.ear.shape, (len(self.frames),))
+        for i, norm in enumerate(self.frames[:20]):
+            f = self.kernel.compute(norm)
+            for name in f._fields:
+                np.testing.assert_allclose(getattr(batch, name)[i], getattr(f, name), rtol=1e-6, atol=1e-6,
+                                           err_msg=name)
+
+    def test_landmarks_en_pixeles(self):
+        norm = self.frames[0]
+        a = self.kernel.compute(norm)
+        b = self.kernel.compute(self.kernel.to_pixels(norm), normalized=False)
+        for name in a._fields:
+            np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+
+    def test_sin_iris(self):
+        f = self.kernel.compute(self.frames[0][:468])
+        self.assertTrue(np.isnan(f.h_ratio) and np.isnan(f.v_ratio))
+        self.assertEqual(int(f.gaze), GAZE_NONE)
+        self.assertIsNone(gaze_label(f.gaze))
+
+    def test_codigos_de_mirada(self):
+        h = [0.2, 0.8, 0.5, 0.5, 0.5, np.nan]
+        v = [0.5, 0.5, 0.3, 0.7, 0.5, 0.5]
+        self.assertEqual([gaze_label(c) for c in iris_gaze_codes(h, v)],
+                         ["izquierda", "derecha", "arriba", "abajo", "centro", None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+
+sys.path[:0] = [os.path.dirname(os.path.abspath(__file__))]
+
+from attn_features import GAZE_NONE, Features
+from attn_metrics import AttentionAccumulator, RunningMean
+
+
+def _f(ear=0.35, gaze=0, yaw=0.0, pitch=0.0):
+    nan = float("nan")
+    return Features(ear, nan, nan, yaw, pitch, 0.0, gaze)
+
+
+class RunningMeanTests(unittest.TestCase):
+    def test_media_de_los_ultimos_n(self):
+        m = RunningMean(3)
+        self.assertFalse(m)
+        for v in (1, 2, 3, 10):
+            m.append(v)
+        self.assertEqual(m.mean, 5.0)
+
+
+class AttentionAccumulatorTests(unittest.TestCase):
+    def test_parpadeos(self):
+        acc = AttentionAccumulator(ear_threshold=0.3, consec_frames=3)
+        # 3 frames cerrados cuentan; 2 no; el último parpadeo sigue abierto al final
+        for ear in [0.1]*3 + [0.35] + [0.1]*2 + [0.35] + [0.1]*5:
+            acc.add_frame(_f(ear), t=0.0)
+        m = acc.summary(60)
+        self.assertEqual(m["blink_count"], 1)
+        self.assertEqual((m["ear_min"], m["ear_max"]), (0.1, 0.35))
+
+    def test_sin_rostro_y_mirada(self):
+        acc = AttentionAccumulator()
+        for f in [None, _f(gaze=0), _f(gaze=2), _f(gaze=0), None]:
+            acc.add_frame(f, t=0.0)
+        m = acc.summary(30, "Fin de la captura")
+        self.assertEqual((m["frames_total"], m["frames_face"], m["noface_pct"]), (5, 3, 40.0))
+        self.assertEqual(m["gaze_pct"], {"centro": 66.67, "derecha": 33.33})
+        self.assertEqual((m["session_seconds"], m["end_reason"]), (30, "Fin de la captura"))
+
+    def test_mirada_por_pose_sin_iris(self):
+        acc = AttentionAccumulator(smooth_n=1)
+        acc.add_frame(_f(gaze=GAZE_NONE, yaw=-30.0), t=0.0)
+        acc.add_frame(_f(gaze=GAZE_NONE, pitch=30.0), t=0.0)
+        m = acc.summary(60)
+        self.assertEqual(m["gaze_pct"], {"izquierda": 50.0, "abajo": 50.0})
+        self.assertEqual((m["yaw_avg_abs"], m["pitch_avg_abs"]), (15.0, 15.0))
+
+    def test_sin_ventanas(self):
+        acc = AttentionAccumulator()
+        for i in range(100):
+            acc.add_frame(_f(), t=float(i))
+        self.assertEqual(acc.timeline, [])
+        self.assertEqual(acc.flush_window()["t_end"], 99.0)
+
+    def test_ventanas(self):
+        cerradas = []
+        acc = AttentionAccumulator(ear_threshold=0.3, consec_frames=2, window_seconds=10, on_window=cerradas.append)
+        t0 = 1000.0
+        for i in range(25):
+            # un parpadeo en la segunda ventana
+            acc.add_frame(_f(0.1 if i in (12, 13) else 0.35) if i % 5 else None, t=t0 + i)
+
+        self.assertEqual(len(acc.timeline), 2)
+        self.assertEqual(cerradas, acc.timeline)
+        self.assertEqual([(w["t_start"], w["t_end"]) for w in acc.timeline], [(0, 10), (10, 20)])
+        self.assertEqual([w["frames_total"] for w in acc.timeline], [10, 10])
+        self.assertEqual([w["frames_face"] for w in acc.timeline], [8, 8])
+        self.assertEqual([w["blink_count"] for w in acc.timeline], [0, 1])
+        self.assertEqual(acc.timeline[1]["session_seconds"], 10)
+
+        # la última ventana queda abierta hasta flush_window()
+        last = acc.flush_window()
+        self.assertEqual((last["t_start"], last["t_end"], last["frames_total"]), (20, 24, 5))
+        self.assertEqual(len(cerradas), 3)
+        self.assertIsNone(acc.flush_window())
+
+        self.assertEqual(sum(w["frames_total"] for w in acc.timeline), acc.summary(25)["frames_total"])
+        self.assertEqual(acc.summary(25)["blink_count"], 1)
+
+    def test_hueco_largo_cierra_una_sola_ventana(self):
+        acc = AttentionAccumulator(window_seconds=10)
+        acc.add_frame(_f(), t=0.0)
+        acc.add_frame(_f(), t=35.0)
+        self.assertEqual([(w["t_start"], w["t_end"], w["frames_total"]) for w in acc.timeline], [(0, 35, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
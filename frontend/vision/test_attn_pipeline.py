@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import unittest
+
+import numpy as np
+
+sys.path[:0] = [os.path.dirname(os.path.abspath(__file__))]
+
+from attn_pipeline import SkipScheduler, interpolate_landmarks, run_pipeline
+
+FRAME = np.zeros((4, 4, 3), np.uint8)
+
+
+class _Cap:
+    """Captura falsa: ``n`` frames (None = infinita) a ~1 ms cada uno."""
+
+    def __init__(self, n=None):
+        self.n = n
+        self.reads = 0
+
+    def read(self):
+        time.sleep(0.001)
+        if self.n is not None and self.reads >= self.n:
+            return False, None
+        self.reads += 1
+        return True, FRAME
+
+
+class _Acc:
+    def __init__(self):
+        self.frames = 0
+
+    def add_frame(self, f=None, t=None):
+        self.frames += 1
+
+
+def _sin_rostro(frame, prof=None):
+    return None, None
+
+
+class RunPipelineTests(unittest.TestCase):
+    def correr(self, cap, analyzer=_sin_rostro, session_seconds=60, **kw):
+        self.acc = _Acc()
+        return run_pipeline(cap, analyzer, self.acc, session_seconds, queue_size=1000, **kw)
+
+    def test_sin_render_procesa_toda_la_captura(self):
+        reason, _, runtime = self.correr(_Cap(200))
+        self.assertEqual(reason, "Fin de la captura")
+        self.assertEqual((runtime["frames_captured"], runtime["frames_dropped"]), (200, 0))
+        self.assertEqual(self.acc.frames, 200)
+        self.assertNotIn("fps_render", runtime)
+
+    def test_con_render_procesa_toda_la_captura(self):
+        vistos = []
+        reason, _, runtime = self.correr(_Cap(200), render=lambda fr, pts, p: vistos.append(pts))
+        self.assertEqual(reason, "Fin de la captura")
+        self.assertEqual(runtime["frames_captured"], 200)
+        self.assertEqual(self.acc.frames, 200)
+        self.assertTrue(vistos)
+        self.assertEqual(set(vistos), {None})
+        self.assertIn("fps_render", runtime)
+
+    def test_el_render_puede_terminar_la_sesion(self):
+        cap = _Cap()
+        reason, _, runtime = self.correr(cap, render=lambda fr, pts, p: "q")
+        self.assertEqual(reason, "q")
+        self.assertEqual(runtime["frames_captured"], cap.reads)
+        self.assertLess(cap.reads, 1000)
+
+    def test_fin_automatico(self):
+        for render in (None, lambda fr, pts, p: None):
+            reason, dur, runtime = self.correr(_Cap(), session_seconds=0.2, render=render)
+            self.assertEqual(reason, "Fin automático de 0.2s")
+            self.assertGreaterEqual(dur, 0.2)
+            self.assertEqual(self.acc.frames, runtime["frames_captured"])
+
+    def test_error_del_analizador_se_relanza(self):
+        def roto(frame, prof=None):
+            raise RuntimeError("falla FaceMesh")
+
+        for render in (None, lambda fr, pts, p: None):
+            with self.assertRaisesRegex(RuntimeError, "falla FaceMesh"):
+                self.correr(_Cap(), analyzer=roto, render=render)
+
+
+class SkipSchedulerTests(unittest.TestCase):
+    def test_k_entre_1_y_max_skip(self):
+        s = SkipScheduler(target_fps=10, max_skip=2, alpha=1.0)
+        self.assertEqual((s.k, s.k_avg), (1, 1.0))
+        for infer, k in ((0.05, 1), (0.1, 1), (0.15, 2), (1.0, 2), (0.0, 1)):
+            s.observe(infer)
+            self.assertEqual(s.k, k, infer)
+        self.assertAlmostEqual(s.k_avg, 7 / 5)
+
+    def test_k_sigue_al_presupuesto(self):
+        s = SkipScheduler(target_fps=10, max_skip=5, alpha=1.0)
+        s.observe(0.25)
+        self.assertEqual(s.k, 3)
+        self.assertEqual(SkipScheduler(max_skip=0).max_skip, 1)
+
+    def test_media_movil(self):
+        s = SkipScheduler(target_fps=10, max_skip=5, alpha=0.5)
+        s.observe(0.4)
+        s.observe(0.0)
+        self.assertAlmostEqual(s.infer_ema, 0.2)
+        self.assertEqual(s.k, 2)
+
+    def test_due(self):
+        s = SkipScheduler(target_fps=10, max_skip=3, alpha=1.0)
+        self.assertTrue(s.due(1))
+        s.observe(0.3)
+        self.assertEqual([s.due(i) for i in (1, 2, 3, 4)], [False, False, True, True])
+
+
+class InterpolateLandmarksTests(unittest.TestCase):
+    def test_extremos_y_punto_medio(self):
+        rng = np.random.default_rng(0)
+        a, b = (rng.random((478, 3), dtype=np.float32) for _ in range(2))
+        out = interpolate_landmarks(a, b, [0.0, 0.5, 1.0])
+        self.assertEqual((out.shape, out.dtype), ((3, 478, 3), np.float32))
+        np.testing.assert_array_equal(out[0], a)
+        np.testing.assert_allclose(out[1], (a + b) / 2, atol=1e-6)
+        np.testing.assert_allclose(out[2], b, atol=1e-6)
+
+    def test_sin_pesos(self):
+        a = np.zeros((478, 3), np.float32)
+        self.assertEqual(interpolate_landmarks(a, a + 1, []).shape, (0, 478, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()